@@ -0,0 +1,85 @@
+"""
+艹！基准测试用的本地 GraphQL 替身服务器
+
+用 ThreadingHTTPServer 模拟 /api/graphql，可以注入固定延迟来模拟网络往返，
+这样基准结果不受外网抖动影响。服务器跑在独立子进程里，不和被测客户端抢 GIL。
+"""
+
+import json
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+
+def _echo(payload: Any) -> Dict[str, Any]:
+    """默认处理函数：回显变量"""
+    return {"data": {"echo": payload.get("variables")}}
+
+
+def _serve(handler, latency: float, port_queue):
+    """子进程入口：启动服务器并把端口号传回父进程"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"null")
+            if latency:
+                time.sleep(latency)
+            data = json.dumps(handler(payload)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    ThreadingHTTPServer.request_queue_size = 512
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class LocalGraphQLServer:
+    """
+    本地 GraphQL 替身服务器（子进程）
+
+    handler(payload) 返回响应体字典（必须是模块级函数，子进程要能 pickle），默认回显变量。
+    latency 为每个请求的人为延迟（秒）。
+    """
+
+    def __init__(
+        self,
+        handler: Optional[Callable[[Any], Dict[str, Any]]] = None,
+        latency: float = 0.0,
+    ):
+        self.handler = handler or _echo
+        self.latency = latency
+        self.port: Optional[int] = None
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/graphql"
+
+    def __enter__(self):
+        port_queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve,
+            args=(self.handler, self.latency, port_queue),
+            daemon=True,
+        )
+        self._process.start()
+        self.port = port_queue.get(timeout=10)
+        return self
+
+    def __exit__(self, *exc):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
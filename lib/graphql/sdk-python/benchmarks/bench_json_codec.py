@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+艹！JSON 编解码基准
+
+用和 schema.graphql 一致的 Artwork / Video 字段造出 1-5MB 的列表响应，
+比较每个可用编解码器的解码（响应）和编码（请求体）速度。
+
+运行:
+    python benchmarks/bench_json_codec.py
+    python benchmarks/bench_json_codec.py --items 2000,10000 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from nanobanana_sdk.codec import CODECS, StdlibJSONCodec, available_codecs  # noqa: E402
+
+PROMPTS = [
+    "一只戴着墨镜的香蕉在海边冲浪，电影感光影，8k",
+    "赛博朋克风格的城市夜景，霓虹灯倒映在雨后的街道上",
+    "A cozy cabin in a snowy forest at dusk, warm light from the windows, ultra detailed",
+    "水墨画风格的山水，远处有一叶扁舟，留白",
+]
+
+
+def _timestamp(rng: random.Random) -> str:
+    return f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00.000Z"
+
+
+def _user(rng: random.Random) -> dict:
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "displayName": f"用户{rng.randint(1, 99999)}",
+        "avatarUrl": f"https://cdn.nanobanana.com/avatars/{rng.randint(1, 10 ** 6)}.png",
+    }
+
+
+def make_artwork(rng: random.Random) -> dict:
+    """一个 Artwork（字段和 schema.graphql 保持一致）"""
+    artwork_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    is_video = rng.random() < 0.3
+    author = _user(rng)
+    return {
+        "__typename": "Artwork",
+        "id": artwork_id,
+        "artworkType": "video" if is_video else "image",
+        "aspectRatio": rng.choice(["16:9", "9:16", "1:1"]),
+        "author": author,
+        "userId": author["id"],
+        "completedAt": _timestamp(rng),
+        "createdAt": _timestamp(rng),
+        "duration": rng.choice([4, 6, 8]) if is_video else None,
+        "fileSizeBytes": rng.randint(200_000, 40_000_000),
+        "width": 1920,
+        "height": 1080,
+        "isLiked": rng.random() < 0.2,
+        "isPublic": True,
+        "likeCount": rng.randint(0, 5000),
+        "viewCount": rng.randint(0, 100_000),
+        "prompt": rng.choice(PROMPTS),
+        "resolution": rng.choice(["720p", "1080p"]),
+        "status": "completed",
+        "url": f"https://cdn.nanobanana.com/artworks/{artwork_id}.{'mp4' if is_video else 'png'}",
+        "thumbnailUrl": f"https://cdn.nanobanana.com/thumbs/{artwork_id}.webp",
+    }
+
+
+def make_video(rng: random.Random) -> dict:
+    """一个 Video（字段和 schema.graphql 保持一致）"""
+    video_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    author = _user(rng)
+    return {
+        "__typename": "Video",
+        "id": video_id,
+        "aspectRatio": rng.choice(["16:9", "9:16"]),
+        "author": author,
+        "userId": author["id"],
+        "canRetry": False,
+        "completedAt": _timestamp(rng),
+        "createdAt": _timestamp(rng),
+        "creditCost": rng.choice([10, 15, 20]),
+        "downloadedAt": None,
+        "duration": rng.choice([4, 6, 8]),
+        "errorCode": None,
+        "errorMessage": None,
+        "fileSizeBytes": rng.randint(2_000_000, 60_000_000),
+        "googleVideoUrl": f"https://generativelanguage.googleapis.com/v1/files/{video_id}:download?alt=media",
+        "isExpired": False,
+        "negativePrompt": "blurry, low quality",
+        "operationId": f"operations/{video_id}",
+        "permanentVideoUrl": f"https://cdn.nanobanana.com/videos/{video_id}.mp4",
+        "prompt": rng.choice(PROMPTS),
+        "referenceImageUrl": None,
+        "resolution": rng.choice(["720p", "1080p"]),
+        "retryCount": 0,
+        "status": "completed",
+        "thumbnailUrl": f"https://cdn.nanobanana.com/thumbs/{video_id}.webp",
+    }
+
+
+def make_payloads(items: int):
+    """造两个响应：artworks 列表和 videos 列表"""
+    rng = random.Random(42)
+    return {
+        "artworks": {"data": {"artworks": [make_artwork(rng) for _ in range(items)]}},
+        "videos": {"data": {"videos": [make_video(rng) for _ in range(items)]}},
+    }
+
+
+def bench(fn, repeat: int) -> float:
+    """跑 repeat 次，返回最快一次的耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 编解码基准")
+    parser.add_argument("--items", default="1000,5000", help="列表长度档位")
+    parser.add_argument("--repeat", type=int, default=10, help="每项重复次数（取最快）")
+    args = parser.parse_args()
+
+    # 标准库放第一个当基线
+    codecs = [StdlibJSONCodec()] + [
+        CODECS[name]() for name, ok in available_codecs().items() if ok and name != "json"
+    ]
+    print(f"可用编解码器: {', '.join(codec.name for codec in codecs)}")
+
+    for items in [int(n) for n in args.items.split(",")]:
+        for kind, payload in make_payloads(items).items():
+            raw = codecs[0].dumps(payload)  # 标准库编码的结果作为统一的解码输入
+            size_mb = len(raw) / 1024 / 1024
+            print(f"\n{kind} x {items} ({size_mb:.2f} MB)")
+            print(f"{'codec':>8} {'decode ms':>10} {'speedup':>8} {'encode ms':>10} {'speedup':>8}")
+
+            base_decode = base_encode = None
+            for codec in codecs:
+                decode = bench(lambda: codec.loads(raw), args.repeat)
+                encode = bench(lambda: codec.dumps(payload), args.repeat)
+                base_decode = base_decode or decode
+                base_encode = base_encode or encode
+                print(
+                    f"{codec.name:>8} {decode * 1000:>10.2f} {base_decode / decode:>7.1f}x "
+                    f"{encode * 1000:>10.2f} {base_encode / encode:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
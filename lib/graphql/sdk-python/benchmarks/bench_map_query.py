@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+艹！map_query 对比顺序循环的基准
+
+大部分脚本都是这么写的：
+
+    for row in rows:
+        sdk.query(QUERY, row)
+
+这个基准在本地替身服务器（每请求固定延迟）上比较这种顺序循环和
+sdk.map_query(QUERY, rows, workers=N) 的吞吐，顺便看看 chunksize 的影响。
+
+运行:
+    python benchmarks/bench_map_query.py
+    python benchmarks/bench_map_query.py --requests 2000 --latency 0.05 --workers 8,32
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from nanobanana_sdk import create_sdk  # noqa: E402
+from _local_server import LocalGraphQLServer  # noqa: E402
+
+QUERY = "query GetArtwork($id: ID!) { artwork(id: $id, type: \"image\") { id title } }"
+
+
+def rows(total: int):
+    """惰性生成输入（和真实脚本从文件/数据库读一样）"""
+    for i in range(total):
+        yield {"id": str(i)}
+
+
+def run_sequential(sdk, total: int) -> float:
+    """顺序循环，返回每秒请求数"""
+    start = time.perf_counter()
+    for variables in rows(total):
+        sdk.query(QUERY, variables)
+    return total / (time.perf_counter() - start)
+
+
+def run_map(sdk, total: int, workers: int, chunksize: int) -> float:
+    """map_query，返回每秒请求数"""
+    start = time.perf_counter()
+    for result in sdk.map_query(QUERY, rows(total), workers=workers, chunksize=chunksize):
+        result.unwrap()
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="map_query 对比顺序循环")
+    parser.add_argument("--requests", type=int, default=500, help="每档发的请求数")
+    parser.add_argument("--latency", type=float, default=0.02, help="服务端模拟延迟（秒）")
+    parser.add_argument("--workers", default="4,8,16,32", help="线程数档位")
+    parser.add_argument("--chunksize", default="1,4", help="chunksize 档位")
+    args = parser.parse_args()
+
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    chunksizes = [int(c) for c in args.chunksize.split(",")]
+
+    with LocalGraphQLServer(latency=args.latency) as server:
+        with create_sdk(
+            server.url,
+            enable_logging=False,
+            max_connections=max(worker_counts),
+        ) as sdk:
+            run_map(sdk, 50, 4, 1)  # 预热连接池
+
+            print(f"服务端延迟 {args.latency * 1000:.1f}ms，每档 {args.requests} 个请求")
+            print(f"{'mode':>20} {'req/s':>10} {'speedup':>8}")
+            baseline = run_sequential(sdk, args.requests)
+            print(f"{'sequential loop':>20} {baseline:>10.0f} {1.0:>7.1f}x")
+            for workers in worker_counts:
+                for chunksize in chunksizes:
+                    rps = run_map(sdk, args.requests, workers, chunksize)
+                    label = f"map w={workers} c={chunksize}"
+                    print(f"{label:>20} {rps:>10.0f} {rps / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
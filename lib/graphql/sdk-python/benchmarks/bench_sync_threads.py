@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+艹！同步传输多线程吞吐基准
+
+所有线程共享一个 GraphQLSDK 实例，对本地替身服务器（每请求固定延迟）发请求，
+看吞吐随线程数的变化。连接池够大的话，吞吐应该随线程数近似线性增长。
+
+运行:
+    python benchmarks/bench_sync_threads.py
+    python benchmarks/bench_sync_threads.py --requests 2000 --latency 0.05
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from nanobanana_sdk import create_sdk  # noqa: E402
+from _local_server import LocalGraphQLServer  # noqa: E402
+
+QUERY = "query GetArtwork($id: ID!) { artwork(id: $id, type: \"image\") { id title } }"
+
+
+def run(sdk, threads: int, total: int) -> float:
+    """用 threads 个线程发 total 个请求，返回每秒请求数"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in pool.map(lambda i: sdk.query(QUERY, {"id": str(i)}), range(total)):
+            pass
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同步传输多线程吞吐基准")
+    parser.add_argument("--requests", type=int, default=1000, help="每档线程数发的请求数")
+    parser.add_argument("--latency", type=float, default=0.02, help="服务端模拟延迟（秒）")
+    parser.add_argument("--threads", default="1,2,4,8,16,32,64", help="线程数档位")
+    args = parser.parse_args()
+
+    thread_counts = [int(t) for t in args.threads.split(",")]
+
+    with LocalGraphQLServer(latency=args.latency) as server:
+        with create_sdk(
+            server.url,
+            enable_logging=False,
+            max_connections=max(thread_counts),
+        ) as sdk:
+            run(sdk, 4, 50)  # 预热连接池
+
+            print(f"服务端延迟 {args.latency * 1000:.1f}ms，每档 {args.requests} 个请求")
+            print(f"{'threads':>8} {'req/s':>10} {'speedup':>8}")
+            baseline = None
+            for threads in thread_counts:
+                rps = run(sdk, threads, args.requests)
+                baseline = baseline or rps
+                print(f"{threads:>8} {rps:>10.0f} {rps / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,27 @@
 - 类型安全的 GraphQL 客户端
 - 智能错误分类和处理（7 种错误类型）
 - 自动重试机制（指数退避 + 随机抖动）
+- 解析文档 LRU 缓存 + 预编译查询
+- 长连接池（同步多线程安全 / 异步 aiohttp 会话复用）
+- 传输层批量请求（N 个操作一个 HTTP POST）
+- 客户端 DataLoader（按 ID 查询自动合并成带别名的单个操作）
+- 自动持久化查询 APQ（只传 sha256 哈希）
+- 规范化响应缓存（按 __typename:id 存储实体，按类型 TTL + 内存预算）
+- 单飞去重（相同的查询正在飞时只发一次请求）
+- GET 查询 + ETag / Last-Modified 条件请求（304 不传 body 也不解码）
+- 请求体 gzip / brotli / zstd 压缩 + 响应编码协商
+- 可插拔 JSON 编解码（orjson / ujson / 标准库 json）
+- 大列表响应流式解码（stream_query，边收边吐元素）
+- Relay Connection 自动翻页 + 下一页预取（iter_connection）
+- limit/offset 列表并发翻页（iter_pages）
+- 有界并发批量执行（execute_many / map_query，惰性输入、单条失败不中断）
+- SSE 订阅（断线重连 + Last-Event-ID + 心跳检测）+ 共享订阅扇出（一条上游连接，多个本地消费者）
+- 视频任务跟踪（video_tracker，自适应轮询 + 状态查询并发上限，每个任务一个可 await 的句柄）
+- 内嵌 webhook 接收器（HMAC 常量时间验签，webhook 先到直接交结果，过期才退回轮询）
+- 查询复杂度预估（和服务端同一套打分规则，超限的查询按顶层字段自动拆分再合并）
+- 客户端限流（按订阅层级的令牌桶，跨线程 / 跨任务匀速放行，跑满配额不吃 429）
+- 批量生图（batch_generate，切块有界并发提交，逐条吐结果，检查点断点恢复）
+- 视频下载（download_video / download_videos，流式写盘 + 断点续传 + 并行分块 + 大小校验）
 - Token 管理
 - 结构化日志
 - 支持同步和异步调用
@@ -88,6 +109,130 @@ from .retry import (
     with_retry_async,
 )
 
+from .apq import (
+    PersistedQueryRegistry,
+    PersistedQueryStats,
+    build_manifest,
+)
+
+from .batch import (
+    BatchOperation,
+    BatchResult,
+)
+
+from .bulk import (
+    BulkResult,
+)
+
+from .cache import (
+    DocumentCache,
+    DocumentCacheStats,
+    PreparedQuery,
+)
+
+from .dataloader import (
+    DataLoader,
+    LoaderSpec,
+    LoaderStats,
+)
+
+from .normalized_cache import (
+    NormalizedCache,
+    NormalizedCacheConfig,
+    NormalizedCacheStats,
+)
+
+from .codec import (
+    JSONCodec,
+    available_codecs,
+    get_codec,
+)
+
+from .compression import (
+    CompressionConfig,
+    CompressionStats,
+)
+
+from .http_cache import (
+    HTTPCacheStats,
+    HTTPResponseStore,
+    build_get_url,
+)
+
+from .streaming import (
+    QueryStream,
+    StreamingListParser,
+)
+
+from .complexity import (
+    COMPLEXITY_LIMITS,
+    COMPLEXITY_WEIGHTS,
+    ComplexityConfig,
+    ComplexityEstimator,
+    ComplexityStats,
+    calculate_complexity,
+    merge_results,
+)
+
+from .rate_limit import (
+    RATE_LIMIT_TIERS,
+    RateLimitConfig,
+    RateLimitInfo,
+    RateLimiter,
+    RateLimiterStats,
+)
+
+from .batch_generate import (
+    BatchCheckpoint,
+    BatchGenerateConfig,
+    BatchGenerateStats,
+    BatchGenerator,
+    BatchItemResult,
+)
+
+from .downloads import (
+    DownloadConfig,
+    DownloadResult,
+)
+
+from .pagination import (
+    ConnectionIterator,
+    OffsetPageIterator,
+)
+
+from .subscription_hub import (
+    SlowConsumerError,
+    SubscriptionHub,
+    SubscriptionHubStats,
+)
+
+from .subscriptions import (
+    SSEEvent,
+    SSEParser,
+    Subscription,
+    SubscriptionConfig,
+)
+
+from .singleflight import (
+    SingleFlightStats,
+)
+
+from .video_jobs import (
+    VideoJob,
+    VideoJobConfig,
+    VideoJobStats,
+    VideoJobStatus,
+    VideoJobTracker,
+)
+
+from .webhooks import (
+    WebhookEvent,
+    WebhookReceiver,
+    WebhookStats,
+    sign_payload,
+    verify_signature,
+)
+
 from .logger import (
     SDKLogger,
     set_log_level,
@@ -125,6 +270,106 @@ __all__ = [
     "with_retry",
     "with_retry_async",
 
+    # 自动持久化查询（APQ）
+    "PersistedQueryRegistry",
+    "PersistedQueryStats",
+    "build_manifest",
+
+    # 批量请求
+    "BatchOperation",
+    "BatchResult",
+    "BulkResult",
+
+    # 文档缓存
+    "DocumentCache",
+    "DocumentCacheStats",
+    "PreparedQuery",
+
+    # DataLoader
+    "DataLoader",
+    "LoaderSpec",
+    "LoaderStats",
+
+    # 规范化响应缓存
+    "NormalizedCache",
+    "NormalizedCacheConfig",
+    "NormalizedCacheStats",
+
+    # JSON 编解码
+    "JSONCodec",
+    "available_codecs",
+    "get_codec",
+
+    # 压缩
+    "CompressionConfig",
+    "CompressionStats",
+
+    # GET 查询 + 条件请求
+    "HTTPCacheStats",
+    "HTTPResponseStore",
+    "build_get_url",
+
+    # 流式解码
+    "QueryStream",
+    "StreamingListParser",
+
+    # 查询复杂度
+    "COMPLEXITY_LIMITS",
+    "COMPLEXITY_WEIGHTS",
+    "ComplexityConfig",
+    "ComplexityEstimator",
+    "ComplexityStats",
+    "calculate_complexity",
+    "merge_results",
+
+    # 客户端限流
+    "RATE_LIMIT_TIERS",
+    "RateLimitConfig",
+    "RateLimitInfo",
+    "RateLimiter",
+    "RateLimiterStats",
+
+    # 批量生图
+    "BatchCheckpoint",
+    "BatchGenerateConfig",
+    "BatchGenerateStats",
+    "BatchGenerator",
+    "BatchItemResult",
+
+    # 视频下载
+    "DownloadConfig",
+    "DownloadResult",
+
+    # 分页
+    "ConnectionIterator",
+    "OffsetPageIterator",
+
+    # 订阅
+    "SSEEvent",
+    "SSEParser",
+    "Subscription",
+    "SubscriptionConfig",
+    "SubscriptionHub",
+    "SubscriptionHubStats",
+    "SlowConsumerError",
+
+    # 单飞去重
+    "SingleFlightStats",
+
+    # 视频任务
+    "VideoJob",
+    "VideoJobConfig",
+    "VideoJobStats",
+    "VideoJobStatus",
+    "VideoJobTracker",
+
+    # Webhook
+    "WebhookEvent",
+    "WebhookReceiver",
+    "WebhookStats",
+    "sign_payload",
+    "verify_signature",
+
     # 日志记录
     "SDKLogger",
     "set_log_level",
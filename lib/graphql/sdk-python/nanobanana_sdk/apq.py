@@ -0,0 +1,241 @@
+"""
+艹！Nano Banana GraphQL SDK 自动持久化查询（APQ）模块
+
+几 KB 的查询文本每次请求都要上传一遍，太tm浪费了！APQ 的流程：
+1. 只发送查询文本的 sha256 哈希（extensions.persistedQuery）
+2. 服务端不认识这个哈希 → 返回 PersistedQueryNotFound
+3. 客户端带上完整文本重发一次，服务端记住哈希，以后就只传哈希了
+
+本地注册表缓存"文本 → 哈希"（不用每次都算 sha256），
+并记录哪些哈希服务端已经认识（来自成功的请求或者预先构建的清单）。
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+APQ_VERSION = 1
+
+# 服务端表示"不认识这个哈希"/"不支持 APQ"的错误
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+PERSISTED_QUERY_NOT_SUPPORTED = "PersistedQueryNotSupported"
+
+
+def compute_hash(query: str) -> str:
+    """
+    计算查询文本的 sha256 哈希（十六进制）
+
+    Args:
+        query: GraphQL 查询文本（必须和实际发送的文本完全一致）
+
+    Returns:
+        64 位十六进制哈希
+    """
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def _error_matches(errors: Optional[List[Any]], marker: str) -> bool:
+    """检查 GraphQL 错误列表里是否有指定的 APQ 错误"""
+    code = "PERSISTED_QUERY_NOT_FOUND" if marker == PERSISTED_QUERY_NOT_FOUND else "PERSISTED_QUERY_NOT_SUPPORTED"
+    for error in errors or []:
+        if not isinstance(error, dict):
+            continue
+        if error.get("message") == marker:
+            return True
+        if (error.get("extensions") or {}).get("code") == code:
+            return True
+    return False
+
+
+def is_persisted_query_not_found(errors: Optional[List[Any]]) -> bool:
+    """服务端是否返回了 PersistedQueryNotFound"""
+    return _error_matches(errors, PERSISTED_QUERY_NOT_FOUND)
+
+
+def is_persisted_query_not_supported(errors: Optional[List[Any]]) -> bool:
+    """服务端是否返回了 PersistedQueryNotSupported"""
+    return _error_matches(errors, PERSISTED_QUERY_NOT_SUPPORTED)
+
+
+def build_manifest(queries: Iterable[str]) -> Dict[str, str]:
+    """
+    艹！预先构建持久化查询清单（哈希 → 查询文本）
+
+    部署前把清单注册到服务端，客户端加载同一份清单后第一次请求就能只传哈希。
+
+    Args:
+        queries: 查询文本列表
+
+    Returns:
+        {sha256: query} 字典（可以直接 json.dump 成文件）
+    """
+    return {compute_hash(query): query for query in queries}
+
+
+@dataclass
+class PersistedQueryStats:
+    """
+    APQ 统计
+
+    - hash_only: 只发送哈希的请求数
+    - not_found: 服务端返回 PersistedQueryNotFound、带全文重发的次数
+    - registered: 本地注册表里服务端已知的哈希数
+    - bytes_saved: 因为只发哈希而少上传的查询文本字节数
+    """
+    hash_only: int = 0
+    not_found: int = 0
+    registered: int = 0
+    bytes_saved: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典格式"""
+        return {
+            "hash_only": self.hash_only,
+            "not_found": self.not_found,
+            "registered": self.registered,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class PersistedQueryRegistry:
+    """
+    艹！线程安全的持久化查询注册表
+
+    - hash_for(): 文本 → 哈希（带缓存）
+    - build_payload(): 生成只带哈希（或者带全文）的请求体
+    - mark_registered(): 记录服务端已知的哈希
+    - load_manifest(): 加载预先构建的清单
+    """
+
+    def __init__(self, manifest: Optional[Union[str, Dict[str, Any]]] = None):
+        """
+        初始化注册表
+
+        Args:
+            manifest: 预先构建的清单（文件路径或字典，可选）
+        """
+        self.enabled = True
+        self._hashes: Dict[str, str] = {}
+        self._registered: set = set()
+        self._lock = threading.Lock()
+        self._stats = PersistedQueryStats()
+
+        if manifest is not None:
+            self.load_manifest(manifest)
+
+    def hash_for(self, query: str) -> str:
+        """
+        获取查询文本的哈希（算过就直接用缓存）
+
+        Args:
+            query: 查询文本
+
+        Returns:
+            sha256 哈希
+        """
+        digest = self._hashes.get(query)
+        if digest is None:
+            digest = compute_hash(query)
+            with self._lock:
+                self._hashes[query] = digest
+        return digest
+
+    def is_registered(self, query: str) -> bool:
+        """服务端是否已经认识这段查询"""
+        return self.hash_for(query) in self._registered
+
+    def mark_registered(self, query: str):
+        """记录服务端已经认识这段查询"""
+        digest = self.hash_for(query)
+        with self._lock:
+            if digest not in self._registered:
+                self._registered.add(digest)
+                self._stats.registered = len(self._registered)
+
+    def record_hash_only(self, query: str):
+        """统计一次只发哈希的请求"""
+        with self._lock:
+            self._stats.hash_only += 1
+            self._stats.bytes_saved += len(query.encode("utf-8"))
+
+    def record_not_found(self, query: str):
+        """统计一次 PersistedQueryNotFound（并把哈希从已知列表里移除）"""
+        digest = self.hash_for(query)
+        with self._lock:
+            self._stats.not_found += 1
+            self._registered.discard(digest)
+            self._stats.registered = len(self._registered)
+
+    def build_payload(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        include_query: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        艹！构建 APQ 请求体
+
+        Args:
+            query: 查询文本
+            variables: 变量（可选）
+            include_query: 是否带上完整文本（注册/回退时使用）
+
+        Returns:
+            请求体字典
+        """
+        payload: Dict[str, Any] = {}
+        if include_query:
+            payload["query"] = query
+        if variables:
+            payload["variables"] = variables
+        payload["extensions"] = {
+            "persistedQuery": {"version": APQ_VERSION, "sha256Hash": self.hash_for(query)}
+        }
+        return payload
+
+    def load_manifest(self, manifest: Union[str, Dict[str, Any]]) -> int:
+        """
+        艹！加载预先构建的清单，清单里的查询视为服务端已知
+
+        支持两种格式：
+        - {sha256: query}（build_manifest() 的输出）
+        - Apollo 清单：{"operations": [{"id": sha256, "body": query}, ...]}
+
+        Args:
+            manifest: 清单文件路径或字典
+
+        Returns:
+            加载的查询数
+
+        Raises:
+            ValueError: 如果清单里的哈希和文本对不上
+        """
+        if isinstance(manifest, str):
+            with open(manifest, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+
+        if isinstance(manifest.get("operations"), list):
+            entries = [(op.get("id"), op.get("body")) for op in manifest["operations"]]
+        else:
+            entries = list(manifest.items())
+
+        for digest, query in entries:
+            if not isinstance(query, str):
+                continue
+            actual = compute_hash(query)
+            if digest and digest != actual:
+                raise ValueError(f"艹，清单里的哈希和查询文本对不上: {digest}")
+            with self._lock:
+                self._hashes[query] = actual
+                self._registered.add(actual)
+
+        with self._lock:
+            self._stats.registered = len(self._registered)
+        return len(entries)
+
+    def stats(self) -> PersistedQueryStats:
+        """获取统计快照"""
+        with self._lock:
+            return PersistedQueryStats(**self._stats.to_dict())
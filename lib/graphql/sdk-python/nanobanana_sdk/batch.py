@@ -0,0 +1,117 @@
+"""
+艹！Nano Banana GraphQL SDK 批量请求模块
+
+这个SB模块定义批量操作的输入/输出结构：
+把 N 个操作塞进一个 HTTP POST（graphql-yoga 支持数组批量），
+每个操作的结果和错误各自独立返回，一个失败不影响其他的。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+from .cache import PreparedQuery
+from .errors import GraphQLSDKError
+
+
+@dataclass
+class BatchOperation:
+    """
+    批量请求里的单个操作
+
+    - query: GraphQL 查询文本（或 prepare() 返回的句柄）
+    - variables: 变量（可选）
+    - operation_name: 操作名称（可选，用于日志）
+    """
+    query: Union[str, PreparedQuery]
+    variables: Optional[Dict[str, Any]] = None
+    operation_name: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    """
+    批量请求里单个操作的结果
+
+    - data: 响应数据（失败时可能是 None 或部分数据）
+    - error: 分类后的错误（成功时为 None）
+    """
+    data: Any = None
+    error: Optional[GraphQLSDKError] = None
+
+    @property
+    def ok(self) -> bool:
+        """这个操作是否成功"""
+        return self.error is None
+
+    def unwrap(self) -> Any:
+        """
+        艹！取出数据，失败就抛出错误
+
+        Returns:
+            响应数据
+
+        Raises:
+            GraphQLSDKError: 如果这个操作失败了
+        """
+        if self.error is not None:
+            raise self.error
+        return self.data
+
+
+# 批量操作的输入格式：BatchOperation、查询文本、(query, variables) 元组或字典
+BatchInput = Union[BatchOperation, str, PreparedQuery, tuple, Dict[str, Any]]
+
+
+def normalize_operation(item: BatchInput) -> BatchOperation:
+    """
+    艹！把各种输入格式统一成 BatchOperation
+
+    支持的格式：
+    - BatchOperation
+    - "query { ... }" 或 PreparedQuery
+    - (query, variables) / (query, variables, operation_name)
+    - {"query": ..., "variables": ..., "operation_name": ...}
+
+    Args:
+        item: 单个操作
+
+    Returns:
+        BatchOperation 实例
+
+    Raises:
+        TypeError: 如果格式不认识
+    """
+    if isinstance(item, BatchOperation):
+        return item
+    if isinstance(item, (str, PreparedQuery)):
+        return BatchOperation(query=item)
+    if isinstance(item, tuple) and 1 <= len(item) <= 3:
+        return BatchOperation(*item)
+    if isinstance(item, dict) and "query" in item:
+        return BatchOperation(
+            query=item["query"],
+            variables=item.get("variables"),
+            operation_name=item.get("operation_name") or item.get("operationName"),
+        )
+    raise TypeError(f"艹，不认识的批量操作格式: {type(item).__name__}")
+
+
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    """
+    按 size 切分列表
+
+    Args:
+        items: 要切分的列表
+        size: 每块大小
+
+    Yields:
+        每一块
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def describe_batch(operations: List[BatchOperation]) -> str:
+    """生成批量请求的日志名称，例如 Batch[3](GetUser, GetArtwork)"""
+    names = sorted({op.operation_name or "Anonymous" for op in operations})
+    return f"Batch[{len(operations)}]({', '.join(names[:5])}{', ...' if len(names) > 5 else ''})"
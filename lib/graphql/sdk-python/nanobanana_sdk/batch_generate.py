@@ -0,0 +1,440 @@
+"""
+艹！Nano Banana GraphQL SDK 批量生图模块
+
+app/api/batch-generate 一个任务接收一批 scene_prompts，后台逐个生成，GET ?id= 看进度（generated_images 逐条变长）。
+可 Python 这边没有客户端，5 万条提示词的脚本跑到一半崩了只能全部重交，积分哗哗地烧。这个SB模块提供：
+- 把任意长的提示词列表切成服务端能吃下的块（chunk_size），有界并发地提交
+- 每块提交后轮询进度，generated_images 每多一条就吐一条结果，不用等整块结束
+- 进度写进本地检查点文件（JSON Lines，只追加）：提交过的块记 task_id，完成的条目记结果
+- 崩了重跑：已完成的条目不再提交，已经提交但没跑完的块直接接着轮询，只有没提交过的才新建任务
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import urlencode
+
+from .errors import GraphQLSDKError, server_error
+
+if TYPE_CHECKING:
+    from .client import GraphQLSDK
+    from .transport import AsyncHTTPTransport
+
+# 一条提示词：字符串，或者 {"prompt": ..., "scene_id": ...}
+PromptInput = Union[str, Dict[str, Any]]
+
+# 批量任务到了这些状态就不会再有新结果
+TERMINAL_TASK_STATUSES = ("completed", "failed", "cancelled")
+
+
+@dataclass
+class BatchGenerateConfig:
+    """
+    批量生图配置
+
+    老王的参数说明：
+    - chunk_size: 每个批量任务放多少条提示词（默认 50）
+    - concurrency: 同时在跑的批量任务数（默认 4）
+    - poll_interval: 查进度的间隔（秒，默认 2.0，有新结果就保持这个间隔）
+    - max_poll_interval: 一直没有新结果时间隔退避的上限（秒，默认 30.0）
+    - max_poll_errors: 查进度连续出错（网络 / 限流 / 5xx）多少次后放弃这一块（默认 5）
+    - retry_failed: 从检查点恢复时，上次失败的条目是否重新提交（默认 True）
+    """
+    chunk_size: int = 50
+    concurrency: int = 4
+    poll_interval: float = 2.0
+    max_poll_interval: float = 30.0
+    max_poll_errors: int = 5
+    retry_failed: bool = True
+
+    def __post_init__(self):
+        """老王的参数验证"""
+        if self.chunk_size < 1:
+            raise ValueError("艹，chunk_size 必须 >= 1！")
+        if self.concurrency < 1:
+            raise ValueError("艹，concurrency 必须 >= 1！")
+        if self.poll_interval <= 0 or self.max_poll_interval < self.poll_interval:
+            raise ValueError("艹，必须满足 0 < poll_interval <= max_poll_interval！")
+        if self.max_poll_errors < 1:
+            raise ValueError("艹，max_poll_errors 必须 >= 1！")
+
+
+@dataclass
+class BatchItemResult:
+    """
+    一条提示词的生成结果
+
+    - index: 在输入列表里的位置
+    - prompt / scene_id: 提示词和场景 ID
+    - status: success / failed（服务端还没真正出图时可能是 pending）
+    - image_url: 生成的图片地址
+    - error: 失败原因
+    - task_id: 所属的批量任务 ID
+    - restored: 是不是从检查点里恢复的（上次就完成了，这次没有提交）
+    """
+    index: int
+    prompt: str
+    scene_id: Optional[str] = None
+    status: str = "pending"
+    image_url: Optional[str] = None
+    error: Optional[str] = None
+    task_id: Optional[str] = None
+    restored: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """是否生成成功"""
+        return self.status == "success"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式（检查点里存的就是这个）"""
+        return {
+            "index": self.index,
+            "prompt": self.prompt,
+            "scene_id": self.scene_id,
+            "status": self.status,
+            "image_url": self.image_url,
+            "error": self.error,
+            "task_id": self.task_id,
+        }
+
+
+@dataclass
+class BatchGenerateStats:
+    """
+    批量生图统计
+
+    - total: 输入的提示词条数
+    - restored: 从检查点恢复、这次没提交的条数
+    - chunks_submitted: 新提交的批量任务数
+    - chunks_resumed: 从检查点接着轮询的批量任务数
+    - succeeded / failed: 这次拿到的成功 / 失败条数
+    - polls: 查进度的次数
+    """
+    total: int = 0
+    restored: int = 0
+    chunks_submitted: int = 0
+    chunks_resumed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    polls: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典格式"""
+        return {
+            "total": self.total,
+            "restored": self.restored,
+            "chunks_submitted": self.chunks_submitted,
+            "chunks_resumed": self.chunks_resumed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "polls": self.polls,
+        }
+
+
+@dataclass
+class _Chunk:
+    """一块：输入位置列表 + 服务端任务 ID（还没提交时是 None）"""
+    indexes: List[int]
+    task_id: Optional[str] = None
+    reported: Set[int] = field(default_factory=set)
+
+
+class BatchCheckpoint:
+    """
+    艹！批量生图的检查点文件（JSON Lines，只追加，每行写完就 flush）
+
+    第一行是输入的指纹（subject_id + 提示词的 sha256），换了输入不会错用别人的进度；
+    之后每行要么是 {"type": "chunk", "task_id", "indexes"}，要么是 {"type": "item", ...结果}。
+    进程在写一行的中途崩了也没事，读的时候坏行直接跳过。
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化检查点
+
+        Args:
+            path: 检查点文件路径（不存在会新建）
+        """
+        self.path = path
+        self._file = None
+
+    def load(self, fingerprint: str) -> Tuple[Dict[int, Dict[str, Any]], List[_Chunk]]:
+        """
+        读出之前的进度
+
+        Args:
+            fingerprint: 这次输入的指纹
+
+        Returns:
+            (每个位置的最新结果, 提交过的块)
+        """
+        items: Dict[int, Dict[str, Any]] = {}
+        chunks: List[_Chunk] = []
+        if not os.path.exists(self.path):
+            return items, chunks
+
+        with open(self.path, encoding="utf-8") as f:
+            for number, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 写到一半崩了的行
+                if number == 0:
+                    if record.get("fingerprint") != fingerprint:
+                        raise ValueError(f"艹，检查点 {self.path} 是另一批输入的进度，换个文件或者删掉它！")
+                elif record.get("type") == "chunk":
+                    chunks.append(_Chunk(list(record["indexes"]), record["task_id"]))
+                elif record.get("type") == "item":
+                    items[record["index"]] = record
+        return items, chunks
+
+    def open(self, fingerprint: str):
+        """打开文件准备追加（新文件先写指纹）"""
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, "a", encoding="utf-8")
+        if new:
+            self._write({"type": "header", "fingerprint": fingerprint})
+
+    def record_chunk(self, chunk: _Chunk):
+        """记下提交过的块"""
+        self._write({"type": "chunk", "task_id": chunk.task_id, "indexes": chunk.indexes})
+
+    def record_item(self, result: BatchItemResult):
+        """记下一条结果"""
+        self._write({"type": "item", **result.to_dict()})
+
+    def _write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        """关闭文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _normalize(prompts: Sequence[PromptInput]) -> List[Dict[str, Any]]:
+    scenes = []
+    for prompt in prompts:
+        if isinstance(prompt, str):
+            prompt = {"prompt": prompt}
+        if not isinstance(prompt, dict) or not prompt.get("prompt"):
+            raise ValueError("艹，每条提示词必须是非空字符串或者带 prompt 的字典！")
+        scenes.append({"prompt": prompt["prompt"], **({"scene_id": prompt["scene_id"]} if prompt.get("scene_id") else {})})
+    return scenes
+
+
+class BatchGenerator:
+    """
+    艹！sdk.batch_generate() 的返回值，async for 逐条拿到 BatchItemResult（按完成顺序）
+
+    使用示例:
+        run = sdk.batch_generate(subject_id, prompts, checkpoint="run.ckpt")
+        async for item in run:
+            print(item.index, item.status, item.image_url)
+        print(run.stats().to_dict())
+
+    有检查点时，上次完成的条目先吐出来（restored=True），不会再提交。
+    单块提交 / 查询失败不会中断整批，这一块的条目以 failed 结果返回（error 里是原因），
+    下次从检查点恢复时会重新提交（retry_failed=True 时）。中途 break 会停止轮询，已经提交的任务服务端照样跑。
+    """
+
+    def __init__(
+        self,
+        sdk: "GraphQLSDK",
+        subject_id: str,
+        prompts: Sequence[PromptInput],
+        checkpoint: Optional[str] = None,
+        config: Optional[BatchGenerateConfig] = None,
+    ):
+        """
+        初始化批量生图
+
+        Args:
+            sdk: GraphQLSDK 实例
+            subject_id: 主体素材 ID
+            prompts: 场景提示词列表
+            checkpoint: 检查点文件路径（可选，不传就不能断点恢复）
+            config: 批量生图配置（可选）
+        """
+        self.sdk = sdk
+        self.subject_id = subject_id
+        self.scenes = _normalize(prompts)
+        self.config = config or BatchGenerateConfig()
+        self.checkpoint = BatchCheckpoint(checkpoint) if checkpoint else None
+        self.fingerprint = hashlib.sha256(
+            json.dumps([subject_id, self.scenes], sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+        self._stats = BatchGenerateStats(total=len(self.scenes))
+
+    def stats(self) -> BatchGenerateStats:
+        """获取统计快照"""
+        return BatchGenerateStats(**self._stats.to_dict())
+
+    def __aiter__(self) -> AsyncIterator[BatchItemResult]:
+        return self._run()
+
+    def _plan(self) -> Tuple[List[BatchItemResult], List[_Chunk]]:
+        """从检查点算出：哪些已经完成、哪些块要接着轮询、剩下的怎么切块"""
+        items, chunks = self.checkpoint.load(self.fingerprint) if self.checkpoint else ({}, [])
+
+        restored = []
+        for index, record in sorted(items.items()):
+            if record.get("status") == "success" or not self.config.retry_failed:
+                restored.append(BatchItemResult(**{k: v for k, v in record.items() if k != "type"}, restored=True))
+        finished = {result.index for result in restored}
+
+        plan = []
+        covered: Set[int] = set(finished)
+        for chunk in chunks:
+            if any(index not in items for index in chunk.indexes):
+                # 提交过但结果没收全：接着轮询这个任务，只补没收到的
+                chunk.reported = {index for index in chunk.indexes if index in items}
+                plan.append(chunk)
+                covered.update(index for index in chunk.indexes if index not in items)
+
+        remaining = [index for index in range(len(self.scenes)) if index not in covered]
+        size = self.config.chunk_size
+        plan.extend(_Chunk(remaining[i:i + size]) for i in range(0, len(remaining), size))
+        return restored, plan
+
+    async def _run(self) -> AsyncIterator[BatchItemResult]:
+        restored, plan = self._plan()
+        self._stats.restored = len(restored)
+        for result in restored:
+            yield result
+
+        if self.checkpoint is not None:
+            self.checkpoint.open(self.fingerprint)
+
+        try:
+            transport = self.sdk._connected_async_transport()
+            if transport is not None:
+                async for result in self._fan_in(plan, transport):
+                    yield result
+            else:
+                async with self.sdk._new_async_transport() as transport:
+                    async for result in self._fan_in(plan, transport):
+                        yield result
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+
+    async def _fan_in(self, plan: List[_Chunk], transport: "AsyncHTTPTransport") -> AsyncIterator[BatchItemResult]:
+        """每块一个协程（信号量限并发），结果汇到一个队列里按完成顺序吐出"""
+        queue: "asyncio.Queue[Optional[BatchItemResult]]" = asyncio.Queue()
+        slots = asyncio.Semaphore(self.config.concurrency)
+        tasks = [asyncio.ensure_future(self._chunk(chunk, transport, slots, queue)) for chunk in plan]
+        try:
+            pending = len(tasks)
+            while pending:
+                result = await queue.get()
+                if result is None:
+                    pending -= 1
+                    continue
+                yield result
+        finally:
+            # 中途 break / 出错：停止轮询（服务端任务照样跑，下次从检查点接着轮询）
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _chunk(self, chunk: _Chunk, transport: "AsyncHTTPTransport", slots: asyncio.Semaphore, queue: asyncio.Queue):
+        """一块：提交（检查点里有 task_id 就跳过）→ 轮询 → 每出一条结果就放进队列"""
+        try:
+            async with slots:
+                try:
+                    await self._process(chunk, transport, queue)
+                except GraphQLSDKError as e:
+                    # 这一块没法继续了：剩下的条目以失败结果返回（不写检查点，下次恢复时重新处理）
+                    for index in chunk.indexes:
+                        if index not in chunk.reported:
+                            chunk.reported.add(index)
+                            self._stats.failed += 1
+                            queue.put_nowait(self._result(index, chunk.task_id, status="failed", error=str(e)))
+        finally:
+            queue.put_nowait(None)
+
+    async def _process(self, chunk: _Chunk, transport: "AsyncHTTPTransport", queue: asyncio.Queue):
+        config = self.config
+        if chunk.task_id is None:
+            body = await self.sdk._rest_async("POST", "/api/batch-generate", {
+                "subject_id": self.subject_id,
+                "scene_prompts": [self.scenes[index] for index in chunk.indexes],
+                "auto_execute": True,
+            }, "BatchGenerate", transport)
+            task_id = ((body or {}).get("data") or {}).get("id")
+            if not task_id:
+                raise server_error(f"艹！创建批量任务的响应里没有任务 ID: {str(body)[:200]}")
+            chunk.task_id = task_id
+            self._stats.chunks_submitted += 1
+            if self.checkpoint is not None:
+                self.checkpoint.record_chunk(chunk)
+        else:
+            self._stats.chunks_resumed += 1
+
+        delay = config.poll_interval
+        errors = 0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                self._stats.polls += 1
+                body = await self.sdk._rest_async(
+                    "GET", "/api/batch-generate?" + urlencode({"id": chunk.task_id}), None, "BatchGenerateStatus", transport
+                )
+            except GraphQLSDKError as e:
+                errors += 1
+                if not e.is_retryable() or errors >= config.max_poll_errors:
+                    raise
+                wait = e.rate_limit.wait
+                delay = wait if wait is not None else min(delay * 2, config.max_poll_interval)
+                continue
+            errors = 0
+
+            task = (body or {}).get("data") or {}
+            images = task.get("generated_images") or []
+            finished = task.get("status") in TERMINAL_TASK_STATUSES
+            progressed = False
+            for position, index in enumerate(chunk.indexes[:len(images)]):
+                image = images[position] or {}
+                if index in chunk.reported or (image.get("status") == "pending" and not finished):
+                    continue
+                result = self._result(
+                    index, chunk.task_id, image.get("status") or "failed", image.get("image_url"), image.get("error")
+                )
+                self._report(chunk, result, queue)
+                progressed = True
+
+            if finished:
+                for index in chunk.indexes:
+                    if index not in chunk.reported:
+                        error = task.get("error_message") or f"批量任务已 {task.get('status')}，没有这一条的结果"
+                        self._report(chunk, self._result(index, chunk.task_id, "failed", error=error), queue)
+                return
+            delay = config.poll_interval if progressed else min(delay * 1.5, config.max_poll_interval)
+
+    def _result(self, index: int, task_id: Optional[str], status: str, image_url: Optional[str] = None,
+                error: Optional[str] = None) -> BatchItemResult:
+        scene = self.scenes[index]
+        return BatchItemResult(
+            index=index, prompt=scene["prompt"], scene_id=scene.get("scene_id"),
+            status=status, image_url=image_url, error=error, task_id=task_id,
+        )
+
+    def _report(self, chunk: _Chunk, result: BatchItemResult, queue: asyncio.Queue):
+        """交出一条结果，先写检查点再放进队列"""
+        chunk.reported.add(result.index)
+        if result.ok:
+            self._stats.succeeded += 1
+        else:
+            self._stats.failed += 1
+        if self.checkpoint is not None:
+            self.checkpoint.record_item(result)
+        queue.put_nowait(result)
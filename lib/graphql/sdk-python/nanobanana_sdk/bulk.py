@@ -0,0 +1,265 @@
+"""
+艹！Nano Banana GraphQL SDK 批量执行模块
+
+以前大家都是 asyncio.gather(*[sdk.query_async(Q, v) for v in 十万个变量])：
+一次性建十万个 task、十万个协程，内存直接起飞，服务端也被打成筛子。
+同步脚本也一样，for 循环一条一条 sdk.query()，大部分时间都在等网络。
+这个SB模块提供有界并发的批量执行：
+- execute_bounded(): asyncio 版本，最多 concurrency 个请求同时在飞
+- map_bounded(): 线程池版本，给同步调用方用（同步传输的连接池是线程安全的）
+- 输入都是惰性拉取的（无限迭代器也没问题），有空位才拉下一项
+- 单条失败作为结果返回（BulkResult.error），不会中断整批
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .batch import BatchResult
+from .errors import GraphQLSDKError, network_error
+
+# 批量执行的输入：每一项是一组变量，可以是普通迭代器或异步迭代器
+VariablesSource = Union[Iterable[Optional[Dict[str, Any]]], AsyncIterable[Optional[Dict[str, Any]]]]
+
+
+@dataclass
+class BulkResult(BatchResult):
+    """
+    批量执行里单条输入的结果（data / error / ok / unwrap() 同 BatchResult）
+
+    - index: 这条输入在输入序列里的位置（从 0 开始）
+    - variables: 这条输入的变量
+    """
+    index: int = 0
+    variables: Optional[Dict[str, Any]] = None
+
+
+class _Source:
+    """把普通迭代器和异步迭代器统一成一个 async next()"""
+
+    def __init__(self, source: VariablesSource):
+        if hasattr(source, "__aiter__"):
+            self._aiter = source.__aiter__()
+            self._iter = None
+        else:
+            self._aiter = None
+            self._iter = iter(source)
+
+    async def next(self) -> Tuple[bool, Any]:
+        """返回 (是否还有, 下一项)"""
+        if self._aiter is not None:
+            try:
+                return True, await self._aiter.__anext__()
+            except StopAsyncIteration:
+                return False, None
+        try:
+            return True, next(self._iter)
+        except StopIteration:
+            return False, None
+
+
+async def _run_one(
+    fn: Callable[[Optional[Dict[str, Any]]], Awaitable[Any]],
+    index: int,
+    variables: Optional[Dict[str, Any]],
+) -> BulkResult:
+    try:
+        return BulkResult(data=await fn(variables), index=index, variables=variables)
+    except GraphQLSDKError as e:
+        return BulkResult(error=e, index=index, variables=variables)
+
+
+async def execute_bounded(
+    fn: Callable[[Optional[Dict[str, Any]]], Awaitable[Any]],
+    source: VariablesSource,
+    concurrency: int = 10,
+    ordered: bool = False,
+) -> AsyncIterator[BulkResult]:
+    """
+    艹！有界并发地对每组变量执行 fn，边跑边吐结果
+
+    输入只在有空位的时候才拉下一项，所以内存里最多只有 concurrency 个请求的状态。
+    ordered=True 时按输入顺序吐：排在前面的慢请求会占着窗口，
+    已完成但还没轮到的结果也算在 concurrency 里，保证缓冲区不会无限增长。
+
+    Args:
+        fn: 执行单条输入的协程函数（通常是 lambda v: sdk.query_async(Q, v)）
+        source: 变量的（异步）迭代器
+        concurrency: 最多同时在飞的请求数
+        ordered: 是否按输入顺序吐结果（默认按完成顺序）
+
+    Yields:
+        每条输入的 BulkResult（GraphQLSDKError 放在 error 里，不会中断整批）
+    """
+    if concurrency < 1:
+        raise ValueError("艹，concurrency 必须 >= 1！")
+
+    inputs = _Source(source)
+    pending: Dict[asyncio.Task, int] = {}
+    finished: Dict[int, BulkResult] = {}
+    next_index = 0
+    next_yield = 0
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) + len(finished) < concurrency:
+                has_more, variables = await inputs.next()
+                if not has_more:
+                    exhausted = True
+                    break
+                pending[asyncio.ensure_future(_run_one(fn, next_index, variables))] = next_index
+                next_index += 1
+
+            if not pending:
+                return
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=pending.__getitem__):
+                del pending[task]
+                result = task.result()
+                if ordered:
+                    finished[result.index] = result
+                else:
+                    yield result
+
+            while next_yield in finished:
+                yield finished.pop(next_yield)
+                next_yield += 1
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class _Item:
+    """线程池里的一条输入：worker 开始跑的时候记下时间，跑完把结果放进 future"""
+
+    __slots__ = ("index", "variables", "future", "started", "started_at")
+
+    def __init__(self, index: int, variables: Optional[Dict[str, Any]]):
+        self.index = index
+        self.variables = variables
+        self.future: Future = Future()
+        self.started = threading.Event()
+        self.started_at = 0.0
+
+
+def _run_chunk(fn: Callable[[Optional[Dict[str, Any]]], Any], chunk: List[_Item]):
+    """worker 里按顺序跑一个块"""
+    for item in chunk:
+        if not item.future.set_running_or_notify_cancel():
+            continue  # 调用方已经不要了
+        item.started_at = time.monotonic()
+        item.started.set()
+        try:
+            result = BulkResult(data=fn(item.variables), index=item.index, variables=item.variables)
+        except GraphQLSDKError as e:
+            result = BulkResult(error=e, index=item.index, variables=item.variables)
+        except BaseException as e:
+            item.future.set_exception(e)
+            continue
+        item.future.set_result(result)
+
+
+def _timed_out(item: _Item, message: str) -> BulkResult:
+    error = network_error(message, TimeoutError())
+    return BulkResult(error=error, index=item.index, variables=item.variables)
+
+
+def _wait_item(item: _Item, timeout: Optional[float]) -> BulkResult:
+    """
+    等一条输入的结果；从 worker 开始跑它算起超过 timeout 秒就放弃，返回超时错误
+
+    同一个块前面那条卡死（或者所有 worker 都卡死）的话，这条永远轮不到：
+    等它开始也最多等 timeout 秒，等不到就取消（worker 以后轮到它也会跳过），同样返回超时错误。
+    """
+    if timeout is None:
+        return item.future.result()
+    if not item.started.wait(timeout) and item.future.cancel():
+        return _timed_out(item, f"艹！第 {item.index} 条等了 {timeout}s 还没轮到执行（前面的请求卡住了），已放弃")
+    # 取消失败说明 worker 刚好开始跑它，started 马上就会置位
+    item.started.wait()
+    remaining = item.started_at + timeout - time.monotonic()
+    try:
+        return item.future.result(timeout=max(remaining, 0))
+    except FutureTimeoutError:
+        return _timed_out(item, f"艹！第 {item.index} 条超过 {timeout}s 还没返回，已放弃")
+
+
+def map_bounded(
+    fn: Callable[[Optional[Dict[str, Any]]], Any],
+    source: Iterable[Optional[Dict[str, Any]]],
+    workers: int = 8,
+    chunksize: int = 1,
+    timeout: Optional[float] = None,
+) -> Iterator[BulkResult]:
+    """
+    艹！用线程池对每组变量执行 fn，按输入顺序惰性吐出结果
+
+    和 ThreadPoolExecutor.map 的区别：输入不会一次性读完。最多有 workers 个块在排队/执行，
+    调用方取走最前面的块之后才会再从输入里拉下一个块，处理得慢输入就读得慢（背压）。
+
+    Args:
+        fn: 执行单条输入的函数（通常是 lambda v: sdk.query(Q, v)）
+        source: 变量的迭代器（可以是无限的）
+        workers: 线程数
+        chunksize: 每个任务处理几条输入（输入很多、单条很快时调大，减少调度开销）
+        timeout: 单条输入的超时（秒，从 worker 开始跑它算起；被前面卡住的请求挡着、
+                 等了 timeout 秒还没开始的也算超时）；
+                 超时的那条返回 NETWORK_ERROR，worker 线程要等底层 HTTP 超时才会释放
+
+    Yields:
+        每条输入的 BulkResult（GraphQLSDKError 放在 error 里，不会中断整批）
+    """
+    if workers < 1:
+        raise ValueError("艹，workers 必须 >= 1！")
+    if chunksize < 1:
+        raise ValueError("艹，chunksize 必须 >= 1！")
+    if timeout is not None and timeout <= 0:
+        raise ValueError("艹，timeout 必须 > 0！")
+
+    inputs = iter(source)
+    counter = itertools.count()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nanobanana-map")
+    pending: Deque[List[_Item]] = deque()
+
+    def submit() -> bool:
+        chunk = [_Item(next(counter), variables) for variables in itertools.islice(inputs, chunksize)]
+        if not chunk:
+            return False
+        executor.submit(_run_chunk, fn, chunk)
+        pending.append(chunk)
+        return True
+
+    try:
+        while len(pending) < workers and submit():
+            pass
+        while pending:
+            for item in pending.popleft():
+                yield _wait_item(item, timeout)
+            submit()
+    finally:
+        for chunk in pending:
+            for item in chunk:
+                item.future.cancel()
+        executor.shutdown(wait=False)
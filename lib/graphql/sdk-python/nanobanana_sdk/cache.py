@@ -0,0 +1,195 @@
+"""
+艹！Nano Banana GraphQL SDK 文档缓存模块
+
+这个SB模块缓存解析后的 GraphQL 文档（DocumentNode），
+同一段查询文本只 parse 一次，别tm每次请求都重新解析！
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from gql import gql
+    HAS_GQL = True
+except ImportError:
+    HAS_GQL = False
+
+
+@dataclass
+class DocumentCacheStats:
+    """
+    文档缓存统计
+
+    老王的字段说明：
+    - hits: 命中次数
+    - misses: 未命中次数（每次未命中都会 parse 一次）
+    - evictions: 因容量不足被淘汰的文档数
+    - size: 当前缓存的文档数
+    - max_size: 最大容量
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+    max_size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """命中率（0.0 - 1.0）"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式（方便打日志）"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self.size,
+            "max_size": self.max_size,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+@dataclass(frozen=True)
+class PreparedQuery:
+    """
+    艹！预编译的 GraphQL 查询
+
+    由 GraphQLSDK.prepare() 返回，可以反复传给 query()/mutate() 等方法，
+    完全跳过缓存查找和解析。
+
+    - query: 原始查询文本
+    - document: 解析后的文档
+    - operation_name: 文档里第一个具名操作的名称（可能为 None）
+    """
+    query: str
+    document: Any
+    operation_name: Optional[str] = None
+
+
+class DocumentCache:
+    """
+    艹！线程安全的 LRU 文档缓存
+
+    以查询文本为 key 缓存 gql() 的解析结果：
+    - 命中时直接返回已解析的文档，并移动到 LRU 队尾
+    - 未命中时解析并写入，超出容量就淘汰最久未使用的文档
+    - max_size <= 0 表示禁用缓存（每次都解析，但仍然统计 miss）
+    """
+
+    def __init__(
+        self,
+        max_size: int = 512,
+        parser: Optional[Callable[[str], Any]] = None,
+    ):
+        """
+        初始化文档缓存
+
+        Args:
+            max_size: 最大缓存文档数（<= 0 表示禁用缓存）
+            parser: 解析函数（默认使用 gql.gql）
+        """
+        if parser is None:
+            if not HAS_GQL:
+                raise ImportError(
+                    "艹！gql 库没有安装！运行: pip install gql[requests,aiohttp]"
+                )
+            parser = gql
+
+        self.max_size = max_size
+        self._parser = parser
+        self._documents: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, query: str) -> Any:
+        """
+        艹！获取解析后的文档（未命中时自动解析）
+
+        Args:
+            query: GraphQL 查询文本
+
+        Returns:
+            解析后的文档
+
+        Raises:
+            GraphQLError: 如果查询文本有语法错误（错误的文本不会被缓存）
+        """
+        with self._lock:
+            document = self._documents.get(query)
+            if document is not None:
+                self._documents.move_to_end(query)
+                self._hits += 1
+                return document
+            self._misses += 1
+
+        # 解析放在锁外面，别让一个慢解析卡住所有线程
+        document = self._parser(query)
+
+        if self.max_size > 0:
+            with self._lock:
+                self._documents[query] = document
+                self._documents.move_to_end(query)
+                while len(self._documents) > self.max_size:
+                    self._documents.popitem(last=False)
+                    self._evictions += 1
+
+        return document
+
+    def __contains__(self, query: str) -> bool:
+        with self._lock:
+            return query in self._documents
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+
+    def clear(self):
+        """清空缓存（统计计数不清零）"""
+        with self._lock:
+            self._documents.clear()
+
+    def stats(self) -> DocumentCacheStats:
+        """
+        获取缓存统计快照
+
+        Returns:
+            DocumentCacheStats 实例
+        """
+        with self._lock:
+            return DocumentCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._documents),
+                max_size=self.max_size,
+            )
+
+    def reset_stats(self):
+        """重置统计计数"""
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
+def get_operation_name(document: Any) -> Optional[str]:
+    """
+    艹！从文档里提取第一个具名操作的名称
+
+    Args:
+        document: 解析后的 DocumentNode
+
+    Returns:
+        操作名称（匿名操作返回 None）
+    """
+    for definition in getattr(document, "definitions", ()):
+        name = getattr(definition, "name", None)
+        if getattr(definition, "operation", None) is not None and name is not None:
+            return name.value
+    return None
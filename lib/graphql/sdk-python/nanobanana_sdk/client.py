@@ -12,24 +12,68 @@
 - 支持同步和异步调用
 """
 
+import os
 import time
-from typing import Any, Dict, Optional, TypeVar, Generic
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, TypeVar, Generic, Union
 from dataclasses import dataclass, field
+from urllib.parse import urlsplit
 
 try:
-    from gql import gql, Client
-    from gql.transport.requests import RequestsHTTPTransport
-    from gql.transport.aiohttp import AIOHTTPTransport
+    import gql  # noqa: F401  解析文档需要
+    from gql.transport.exceptions import TransportQueryError
     HAS_GQL = True
 except ImportError:
     HAS_GQL = False
 
+from .apq import (
+    PersistedQueryRegistry,
+    PersistedQueryStats,
+    is_persisted_query_not_found,
+    is_persisted_query_not_supported,
+)
+from .batch import (
+    BatchInput,
+    BatchResult,
+    chunked,
+    describe_batch,
+    normalize_operation,
+)
+from .codec import CODECS, JSONCodec, get_codec
+from .complexity import ComplexityConfig, ComplexityEstimator, ComplexityStats, calculate_complexity, merge_results
+from .compression import CompressionConfig, CompressionStats, RequestCompressor
+from .batch_generate import BatchGenerateConfig, BatchGenerator, PromptInput
+from .bulk import BulkResult, VariablesSource, execute_bounded, map_bounded
+from .cache import DocumentCache, DocumentCacheStats, PreparedQuery, get_operation_name
+from .dataloader import BUILTIN_LOADERS, DataLoader, LoaderSpec
+from .downloads import DownloadConfig, DownloadResult, VideoDownloader, download_order
 from .errors import GraphQLSDKError, parse_error
+from .http_cache import HTTPCacheStats, HTTPResponseStore, build_get_url
+from .rate_limit import RateLimitConfig, RateLimiter, RateLimiterStats
 from .retry import RetryHandler, RetryConfig
 from .logger import SDKLogger
+from .pagination import MAX_PAGE_SIZE, ConnectionIterator, OffsetPageIterator
+from .normalized_cache import NormalizedCache, NormalizedCacheConfig, NormalizedCacheStats
+from .streaming import QueryStream
+from .subscription_hub import SubscriptionHub, SubscriptionHubStats
+from .subscriptions import Subscription, SubscriptionConfig
+from .singleflight import AsyncSingleFlight, SingleFlight, SingleFlightStats, flight_key
+from .transport import (
+    AsyncHTTPTransport,
+    SyncHTTPTransport,
+    build_payload,
+    parse_rest_result,
+    parse_result,
+    with_response_headers,
+)
+from .video_jobs import VideoJobConfig, VideoJobTracker
+from .webhooks import WebhookReceiver
 
 T = TypeVar("T")
 
+# 查询参数：原始文本或 prepare() 返回的预编译句柄
+QueryInput = Union[str, PreparedQuery]
+
 
 @dataclass
 class GraphQLSDKConfig:
@@ -44,6 +88,30 @@ class GraphQLSDKConfig:
     - retry_config: 重试配置（可选）
     - enable_logging: 是否启用日志（默认 True）
     - log_level: 日志级别（默认 INFO）
+    - document_cache_size: 解析文档 LRU 缓存容量（默认 512，0 表示禁用）
+    - max_connections: 连接池总连接数上限（默认 100，0 表示不限制）
+    - max_connections_per_host: 单个主机的连接数上限（默认 0，不限制）
+    - keepalive_timeout: 空闲连接保活时间（秒，默认 30，仅异步传输）
+    - keep_alive: 是否复用连接（默认 True）
+    - pool_size: 同步传输缓存的主机连接池个数（默认 10）
+    - max_batch_size: batch() 单个 HTTP 请求最多携带的操作数（默认 20）
+    - persisted_queries: 是否启用自动持久化查询 APQ（默认 False）
+    - persisted_query_manifest: 预先构建的 APQ 清单（文件路径或字典，可选）
+    - normalized_cache: 规范化响应缓存配置（可选，不配置就不缓存）
+    - single_flight: 相同的查询正在飞时是否合并成一次请求（默认 True，变更永远不合并）
+    - use_get_for_queries: 查询是否走 GET（默认 False），CDN/代理可以缓存，本地用 ETag 条件请求重新验证
+    - http_cache_size: GET 响应本地存储的容量（默认 256）
+    - max_get_url_length: GET URL 的最大长度（默认 8192，超过就改用 POST）
+    - compression: 请求体压缩 + 响应编码协商配置（可选，不配置就不压缩）
+    - json_codec: JSON 编解码器（默认 "auto"：orjson > ujson > 标准库 json，也可以传 JSONCodec 实例）
+    - subscription_config: SSE 订阅配置（可选，重连 / 心跳检测）
+    - api_key: REST 接口（/api/v1/video/... 这些）用的 API Key，放在 x-api-key 请求头里（可选）
+    - api_base_url: REST 接口的根地址（可选，默认取 endpoint 的协议 + 主机）
+    - video_jobs: 视频任务跟踪配置（可选，轮询间隔 / 并发上限 / 超时）
+    - downloads: 视频下载配置（可选，分块大小 / 并行阈值 / 续传次数）
+    - batch_generate: 批量生图配置（可选，分块大小 / 并发任务数 / 轮询间隔）
+    - rate_limit: 客户端限流配置（可选，按订阅层级或每分钟请求数匀速放行，不配置就不限流）
+    - complexity: 查询复杂度配置（可选，发送前按服务端规则打分，超限的查询自动拆开）
     """
     endpoint: str
     token: Optional[str] = None
@@ -52,6 +120,30 @@ class GraphQLSDKConfig:
     retry_config: Optional[RetryConfig] = None
     enable_logging: bool = True
     log_level: str = "INFO"
+    document_cache_size: int = 512
+    max_connections: int = 100
+    max_connections_per_host: int = 0
+    keepalive_timeout: float = 30.0
+    keep_alive: bool = True
+    pool_size: int = 10
+    max_batch_size: int = 20
+    persisted_queries: bool = False
+    persisted_query_manifest: Optional[Union[str, Dict[str, Any]]] = None
+    normalized_cache: Optional[NormalizedCacheConfig] = None
+    single_flight: bool = True
+    use_get_for_queries: bool = False
+    http_cache_size: int = 256
+    max_get_url_length: int = 8192
+    compression: Optional[CompressionConfig] = None
+    json_codec: Union[str, JSONCodec] = "auto"
+    subscription_config: Optional[SubscriptionConfig] = None
+    api_key: Optional[str] = None
+    api_base_url: Optional[str] = None
+    video_jobs: Optional[VideoJobConfig] = None
+    downloads: Optional[DownloadConfig] = None
+    batch_generate: Optional[BatchGenerateConfig] = None
+    rate_limit: Optional[RateLimitConfig] = None
+    complexity: Optional[ComplexityConfig] = None
 
     def __post_init__(self):
         """老王的参数验证"""
@@ -61,6 +153,27 @@ class GraphQLSDKConfig:
             raise ValueError("艹，endpoint 必须是有效的 HTTP/HTTPS URL！")
         if self.timeout <= 0:
             raise ValueError("艹，timeout 必须 > 0！")
+        if self.document_cache_size < 0:
+            raise ValueError("艹，document_cache_size 必须 >= 0！")
+        if self.max_connections < 0 or self.max_connections_per_host < 0:
+            raise ValueError("艹，连接数上限必须 >= 0！")
+        if self.keepalive_timeout <= 0:
+            raise ValueError("艹，keepalive_timeout 必须 > 0！")
+        if self.pool_size < 1:
+            raise ValueError("艹，pool_size 必须 >= 1！")
+        if self.max_batch_size < 1:
+            raise ValueError("艹，max_batch_size 必须 >= 1！")
+        if isinstance(self.json_codec, str):
+            if self.json_codec not in ("auto", *CODECS):
+                raise ValueError(f"艹，json_codec 必须是 auto / {' / '.join(CODECS)} 或 JSONCodec 实例！")
+        elif not isinstance(self.json_codec, JSONCodec):
+            raise ValueError("艹，json_codec 必须是编解码器名字或 JSONCodec 实例（传的是类就先实例化）！")
+        if self.http_cache_size < 1:
+            raise ValueError("艹，http_cache_size 必须 >= 1！")
+        if self.max_get_url_length < 1:
+            raise ValueError("艹，max_get_url_length 必须 >= 1！")
+        if self.api_base_url is not None and not self.api_base_url.startswith(("http://", "https://")):
+            raise ValueError("艹，api_base_url 必须是有效的 HTTP/HTTPS URL！")
 
 
 class GraphQLSDK:
@@ -115,6 +228,9 @@ class GraphQLSDK:
 
         self.config = config
 
+        # 初始化 JSON 编解码器（请求编码、响应解码、日志格式化共用）
+        self.codec = get_codec(config.json_codec)
+
         # 初始化日志记录器
         import logging
         log_level = getattr(logging, config.log_level.upper(), logging.INFO)
@@ -122,19 +238,73 @@ class GraphQLSDK:
             name="nanobanana_sdk",
             level=log_level,
             enable_logging=config.enable_logging,
+            codec=self.codec,
         )
 
         # 初始化重试处理器
         self.retry_handler = RetryHandler(config.retry_config)
 
+        # 初始化文档缓存（同一段查询文本只解析一次）
+        self.document_cache = DocumentCache(config.document_cache_size)
+
+        # 初始化 APQ 注册表（启用时只发送查询哈希）
+        self.persisted_queries: Optional[PersistedQueryRegistry] = None
+        if config.persisted_queries or config.persisted_query_manifest is not None:
+            self.persisted_queries = PersistedQueryRegistry(config.persisted_query_manifest)
+
+        # 初始化规范化响应缓存（按 __typename:id 存储实体）
+        self.normalized_cache: Optional[NormalizedCache] = None
+        if config.normalized_cache is not None:
+            self.normalized_cache = NormalizedCache(config.normalized_cache)
+
+        # 初始化 GET 响应存储（ETag / Last-Modified 条件请求）
+        self.http_cache: Optional[HTTPResponseStore] = None
+        if config.use_get_for_queries:
+            self.http_cache = HTTPResponseStore(config.http_cache_size)
+
+        # 初始化单飞去重（同步跨线程、异步跨任务）
+        self._single_flight = SingleFlight()
+        self._async_single_flight = AsyncSingleFlight()
+
+        # 初始化请求体压缩器（同步和异步传输共用，统计放在一起）
+        self.compressor: Optional[RequestCompressor] = None
+        if config.compression is not None:
+            self.compressor = RequestCompressor(config.compression)
+
+        # 初始化客户端限流器（同步和异步传输共用一个令牌桶，跨线程、跨任务）
+        self.rate_limiter: Optional[RateLimiter] = None
+        if config.rate_limit is not None:
+            self.rate_limiter = RateLimiter(config.rate_limit)
+
+        # 初始化查询复杂度检查（发送前打分，超限的查询拆开发）
+        self.complexity: Optional[ComplexityEstimator] = None
+        if config.complexity is not None:
+            self.complexity = ComplexityEstimator(config.complexity)
+
+        # 初始化订阅扇出中心（相同的订阅共用一条上游 SSE 连接）
+        self.subscription_hub = SubscriptionHub(self)
+
         # 构建请求头
         self._headers = self._build_headers()
 
-        # 初始化 GraphQL Client（同步）
-        self._sync_client: Optional[Client] = None
+        # 初始化同步传输（线程安全，所有线程共享一个连接池）
+        self._sync_transport = SyncHTTPTransport(
+            url=config.endpoint,
+            timeout=config.timeout,
+            pool_size=config.pool_size,
+            max_connections=config.max_connections,
+            max_connections_per_host=config.max_connections_per_host,
+            keep_alive=config.keep_alive,
+            compressor=self.compressor,
+            codec=self.codec,
+            limiter=self.rate_limiter,
+        )
 
-        # 初始化 GraphQL Client（异步）
-        self._async_client: Optional[Client] = None
+        # DataLoader 注册表（同名 loader 共享一个实例，才能跨调用点合并）
+        self._loaders: Dict[Any, DataLoader] = {}
+
+        # 初始化异步传输（长连接会话，connect() 之后一直复用）
+        self._async_transport: Optional[AsyncHTTPTransport] = None
 
         self.logger.info(f"SDK 初始化完成: endpoint={config.endpoint}")
 
@@ -157,47 +327,297 @@ class GraphQLSDK:
 
         return headers
 
-    def _get_sync_client(self) -> Client:
+    async def connect(self) -> "GraphQLSDK":
         """
-        艹！获取同步 GraphQL Client
+        艹！打开异步连接池
+
+        之后所有 query_async()/mutate_async() 共享同一个 aiohttp 会话，
+        用完记得 await sdk.aclose()（或者直接用 async with）。
+        不调用的话，每个异步请求都会临时建一个会话、用完就关（老行为）。
 
         Returns:
-            gql Client 实例
+            SDK 实例本身（方便链式调用）
         """
-        if not self._sync_client:
-            transport = RequestsHTTPTransport(
-                url=self.config.endpoint,
-                headers=self._headers,
-                timeout=self.config.timeout,
-                verify=True,
-                retries=0,  # 我们自己处理重试
-            )
-            self._sync_client = Client(
-                transport=transport,
-                fetch_schema_from_transport=False,
-            )
+        transport = self._async_transport
+        if transport is not None and transport.is_connected:
+            if transport.loop is asyncio.get_running_loop():
+                return self
+            # 会话属于另一个（多半已经结束的）事件循环，没法在这里关，直接丢掉
+            self.logger.warning("检测到事件循环切换，重建异步连接池")
+
+        transport = self._new_async_transport()
+        await transport.connect()
+        self._async_transport = transport
+
+        self.logger.info(
+            f"异步连接池已打开: max_connections={self.config.max_connections}, "
+            f"per_host={self.config.max_connections_per_host}"
+        )
+        return self
+
+    async def aclose(self):
+        """
+        艹！关闭异步连接池，释放所有连接
+        """
+        transport, self._async_transport = self._async_transport, None
+        if transport is not None:
+            await transport.close()
+            self.logger.info("异步连接池已关闭")
+
+    def _new_async_transport(self) -> AsyncHTTPTransport:
+        """按配置创建一个（未连接的）异步传输"""
+        return AsyncHTTPTransport(
+            url=self.config.endpoint,
+            timeout=self.config.timeout,
+            max_connections=self.config.max_connections,
+            max_connections_per_host=self.config.max_connections_per_host,
+            keepalive_timeout=self.config.keepalive_timeout,
+            keep_alive=self.config.keep_alive,
+            compressor=self.compressor,
+            codec=self.codec,
+            limiter=self.rate_limiter,
+        )
+
+    def _connected_async_transport(self) -> Optional[AsyncHTTPTransport]:
+        """
+        艹！获取当前事件循环可用的长连接传输
+
+        Returns:
+            已连接的 AsyncHTTPTransport；没 connect() 过（或者换了事件循环）返回 None
+        """
+        transport = self._async_transport
+        if (
+            transport is not None
+            and transport.is_connected
+            and transport.loop is asyncio.get_running_loop()
+        ):
+            return transport
+        return None
+
+    def _rest_url(self, path: str) -> str:
+        """REST 接口的完整 URL（没配 api_base_url 就用 endpoint 的协议 + 主机）"""
+        base = self.config.api_base_url
+        if base is None:
+            parts = urlsplit(self.config.endpoint)
+            base = f"{parts.scheme}://{parts.netloc}"
+        return base.rstrip("/") + path
+
+    async def _rest_async(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        operation_name: str = "REST",
+        transport: Optional[AsyncHTTPTransport] = None,
+    ) -> Any:
+        """
+        艹！调用一个 REST 接口（带 x-api-key），错误照样分类成 GraphQLSDKError
 
-        return self._sync_client
+        Args:
+            method: HTTP 方法
+            path: 路径（例如 /api/v1/video/generate）
+            body: 请求体（可选）
+            operation_name: 操作名称（用于日志）
+            transport: 已连接的异步传输（可选，默认 connect() 过就用连接池，否则临时建一个）
 
-    def _get_async_client(self) -> Client:
+        Returns:
+            响应体
         """
-        艹！获取异步 GraphQL Client
+        headers = dict(self._headers)
+        if self.config.api_key:
+            headers["x-api-key"] = self.config.api_key
+        self.logger.log_request(operation_name, None, headers)
+
+        start_time = time.time()
+        success = False
+        error: Optional[Exception] = None
+        try:
+            transport = transport or self._connected_async_transport()
+            if transport is not None:
+                status, decoded, reason, response_headers = await transport.request_json(
+                    method, self._rest_url(path), body, headers
+                )
+            else:
+                async with self._new_async_transport() as transport:
+                    status, decoded, reason, response_headers = await transport.request_json(
+                        method, self._rest_url(path), body, headers
+                    )
+            with with_response_headers(response_headers):
+                result = parse_rest_result(status, decoded, reason)
+            success = True
+            return result
+        except Exception as e:
+            error = e
+            raise parse_error(e, operation_name)
+        finally:
+            duration_ms = (time.time() - start_time) * 1000
+            self.logger.log_response(operation_name, duration_ms, success=success, error=error)
+
+    def _get_url(self, payload: Dict[str, Any], use_get: bool) -> Optional[str]:
+        """
+        艹！需要走 GET 时返回编码好的 URL
+
+        URL 超过 max_get_url_length（服务端/代理可能拒绝）就返回 None，改用 POST。
+        """
+        if not use_get:
+            return None
+        url = build_get_url(self.config.endpoint, payload)
+        return url if len(url) <= self.config.max_get_url_length else None
+
+    def _execute(
+        self,
+        payload: Dict[str, Any],
+        use_get: bool = False,
+        operation_name: Optional[str] = None,
+    ) -> Any:
+        """
+        艹！通过同步传输发送请求（查询可以走 GET + 条件请求）
+
+        Args:
+            payload: 请求体
+            use_get: 是否尝试用 GET 发送
+            operation_name: 操作名称（用于压缩统计）
 
         Returns:
-            gql Client 实例（异步）
+            响应里的 data 字段
         """
-        if not self._async_client:
-            transport = AIOHTTPTransport(
-                url=self.config.endpoint,
-                headers=self._headers,
-                timeout=self.config.timeout,
+        url = self._get_url(payload, use_get)
+        if url is not None:
+            return self._sync_transport.execute_get(url, self._headers, self.http_cache, operation_name)
+        return self._sync_transport.execute(payload, self._headers, operation_name)
+
+    async def _execute_async(
+        self,
+        payload: Dict[str, Any],
+        use_get: bool = False,
+        operation_name: Optional[str] = None,
+    ) -> Any:
+        """
+        艹！通过异步传输发送请求
+
+        connect() 过就走长连接池，否则临时建一个会话用完即关。
+
+        Args:
+            payload: 请求体
+            use_get: 是否尝试用 GET 发送
+            operation_name: 操作名称（用于压缩统计）
+
+        Returns:
+            响应里的 data 字段
+        """
+        url = self._get_url(payload, use_get)
+
+        async def send(transport: AsyncHTTPTransport) -> Any:
+            if url is not None:
+                return await transport.execute_get(url, self._headers, self.http_cache, operation_name)
+            return await transport.execute(payload, self._headers, operation_name)
+
+        transport = self._connected_async_transport()
+        if transport is not None:
+            return await send(transport)
+
+        async with self._new_async_transport() as transport:
+            return await send(transport)
+
+    def _active_apq(self) -> Optional[PersistedQueryRegistry]:
+        """启用且服务端支持时返回 APQ 注册表"""
+        apq = self.persisted_queries
+        return apq if apq is not None and apq.enabled else None
+
+    def _should_resend_full_query(self, apq: PersistedQueryRegistry, text: str, errors) -> bool:
+        """
+        艹！判断只发哈希的请求是否需要带全文重发
+
+        - PersistedQueryNotFound → 服务端不认识这个哈希，重发一次注册上
+        - PersistedQueryNotSupported → 服务端不支持 APQ，以后都发全文
+        """
+        if is_persisted_query_not_found(errors):
+            apq.record_not_found(text)
+            return True
+        if is_persisted_query_not_supported(errors):
+            apq.enabled = False
+            self.logger.warning("服务端不支持 APQ，已自动关闭持久化查询")
+            return True
+        return False
+
+    def _send(
+        self,
+        text: str,
+        variables: Optional[Dict[str, Any]] = None,
+        use_get: bool = False,
+        operation_name: Optional[str] = None,
+    ) -> Any:
+        """
+        艹！通过同步传输发送单个操作（启用 APQ 时先只发哈希）
+
+        Args:
+            text: 查询文本
+            variables: 变量
+            use_get: 是否走 GET（带全文注册 APQ 的那一次永远走 POST）
+            operation_name: 操作名称（用于压缩统计）
+
+        Returns:
+            响应里的 data 字段
+        """
+        apq = self._active_apq()
+        if apq is None:
+            return self._execute(build_payload(text, variables), use_get, operation_name)
+
+        try:
+            result = self._execute(apq.build_payload(text, variables), use_get, operation_name)
+            apq.record_hash_only(text)
+        except TransportQueryError as e:
+            if not self._should_resend_full_query(apq, text, e.errors):
+                raise
+            result = self._execute(
+                apq.build_payload(text, variables, include_query=True), operation_name=operation_name
             )
-            self._async_client = Client(
-                transport=transport,
-                fetch_schema_from_transport=False,
+        apq.mark_registered(text)
+        return result
+
+    async def _send_async(
+        self,
+        text: str,
+        variables: Optional[Dict[str, Any]] = None,
+        use_get: bool = False,
+        operation_name: Optional[str] = None,
+    ) -> Any:
+        """
+        艹！通过异步传输发送单个操作（启用 APQ 时先只发哈希）
+
+        Args:
+            text: 查询文本
+            variables: 变量
+            use_get: 是否走 GET（带全文注册 APQ 的那一次永远走 POST）
+            operation_name: 操作名称（用于压缩统计）
+
+        Returns:
+            响应里的 data 字段
+        """
+        apq = self._active_apq()
+        if apq is None:
+            return await self._execute_async(build_payload(text, variables), use_get, operation_name)
+
+        try:
+            result = await self._execute_async(apq.build_payload(text, variables), use_get, operation_name)
+            apq.record_hash_only(text)
+        except TransportQueryError as e:
+            if not self._should_resend_full_query(apq, text, e.errors):
+                raise
+            result = await self._execute_async(
+                apq.build_payload(text, variables, include_query=True), operation_name=operation_name
             )
+        apq.mark_registered(text)
+        return result
 
-        return self._async_client
+    def persisted_query_stats(self) -> Optional[PersistedQueryStats]:
+        """
+        获取 APQ 统计（没启用 APQ 时返回 None）
+
+        Returns:
+            PersistedQueryStats 快照
+        """
+        return self.persisted_queries.stats() if self.persisted_queries else None
 
     def set_token(self, token: Optional[str]):
         """
@@ -207,12 +627,9 @@ class GraphQLSDK:
             token: 新的 token（None 表示移除 token）
         """
         self.config.token = token
+        # 传输层每个请求都带最新的请求头，不用重建连接池
         self._headers = self._build_headers()
 
-        # 重置 client，下次使用时会重新创建
-        self._sync_client = None
-        self._async_client = None
-
         self.logger.info("Token 已更新")
 
     def update_headers(self, headers: Dict[str, str]):
@@ -225,16 +642,215 @@ class GraphQLSDK:
         self.config.headers.update(headers)
         self._headers = self._build_headers()
 
-        # 重置 client
-        self._sync_client = None
-        self._async_client = None
-
         self.logger.info(f"请求头已更新: {list(headers.keys())}")
 
+    def prepare(self, query: str) -> PreparedQuery:
+        """
+        艹！预编译 GraphQL 查询
+
+        解析一次，返回可以反复使用的句柄，传给 query()/mutate() 等方法时
+        直接复用解析结果。
+
+        Args:
+            query: GraphQL 查询字符串
+
+        Returns:
+            PreparedQuery 句柄
+
+        Raises:
+            GraphQLSDKError: 如果查询有语法错误
+
+        使用示例:
+            get_me = sdk.prepare("query GetMe { me { id email } }")
+            for _ in range(1000):
+                sdk.query(get_me)
+        """
+        try:
+            document = self.document_cache.get(query)
+        except Exception as e:
+            raise parse_error(e, "Prepare")
+
+        return PreparedQuery(
+            query=query,
+            document=document,
+            operation_name=get_operation_name(document),
+        )
+
+    def _get_document(self, query: QueryInput) -> Any:
+        """
+        艹！获取解析后的文档（预编译句柄直接用，文本走 LRU 缓存）
+
+        Args:
+            query: 查询文本或 PreparedQuery
+
+        Returns:
+            解析后的文档
+        """
+        if isinstance(query, PreparedQuery):
+            return query.document
+        return self.document_cache.get(query)
+
+    @staticmethod
+    def _query_text(query: QueryInput) -> str:
+        """获取要发送的查询文本"""
+        return query.query if isinstance(query, PreparedQuery) else query
+
+    def _prepare_send(self, query: QueryInput, variables: Optional[Dict[str, Any]] = None):
+        """
+        艹！解析查询，返回 (要发送的文本, 规范化缓存用的文档, 单飞 key, 是否走 GET)
+
+        - 启用规范化缓存时，发送的是补过 __typename 的文本；没启用时文档为 None
+        - 启用单飞时查询才有 key，变更的 key 永远是 None（变更不能合并）
+        - 只有查询才会走 GET，变更永远 POST
+        """
+        document = self._get_document(query)
+        text, cached_document = self._query_text(query), None
+        if self.normalized_cache is not None:
+            cached_document, text = self.normalized_cache.transform(document)
+
+        is_query = not self._is_mutation(document)
+        key = None
+        if self.config.single_flight and is_query:
+            # 不同 token 的请求结果可能不同，不能合并
+            key = flight_key(text, variables, self._headers.get("Authorization"))
+        return text, cached_document, key, is_query and self.config.use_get_for_queries
+
+    def _complexity_plan(
+        self,
+        query: QueryInput,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "Query",
+    ):
+        """
+        艹！发送前检查复杂度（没配置 complexity 时什么都不做）
+
+        Returns:
+            None 表示直接发；否则是 [(子查询文本, 子查询变量), ...]
+
+        Raises:
+            GraphQLSDKError: 超限又拆不动，或者查询有语法错误
+        """
+        if self.complexity is None:
+            return None
+        try:
+            text = self._prepare_send(query, variables)[0]
+            return self.complexity.plan(self._query_text(query), variables, sent_text=text)
+        except GraphQLSDKError:
+            raise
+        except Exception as e:
+            raise parse_error(e, operation_name, variables)
+
+    def estimate_complexity(self, query: QueryInput) -> int:
+        """
+        艹！按服务端的规则算查询复杂度（算的是实际发送的文本，规范化缓存补的 __typename 也算）
+
+        Args:
+            query: GraphQL 查询字符串（或 prepare() 返回的句柄）
+
+        Returns:
+            复杂度分数
+
+        Raises:
+            GraphQLSDKError: 如果查询有语法错误
+        """
+        try:
+            text = self._prepare_send(query)[0]
+            if self.complexity is not None:
+                return self.complexity.score(text)
+            return calculate_complexity(self.document_cache.get(text))
+        except GraphQLSDKError:
+            raise
+        except Exception as e:
+            raise parse_error(e, "EstimateComplexity")
+
+    def complexity_stats(self) -> Optional[ComplexityStats]:
+        """
+        获取查询复杂度统计（没配置 complexity 时返回 None）
+
+        Returns:
+            ComplexityStats 快照（打分次数、缓存命中、拆分次数、子请求数、本地拒绝数）
+        """
+        return self.complexity.stats() if self.complexity else None
+
+    def _write_normalized(self, cached_document: Any, variables: Optional[Dict[str, Any]], result: Any) -> Any:
+        """把响应写进规范化缓存（没启用时什么都不做）"""
+        if cached_document is not None:
+            self.normalized_cache.write(cached_document, variables, result)
+        return result
+
+    def compression_stats(self) -> Dict[str, CompressionStats]:
+        """
+        获取按操作名汇总的压缩统计（省下的字节数、压缩耗时）
+
+        Returns:
+            {操作名: CompressionStats}，没启用压缩时为空字典
+        """
+        return self.compressor.stats() if self.compressor else {}
+
+    def rate_limiter_stats(self) -> Optional[RateLimiterStats]:
+        """
+        获取客户端限流统计（没配置 rate_limit 时返回 None）
+
+        Returns:
+            RateLimiterStats 快照（放行数、等待过的请求数、累计等待时间）
+        """
+        return self.rate_limiter.stats() if self.rate_limiter else None
+
+    def http_cache_stats(self) -> Optional[HTTPCacheStats]:
+        """
+        获取 GET 条件请求统计（没启用 use_get_for_queries 时返回 None）
+
+        Returns:
+            HTTPCacheStats 快照
+        """
+        return self.http_cache.stats() if self.http_cache else None
+
+    def subscription_hub_stats(self) -> SubscriptionHubStats:
+        """
+        获取订阅扇出统计
+
+        Returns:
+            SubscriptionHubStats（上游连接数、消费者数、广播 / 丢弃 / 断开次数）
+        """
+        return self.subscription_hub.stats()
+
+    def single_flight_stats(self) -> SingleFlightStats:
+        """
+        获取单飞统计（同步和异步合计）
+
+        Returns:
+            SingleFlightStats 快照（collapsed 就是被合并掉的请求数）
+        """
+        sync_stats = self._single_flight.stats()
+        async_stats = self._async_single_flight.stats()
+        return SingleFlightStats(
+            flights=sync_stats.flights + async_stats.flights,
+            collapsed=sync_stats.collapsed + async_stats.collapsed,
+            in_flight=sync_stats.in_flight + async_stats.in_flight,
+        )
+
+    def normalized_cache_stats(self) -> Optional[NormalizedCacheStats]:
+        """
+        获取规范化缓存统计（没启用时返回 None）
+
+        Returns:
+            NormalizedCacheStats 快照
+        """
+        return self.normalized_cache.stats() if self.normalized_cache else None
+
+    def document_cache_stats(self) -> DocumentCacheStats:
+        """
+        获取文档缓存统计（hits / misses / evictions）
+
+        Returns:
+            DocumentCacheStats 快照
+        """
+        return self.document_cache.stats()
+
     def _execute_with_logging(
         self,
         operation_name: str,
-        query: str,
+        query: QueryInput,
         variables: Optional[Dict[str, Any]] = None,
     ) -> Any:
         """
@@ -259,14 +875,23 @@ class GraphQLSDK:
         error: Optional[Exception] = None
 
         try:
-            # 获取客户端
-            client = self._get_sync_client()
+            # 解析查询（走文档缓存，语法错误在发请求之前就抛出）
+            text, cached_document, key, use_get = self._prepare_send(query, variables)
+
+            # 规范化缓存里字段齐全就不走网络
+            if cached_document is not None:
+                hit, data = self.normalized_cache.read(cached_document, variables)
+                if hit:
+                    success = True
+                    return data
 
-            # 解析查询
-            document = gql(query)
+            # 执行查询（共享连接池，多线程安全）
+            def send():
+                result = self._send(text, variables, use_get, operation_name)
+                return self._write_normalized(cached_document, variables, result)
 
-            # 执行查询
-            result = client.execute(document, variable_values=variables)
+            # 相同的查询正在飞就等它的结果，不再单独发请求
+            result = self._single_flight.do(key, send) if key is not None else send()
 
             success = True
             return result
@@ -289,7 +914,7 @@ class GraphQLSDK:
 
     def query(
         self,
-        query: str,
+        query: QueryInput,
         variables: Optional[Dict[str, Any]] = None,
         operation_name: str = "Query",
     ) -> Any:
@@ -297,7 +922,7 @@ class GraphQLSDK:
         艹！执行 GraphQL 查询（同步）
 
         Args:
-            query: GraphQL 查询字符串
+            query: GraphQL 查询字符串（或 prepare() 返回的句柄）
             variables: 查询变量（可选）
             operation_name: 操作名称（可选，用于日志）
 
@@ -314,6 +939,11 @@ class GraphQLSDK:
                 }
             ''')
         """
+        # 复杂度超限：拆成几个不超限的查询，结果合并
+        parts = self._complexity_plan(query, variables, operation_name)
+        if parts is not None:
+            return merge_results([self.query(text, part, operation_name) for text, part in parts])
+
         def execute():
             return self._execute_with_logging(operation_name, query, variables)
 
@@ -328,7 +958,7 @@ class GraphQLSDK:
 
     def mutate(
         self,
-        mutation: str,
+        mutation: QueryInput,
         variables: Optional[Dict[str, Any]] = None,
         operation_name: str = "Mutation",
     ) -> Any:
@@ -336,7 +966,7 @@ class GraphQLSDK:
         艹！执行 GraphQL 变更（同步）
 
         Args:
-            mutation: GraphQL 变更字符串
+            mutation: GraphQL 变更字符串（或 prepare() 返回的句柄）
             variables: 变更变量（可选）
             operation_name: 操作名称（可选，用于日志）
 
@@ -356,12 +986,15 @@ class GraphQLSDK:
                 }
             ''', variables={"title": "Hello"})
         """
+        # 复杂度超限的变更在本地就拒绝（变更不拆）
+        self._complexity_plan(mutation, variables, operation_name)
+
         # 变更操作默认不重试（除非明确配置了重试）
         return self._execute_with_logging(operation_name, mutation, variables)
 
     async def query_async(
         self,
-        query: str,
+        query: QueryInput,
         variables: Optional[Dict[str, Any]] = None,
         operation_name: str = "QueryAsync",
     ) -> Any:
@@ -369,7 +1002,7 @@ class GraphQLSDK:
         艹！执行 GraphQL 查询（异步）
 
         Args:
-            query: GraphQL 查询字符串
+            query: GraphQL 查询字符串（或 prepare() 返回的句柄）
             variables: 查询变量（可选）
             operation_name: 操作名称（可选，用于日志）
 
@@ -386,6 +1019,12 @@ class GraphQLSDK:
                 }
             ''')
         """
+        # 复杂度超限：拆成几个不超限的查询并发执行，结果合并（变更超限直接报错）
+        parts = self._complexity_plan(query, variables, operation_name)
+        if parts is not None:
+            results = await asyncio.gather(*[self.query_async(text, part, operation_name) for text, part in parts])
+            return merge_results(list(results))
+
         # 记录请求
         self.logger.log_request(operation_name, variables, self._headers)
 
@@ -394,15 +1033,23 @@ class GraphQLSDK:
         error: Optional[Exception] = None
 
         try:
-            # 获取异步客户端
-            client = self._get_async_client()
+            # 解析查询（走文档缓存，语法错误在发请求之前就抛出）
+            text, cached_document, key, use_get = self._prepare_send(query, variables)
 
-            # 解析查询
-            document = gql(query)
+            # 规范化缓存里字段齐全就不走网络
+            if cached_document is not None:
+                hit, data = self.normalized_cache.read(cached_document, variables)
+                if hit:
+                    success = True
+                    return data
 
-            # 异步执行查询
-            async with client as session:
-                result = await session.execute(document, variable_values=variables)
+            # 异步执行查询（connect() 过就复用连接池）
+            async def send():
+                result = await self._send_async(text, variables, use_get, operation_name)
+                return self._write_normalized(cached_document, variables, result)
+
+            # 相同的查询正在飞就等它的结果，不再单独发请求
+            result = await self._async_single_flight.do(key, send) if key is not None else await send()
 
             success = True
             return result
@@ -425,7 +1072,7 @@ class GraphQLSDK:
 
     async def mutate_async(
         self,
-        mutation: str,
+        mutation: QueryInput,
         variables: Optional[Dict[str, Any]] = None,
         operation_name: str = "MutationAsync",
     ) -> Any:
@@ -433,7 +1080,7 @@ class GraphQLSDK:
         艹！执行 GraphQL 变更（异步）
 
         Args:
-            mutation: GraphQL 变更字符串
+            mutation: GraphQL 变更字符串（或 prepare() 返回的句柄）
             variables: 变更变量（可选）
             operation_name: 操作名称（可选，用于日志）
 
@@ -455,20 +1102,775 @@ class GraphQLSDK:
         """
         return await self.query_async(mutation, variables, operation_name)
 
+    def execute_many(
+        self,
+        query: QueryInput,
+        variables: VariablesSource,
+        concurrency: int = 10,
+        ordered: bool = False,
+        operation_name: str = "ExecuteMany",
+    ) -> AsyncIterator[BulkResult]:
+        """
+        艹！对一串变量批量执行同一个操作（异步生成器，有界并发）
+
+        最多 concurrency 个请求同时在飞，变量是惰性拉取的（无限迭代器、异步迭代器都行），
+        不会像 asyncio.gather 那样一次性建出所有 task。单条失败放在 BulkResult.error 里，不中断整批。
+
+        Args:
+            query: GraphQL 查询或变更（或 prepare() 返回的句柄）
+            variables: 变量的迭代器 / 异步迭代器
+            concurrency: 最多同时在飞的请求数（默认 10）
+            ordered: 是否按输入顺序吐结果（默认按完成顺序，更快）
+            operation_name: 操作名称（可选，用于日志）
+
+        Returns:
+            BulkResult 的异步迭代器（index / variables / data / error）
+
+        使用示例:
+            ids = (row["id"] for row in read_csv("artworks.csv"))
+            async for result in sdk.execute_many(GET_ARTWORK, ({"id": i} for i in ids), concurrency=20):
+                if result.ok:
+                    save(result.data)
+                else:
+                    print(result.index, result.error)
+        """
+        return execute_bounded(
+            lambda v: self.query_async(query, v, operation_name), variables, concurrency, ordered
+        )
+
+    def map_query(
+        self,
+        query: QueryInput,
+        variables: Iterable[Optional[Dict[str, Any]]],
+        workers: int = 8,
+        chunksize: int = 1,
+        timeout: Optional[float] = None,
+        operation_name: str = "MapQuery",
+    ) -> Iterator[BulkResult]:
+        """
+        艹！同步版本的批量执行：线程池共享同一个同步连接池，按输入顺序惰性吐结果
+
+        输入有空位才拉（背压），最多 workers 个块在排队/执行；单条失败放在 BulkResult.error 里。
+
+        Args:
+            query: GraphQL 查询或变更（或 prepare() 返回的句柄）
+            variables: 变量的迭代器（可以是无限的）
+            workers: 线程数（默认 8，别超过连接池容量）
+            chunksize: 每个任务处理几条输入（默认 1）
+            timeout: 单条输入的超时（秒，可选），超时（包括被卡住的请求挡着、迟迟没开始）的那条返回 NETWORK_ERROR
+            operation_name: 操作名称（可选，用于日志）
+
+        Returns:
+            BulkResult 的迭代器（index / variables / data / error）
+
+        使用示例:
+            for result in sdk.map_query(GET_USER, ({"id": uid} for uid in user_ids), workers=16):
+                print(result.index, result.data if result.ok else result.error)
+        """
+        if workers > self._sync_transport.pool_maxsize:
+            self.logger.warning(
+                f"map_query workers={workers} 超过了同步连接池容量 {self._sync_transport.pool_maxsize}，"
+                f"多出来的线程会临时建连接（或者排队等连接）"
+            )
+        return map_bounded(
+            lambda v: self.query(query, v, operation_name), variables, workers, chunksize, timeout
+        )
+
+    def subscribe(
+        self,
+        query: QueryInput,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "Subscription",
+        config: Optional[SubscriptionConfig] = None,
+    ) -> Subscription:
+        """
+        艹！订阅（graphql-yoga SSE），async for 逐个拿到推送的 data
+
+        断线自动重连并带上 Last-Event-ID，超过心跳超时没收到任何字节也会主动重连。
+        connect() 过就复用连接池，否则订阅期间单独开一个会话。
+
+        Args:
+            query: subscription 文档（或 prepare() 返回的句柄）
+            variables: 变量（可选）
+            operation_name: 操作名称（可选，用于日志）
+            config: 订阅配置（可选，默认用 GraphQLSDKConfig.subscription_config）
+
+        Returns:
+            Subscription（异步迭代器）
+
+        Raises:
+            GraphQLSDKError: 推送里有 GraphQL 错误，或者重连次数用完
+
+        使用示例:
+            async for event in sdk.subscribe("subscription { newBlogPost { id title } }"):
+                print(event["newBlogPost"]["title"])
+        """
+        return Subscription(
+            self, query, variables, operation_name, config or self.config.subscription_config
+        )
+
+    def subscribe_shared(
+        self,
+        query: QueryInput,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "SharedSubscription",
+        queue_size: Optional[int] = None,
+        overflow: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        艹！共享订阅：同一个事件循环里相同的订阅只开一条上游 SSE 连接，事件广播给所有消费者
+
+        每个消费者一个有界队列；消费太慢队列满了，drop_oldest 丢最旧的事件，
+        disconnect 让这个消费者抛 SlowConsumerError。最后一个消费者离开时关掉上游连接。
+
+        Args:
+            query: subscription 文档（或 prepare() 返回的句柄）
+            variables: 变量（可选）
+            operation_name: 操作名称（可选，用于日志）
+            queue_size: 这个消费者的队列容量（可选，默认 subscription_config.queue_size）
+            overflow: 队列满了怎么办（drop_oldest / disconnect，默认 subscription_config.overflow）
+
+        Returns:
+            事件的异步迭代器（从加入的那一刻开始收）
+
+        使用示例:
+            async def worker(name):
+                async for event in sdk.subscribe_shared(NEW_POSTS, overflow="disconnect"):
+                    await handle(name, event)
+
+            await asyncio.gather(*[worker(i) for i in range(50)])  # 只有一条 SSE 连接
+        """
+        return self.subscription_hub.subscribe(query, variables, operation_name, queue_size, overflow)
+
+    def video_tracker(
+        self,
+        config: Optional[VideoJobConfig] = None,
+        webhook: Optional[WebhookReceiver] = None,
+    ) -> VideoJobTracker:
+        """
+        艹！创建视频任务跟踪器（POST /api/v1/video/generate 提交，自适应轮询 /api/v1/video/status）
+
+        需要配置 api_key。connect() 过就复用连接池，否则跟踪器自己开一个、退出时关掉。
+        传了 webhook 接收器就先等 video.generated / video.failed，只有 webhook 过期的任务才轮询。
+
+        Args:
+            config: 跟踪配置（可选，默认用 GraphQLSDKConfig.video_jobs）
+            webhook: webhook 接收器（可选）
+
+        Returns:
+            VideoJobTracker（异步上下文管理器）
+
+        使用示例:
+            async with sdk.video_tracker() as tracker:
+                job = await tracker.submit("a cat surfing at sunset", duration=8)
+                status = await job
+                print(status.video_url if status.ok else status.error_message)
+        """
+        return VideoJobTracker(self, config or self.config.video_jobs, webhook)
+
+    def download_video(
+        self,
+        video: Dict[str, Any],
+        dest: str,
+        config: Optional[DownloadConfig] = None,
+    ) -> DownloadResult:
+        """
+        艹！把一个视频流式下载到磁盘（断点续传 + 大文件并行分块 + 按 fileSizeBytes 校验）
+
+        先写 <dest>.part，下完校验大小才改名成 dest；中途失败的话下次调用接着下。
+
+        Args:
+            video: Video 字典（permanentVideoUrl / googleVideoUrl，最好再选上 id / fileSizeBytes / isExpired）
+            dest: 目标文件路径，或者目录（存成 <dir>/<id>.mp4）
+            config: 下载配置（可选，默认用 GraphQLSDKConfig.downloads）
+
+        Returns:
+            DownloadResult
+
+        Raises:
+            GraphQLSDKError: 没有可用地址、链接过期、重试用完、大小对不上
+
+        使用示例:
+            video = sdk.query(VIDEO_QUERY, {"id": video_id})["video"]
+            result = sdk.download_video(video, "./videos/")
+            print(result.path, result.size, result.resumed)
+        """
+        downloader = VideoDownloader(
+            self._sync_transport.connect(), config or self.config.downloads, self._sync_transport.verify
+        )
+        start_time = time.time()
+        result = downloader.download(video, dest)
+        if not result.skipped:
+            self.logger.info(
+                f"视频已下载: {result.path}（{result.size} 字节，{result.parts} 块，"
+                f"{(time.time() - start_time) * 1000:.0f}ms）"
+            )
+        return result
+
+    def download_videos(
+        self,
+        videos: Iterable[Dict[str, Any]],
+        dest_dir: str,
+        concurrency: int = 4,
+        config: Optional[DownloadConfig] = None,
+    ) -> Iterator[BulkResult]:
+        """
+        艹！批量下载视频，线程池有界并发，按下载顺序吐出结果
+
+        只有 Google 临时链接（2 天过期）的视频排在最前面，越早创建越先下；单个失败不会中断整批。
+
+        Args:
+            videos: Video 字典列表
+            dest_dir: 目标目录（不存在会自动创建）
+            concurrency: 同时下载几个视频（大文件自己还会并行分块）
+            config: 下载配置（可选）
+
+        Returns:
+            BulkResult 的迭代器（data 是 DownloadResult，variables 是对应的 Video 字典）
+
+        使用示例:
+            for item in sdk.download_videos(videos, "./videos", concurrency=8):
+                if not item.ok:
+                    print(item.variables["id"], item.error)
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        return map_bounded(
+            lambda video: self.download_video(video, dest_dir, config), download_order(videos), concurrency
+        )
+
+    def batch_generate(
+        self,
+        subject_id: str,
+        prompts: Sequence[PromptInput],
+        checkpoint: Optional[str] = None,
+        config: Optional[BatchGenerateConfig] = None,
+    ) -> BatchGenerator:
+        """
+        艹！批量生图（/api/batch-generate）：切块有界并发提交，边生成边逐条吐结果，进度写检查点
+
+        每块一个批量任务（auto_execute），轮询进度时 generated_images 每多一条就吐一条，不用等整块结束。
+        传了 checkpoint 就能断点恢复：同一批输入重跑时已完成的条目直接返回（restored=True），
+        已经提交但没跑完的任务接着轮询，只有没提交过的才新建任务。connect() 过就复用连接池。
+
+        Args:
+            subject_id: 主体素材 ID
+            prompts: 场景提示词列表（字符串，或者 {"prompt": ..., "scene_id": ...}）
+            checkpoint: 检查点文件路径（可选）
+            config: 批量生图配置（可选，默认用 GraphQLSDKConfig.batch_generate）
+
+        Returns:
+            BatchGenerator（async for 逐条拿 BatchItemResult，.stats() 看统计）
+
+        使用示例:
+            run = sdk.batch_generate(subject_id, prompts, checkpoint="scenes.ckpt")
+            async for item in run:
+                print(item.index, item.image_url if item.ok else item.error)
+        """
+        return BatchGenerator(self, subject_id, prompts, checkpoint, config or self.config.batch_generate)
+
+    def stream_query(
+        self,
+        query: QueryInput,
+        path: str,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "StreamQuery",
+    ) -> QueryStream:
+        """
+        艹！流式执行列表查询：边收边解析，path 指向的数组元素一完整就交给你
+
+        内存峰值大约是一个元素，而不是整个响应文档。同步用 for，异步用 async for。
+        流式请求不走规范化缓存/单飞/GET/APQ，也不重试（已经交出去的元素收不回来）。
+
+        Args:
+            query: GraphQL 查询字符串（或 prepare() 返回的句柄）
+            path: data 下面目标数组的路径，例如 "artworks" 或 "user.artworks"（有别名就写别名）
+            variables: 查询变量（可选）
+            operation_name: 操作名称（可选，用于日志）
+
+        Returns:
+            QueryStream（可同步/异步迭代）
+
+        Raises:
+            GraphQLSDKError: 迭代过程中请求失败，或者收完之后响应里有 GraphQL 错误
+
+        使用示例:
+            for artwork in sdk.stream_query(GET_ARTWORKS, path="artworks", variables={"limit": 100}):
+                print(artwork["id"])
+        """
+        return QueryStream(self, query, path, variables, operation_name)
+
+    def iter_connection(
+        self,
+        query: QueryInput,
+        connection_path: str,
+        page_size: int = 20,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "Connection",
+        prefetch: bool = True,
+        after: Optional[str] = None,
+    ) -> ConnectionIterator:
+        """
+        艹！遍历 Relay Connection 的所有 node，自动跟着 endCursor / hasNextPage 翻页
+
+        处理第 N 页的同时预取第 N+1 页，全量扫描时网络延迟和处理时间重叠起来。
+        同步用 for，异步用 async for；每页都走 query() / query_async()（重试、缓存照常生效）。
+
+        Args:
+            query: 声明了 $first / $after 变量、选了 pageInfo { endCursor hasNextPage } 的查询
+            connection_path: data 下面 Connection 字段的路径，例如 "artworksConnection"
+            page_size: 每页条数（作为 $first 传入，默认 20）
+            variables: 其他查询变量（可选）
+            operation_name: 操作名称（可选，用于日志）
+            prefetch: 是否预取下一页（默认 True）
+            after: 起始游标（可选）
+
+        Returns:
+            ConnectionIterator（可同步/异步迭代）
+
+        使用示例:
+            for video in sdk.iter_connection(GET_VIDEOS, "videosConnection", page_size=50,
+                                             variables={"status": "completed"}):
+                print(video["id"])
+        """
+        return ConnectionIterator(
+            self, query, connection_path, page_size, variables, operation_name, prefetch, after
+        )
+
+    def iter_pages(
+        self,
+        query: QueryInput,
+        list_path: str,
+        page_size: int = MAX_PAGE_SIZE,
+        concurrency: int = 4,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "Pages",
+        offset: int = 0,
+    ) -> OffsetPageIterator:
+        """
+        艹！并发遍历 limit/offset 分页的列表字段，按顺序逐个吐出元素
+
+        同时有 concurrency 个页请求在飞，遇到第一个不满 page_size 的页就停，
+        多发出去的靠后页直接丢弃。同步用 for（线程池），异步用 async for（task）。
+
+        Args:
+            query: 声明了 $limit / $offset 变量的查询
+            list_path: data 下面列表字段的路径，例如 "artworks" 或 "users"
+            page_size: 每页条数（作为 $limit 传入，默认也是上限 100）
+            concurrency: 同时在飞的页请求数（默认 4）
+            variables: 其他查询变量（可选）
+            operation_name: 操作名称（可选，用于日志）
+            offset: 起始 offset（默认 0）
+
+        Returns:
+            OffsetPageIterator（可同步/异步迭代）
+
+        使用示例:
+            for artwork in sdk.iter_pages(GET_ARTWORKS, "artworksByPrompt", concurrency=8,
+                                          variables={"prompt": "香蕉"}):
+                print(artwork["id"])
+        """
+        return OffsetPageIterator(
+            self, query, list_path, page_size, concurrency, variables, operation_name, offset
+        )
+
+    def _stream(
+        self,
+        query: QueryInput,
+        path: Sequence[str],
+        variables: Optional[Dict[str, Any]],
+        operation_name: str,
+    ) -> Iterator[Any]:
+        """stream_query() 的同步实现"""
+        self.logger.log_request(operation_name, variables, self._headers)
+        start_time = time.time()
+        error: Optional[Exception] = None
+
+        try:
+            self._get_document(query)
+            payload = build_payload(self._query_text(query), variables)
+            yield from self._sync_transport.stream(payload, path, self._headers, operation_name)
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            error = e
+            raise parse_error(e, operation_name, variables)
+        finally:
+            self.logger.log_response(
+                operation_name, (time.time() - start_time) * 1000, success=error is None, error=error
+            )
+
+    async def _stream_async(
+        self,
+        query: QueryInput,
+        path: Sequence[str],
+        variables: Optional[Dict[str, Any]],
+        operation_name: str,
+    ) -> AsyncIterator[Any]:
+        """stream_query() 的异步实现（connect() 过就复用连接池）"""
+        self.logger.log_request(operation_name, variables, self._headers)
+        start_time = time.time()
+        error: Optional[Exception] = None
+
+        try:
+            self._get_document(query)
+            payload = build_payload(self._query_text(query), variables)
+            transport = self._connected_async_transport()
+            if transport is not None:
+                async for item in transport.stream(payload, path, self._headers, operation_name):
+                    yield item
+            else:
+                async with self._new_async_transport() as transport:
+                    async for item in transport.stream(payload, path, self._headers, operation_name):
+                        yield item
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            error = e
+            raise parse_error(e, operation_name, variables)
+        finally:
+            self.logger.log_response(
+                operation_name, (time.time() - start_time) * 1000, success=error is None, error=error
+            )
+
+    def batch(
+        self,
+        operations: Iterable[BatchInput],
+        max_batch_size: Optional[int] = None,
+    ) -> List[BatchResult]:
+        """
+        艹！批量执行多个操作（同步），N 个操作只走一个 HTTP POST
+
+        超过 max_batch_size 的自动切成多个请求依次发送。
+        每个操作的结果/错误各自独立：语法错误、服务端 errors 只影响自己；
+        整个 HTTP 请求失败（网络错误等）时，这一块里的操作都带同一个错误。
+        全是查询的块按重试配置重试，含变更的块不重试。
+
+        Args:
+            operations: 操作列表（BatchOperation、查询文本、(query, variables) 元组或字典）
+            max_batch_size: 单个请求最多携带的操作数（默认用配置里的）
+
+        Returns:
+            和输入顺序一致的 BatchResult 列表
+
+        使用示例:
+            results = sdk.batch([
+                (GET_ARTWORK, {"id": "a1", "type": "image"}),
+                (GET_USER, {"id": "u1"}),
+            ])
+            for r in results:
+                print(r.data if r.ok else r.error)
+        """
+        ops, results, pending = self._prepare_batch(operations)
+        for chunk in chunked(pending, max_batch_size or self.config.max_batch_size):
+            self._execute_batch_chunk(ops, results, chunk)
+        return results
+
+    async def batch_async(
+        self,
+        operations: Iterable[BatchInput],
+        max_batch_size: Optional[int] = None,
+    ) -> List[BatchResult]:
+        """
+        艹！批量执行多个操作（异步）
+
+        和 batch() 一样，只是切出来的多个请求会并发发送。
+
+        Args:
+            operations: 操作列表
+            max_batch_size: 单个请求最多携带的操作数（默认用配置里的）
+
+        Returns:
+            和输入顺序一致的 BatchResult 列表
+        """
+        ops, results, pending = self._prepare_batch(operations)
+        await asyncio.gather(*[
+            self._execute_batch_chunk_async(ops, results, chunk)
+            for chunk in chunked(pending, max_batch_size or self.config.max_batch_size)
+        ])
+        return results
+
+    def _prepare_batch(self, operations: Iterable[BatchInput]):
+        """
+        艹！解析所有操作，挑出要发送的
+
+        语法错误的操作直接填好错误结果，不占批量名额。
+
+        Returns:
+            (ops, results, pending)
+            - ops: 统一格式后的操作列表
+            - results: 结果占位（语法错误的已经填好）
+            - pending: 要发送的 (下标, 查询文本, 变量, 是否变更) 列表
+        """
+        ops = [normalize_operation(op) for op in operations]
+        results: List[Optional[BatchResult]] = [None] * len(ops)
+        pending = []
+
+        for i, op in enumerate(ops):
+            try:
+                document = self._get_document(op.query)
+            except Exception as e:
+                results[i] = BatchResult(error=parse_error(e, op.operation_name, op.variables))
+                continue
+            pending.append(
+                (i, self._query_text(op.query), op.variables, self._is_mutation(document))
+            )
+
+        return ops, results, pending
+
+    @staticmethod
+    def _is_mutation(document: Any) -> bool:
+        """文档里是否包含变更操作"""
+        return any(
+            getattr(getattr(d, "operation", None), "value", None) == "mutation"
+            for d in getattr(document, "definitions", ())
+        )
+
+    def _batch_payloads(self, chunk, full_query: bool = False) -> List[Dict[str, Any]]:
+        """
+        艹！生成一块批量操作的请求体
+
+        启用 APQ 时，服务端已知的查询只发哈希，其他的带全文顺便注册。
+
+        Args:
+            chunk: (下标, 查询文本, 变量, 是否变更) 列表
+            full_query: 强制带全文（PersistedQueryNotFound 重发时使用）
+        """
+        apq = self._active_apq()
+        if apq is None:
+            return [build_payload(text, variables) for _, text, variables, _ in chunk]
+        return [
+            apq.build_payload(
+                text, variables, include_query=full_query or not apq.is_registered(text)
+            )
+            for _, text, variables, _ in chunk
+        ]
+
+    def _apq_batch_resend(self, chunk, payloads, bodies) -> List[int]:
+        """
+        艹！找出批量响应里需要带全文重发的操作，同时更新 APQ 注册表
+
+        Returns:
+            需要重发的操作在 chunk 里的位置列表
+        """
+        apq = self._active_apq()
+        if apq is None:
+            return []
+
+        resend: List[int] = []
+        for k, ((_, text, _, _), payload, body) in enumerate(zip(chunk, payloads, bodies)):
+            errors = body.get("errors") if isinstance(body, dict) else None
+            if "query" not in payload and self._should_resend_full_query(apq, text, errors):
+                resend.append(k)
+                continue
+            if "query" not in payload:
+                apq.record_hash_only(text)
+            if isinstance(body, dict) and "data" in body:
+                apq.mark_registered(text)
+        return resend
+
+    @staticmethod
+    def _fill_batch_results(ops, results, chunk, bodies: List[Any]):
+        """把一块响应体逐个转换成 BatchResult 填回结果列表"""
+        for (i, _, _, _), body in zip(chunk, bodies):
+            op = ops[i]
+            try:
+                results[i] = BatchResult(data=parse_result(200, body))
+            except Exception as e:
+                results[i] = BatchResult(
+                    data=getattr(e, "data", None),
+                    error=parse_error(e, op.operation_name, op.variables),
+                )
+
+    def _log_retry_callback(self, operation_name: str):
+        """生成重试日志回调"""
+        return lambda attempt, error, delay: self.logger.log_retry(
+            operation_name, attempt, self.retry_handler.config.max_attempts, delay, error
+        )
+
+    def _execute_batch_chunk(self, ops, results, chunk):
+        """艹！发送一块批量操作（同步），结果直接填进 results"""
+        name = describe_batch([ops[i] for i, _, _, _ in chunk])
+
+        def execute(payloads):
+            self.logger.log_request(name, None, self._headers)
+            start_time = time.time()
+            error: Optional[Exception] = None
+            try:
+                return self._sync_transport.execute_batch(payloads, self._headers, name)
+            except Exception as e:
+                error = e
+                raise parse_error(e, name)
+            finally:
+                self.logger.log_response(
+                    name, (time.time() - start_time) * 1000, success=error is None, error=error
+                )
+
+        def send(sub_chunk, payloads):
+            if any(is_mutation for _, _, _, is_mutation in sub_chunk):
+                return execute(payloads)
+            return self.retry_handler.execute_with_retry(
+                lambda: execute(payloads),
+                operation_name=name,
+                on_retry=self._log_retry_callback(name),
+            )
+
+        try:
+            payloads = self._batch_payloads(chunk)
+            bodies = send(chunk, payloads)
+
+            # APQ：服务端不认识的哈希带全文再发一次
+            resend = self._apq_batch_resend(chunk, payloads, bodies)
+            if resend:
+                sub_chunk = [chunk[k] for k in resend]
+                full_payloads = self._batch_payloads(sub_chunk, full_query=True)
+                full_bodies = send(sub_chunk, full_payloads)
+                self._apq_batch_resend(sub_chunk, full_payloads, full_bodies)
+                for k, body in zip(resend, full_bodies):
+                    bodies[k] = body
+        except GraphQLSDKError as e:
+            for i, _, _, _ in chunk:
+                results[i] = BatchResult(error=e)
+            return
+
+        self._fill_batch_results(ops, results, chunk, bodies)
+
+    async def _execute_batch_chunk_async(self, ops, results, chunk):
+        """艹！发送一块批量操作（异步），结果直接填进 results"""
+        name = describe_batch([ops[i] for i, _, _, _ in chunk])
+
+        async def execute(payloads):
+            self.logger.log_request(name, None, self._headers)
+            start_time = time.time()
+            error: Optional[Exception] = None
+            try:
+                transport = self._connected_async_transport()
+                if transport is not None:
+                    return await transport.execute_batch(payloads, self._headers, name)
+                async with self._new_async_transport() as transport:
+                    return await transport.execute_batch(payloads, self._headers, name)
+            except Exception as e:
+                error = e
+                raise parse_error(e, name)
+            finally:
+                self.logger.log_response(
+                    name, (time.time() - start_time) * 1000, success=error is None, error=error
+                )
+
+        async def send(sub_chunk, payloads):
+            if any(is_mutation for _, _, _, is_mutation in sub_chunk):
+                return await execute(payloads)
+            return await self.retry_handler.execute_with_retry_async(
+                lambda: execute(payloads),
+                operation_name=name,
+                on_retry=self._log_retry_callback(name),
+            )
+
+        try:
+            payloads = self._batch_payloads(chunk)
+            bodies = await send(chunk, payloads)
+
+            # APQ：服务端不认识的哈希带全文再发一次
+            resend = self._apq_batch_resend(chunk, payloads, bodies)
+            if resend:
+                sub_chunk = [chunk[k] for k in resend]
+                full_payloads = self._batch_payloads(sub_chunk, full_query=True)
+                full_bodies = await send(sub_chunk, full_payloads)
+                self._apq_batch_resend(sub_chunk, full_payloads, full_bodies)
+                for k, body in zip(resend, full_bodies):
+                    bodies[k] = body
+        except GraphQLSDKError as e:
+            for i, _, _, _ in chunk:
+                results[i] = BatchResult(error=e)
+            return
+
+        self._fill_batch_results(ops, results, chunk, bodies)
+
+    def loader(
+        self,
+        name: Union[str, LoaderSpec],
+        selection: Optional[str] = None,
+        max_batch_size: int = 100,
+        cache: bool = False,
+    ) -> DataLoader:
+        """
+        艹！获取按 ID 查询的 DataLoader
+
+        同一个事件循环 tick 里的 load() 会合并成一个带别名的操作，
+        重复的 key 只查一次。相同参数多次调用返回同一个实例。
+
+        Args:
+            name: 内置 loader 名（artwork / blogPost / video / user）或自定义 LoaderSpec
+            selection: 选择集（默认用内置的常用字段）
+            max_batch_size: 单个操作最多合并的 key 数（默认 100）
+            cache: 是否缓存已加载的结果（默认只合并进行中的重复 key）
+
+        Returns:
+            DataLoader 实例
+
+        使用示例:
+            users = await asyncio.gather(*[
+                sdk.loader("user").load(uid) for uid in user_ids
+            ])
+            art = await sdk.loader("artwork", selection="id url").load("a1", type="image")
+        """
+        if isinstance(name, LoaderSpec):
+            spec = name
+        else:
+            spec = BUILTIN_LOADERS.get(name)
+            if spec is None:
+                raise ValueError(
+                    f"艹，没有叫 {name} 的 loader！可选: {', '.join(BUILTIN_LOADERS)}"
+                )
+
+        registry_key = (
+            spec.field, tuple(spec.args.items()), spec.selection, selection, max_batch_size, cache
+        )
+        loader = self._loaders.get(registry_key)
+        if loader is None:
+            loader = DataLoader(
+                self, spec, selection=selection, max_batch_size=max_batch_size, cache=cache
+            )
+            self._loaders[registry_key] = loader
+        return loader
+
     def close(self):
         """
         艹！关闭客户端，释放资源
 
         建议在程序结束时调用
         """
-        if self._sync_client:
-            try:
-                self._sync_client.close()
-            except Exception:
-                pass
+        try:
+            self._sync_transport.close()
+        except Exception:
+            pass
+
+        self._close_async_transport()
 
         self.logger.info("SDK 客户端已关闭")
 
+    def _close_async_transport(self):
+        """
+        艹！在同步上下文里关闭异步连接池
+
+        - 事件循环正在跑（在协程里调用了 close()）→ 调度一个关闭任务
+        - 事件循环还在但没跑 → 直接跑完关闭
+        - 事件循环已经关了 → 会话早就没法用了，直接丢掉
+        """
+        transport, self._async_transport = self._async_transport, None
+        if transport is None or not transport.is_connected:
+            return
+
+        loop = transport.loop
+        try:
+            if loop is None or loop.is_closed():
+                return
+            if loop.is_running():
+                loop.create_task(transport.close())
+            else:
+                loop.run_until_complete(transport.close())
+        except Exception as e:
+            self.logger.warning(f"关闭异步连接池失败: {e}")
+
     def __enter__(self):
         """上下文管理器入口"""
         return self
@@ -477,6 +1879,15 @@ class GraphQLSDK:
         """上下文管理器出口"""
         self.close()
 
+    async def __aenter__(self):
+        """异步上下文管理器入口（打开连接池）"""
+        return await self.connect()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """异步上下文管理器出口（关闭连接池）"""
+        await self.aclose()
+        self.close()
+
 
 # 便捷函数：创建 SDK 实例
 def create_sdk(
@@ -0,0 +1,152 @@
+"""
+艹！Nano Banana GraphQL SDK JSON 编解码模块
+
+1-5MB 的列表响应，标准库 json 解码能吃掉 worker 一大半 CPU，太tm慢了！
+这个SB模块把编解码做成可插拔的：
+- 装了 orjson 就用 orjson（最快，直接输出 bytes）
+- 没有 orjson 但装了 ujson 就用 ujson
+- 都没装就老老实实用标准库 json
+
+编码统一返回 bytes，传输层直接发，不再 str → bytes 再拷一遍。
+"""
+
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Tuple, Type, Union
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ujson
+    HAS_UJSON = True
+except ImportError:
+    HAS_UJSON = False
+
+
+class JSONCodec(ABC):
+    """
+    JSON 编解码器基类（抽象类）
+
+    自定义编解码器继承它，实现 dumps() / loads() 就行：
+    - dumps(obj, pretty=False) -> bytes（UTF-8）
+    - loads(data) -> Any（data 可以是 bytes 或 str，解码失败抛 ValueError）
+
+    底层库解码失败抛的不是 ValueError 子类的话，把异常类型写进 decode_errors。
+    SDK 里每个调用 loads() 的地方都用 except codec.decode_failure 接住（ValueError + decode_errors），
+    解码失败按响应格式错误处理，不会把底层库的异常原样漏出去。
+    少实现一个，实例化的时候就 TypeError，不会拖到发请求的时候才炸。
+    """
+
+    name = "base"
+    decode_errors: Tuple[Type[Exception], ...] = ()
+
+    @abstractmethod
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        """编码成 UTF-8 bytes（pretty=True 时缩进两格，给日志用）"""
+
+    @abstractmethod
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """解码 JSON"""
+
+    @property
+    def decode_failure(self) -> Tuple[Type[Exception], ...]:
+        """loads() 解码失败时可能抛的所有异常类型（给 except 用）"""
+        return (ValueError, *self.decode_errors)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class StdlibJSONCodec(JSONCodec):
+    """标准库 json（永远可用的兜底方案）"""
+
+    name = "json"
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """orjson：Rust 实现，dumps 直接产出 bytes，零拷贝"""
+
+    name = "orjson"
+
+    def __init__(self):
+        if not HAS_ORJSON:
+            raise ImportError("艹！orjson 没有安装！运行: pip install orjson")
+        self._compact = orjson.OPT_NON_STR_KEYS
+        self._pretty = orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        return orjson.dumps(obj, option=self._pretty if pretty else self._compact)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """ujson：C 实现，解码比标准库快不少（编码只能产出 str，还得 encode 一次）"""
+
+    name = "ujson"
+
+    def __init__(self):
+        if not HAS_UJSON:
+            raise ImportError("艹！ujson 没有安装！运行: pip install ujson")
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        return ujson.dumps(
+            obj, ensure_ascii=False, escape_forward_slashes=False, indent=2 if pretty else 0
+        ).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return ujson.loads(data)
+
+
+# 按名字选编解码器
+CODECS: Dict[str, Type[JSONCodec]] = {
+    "json": StdlibJSONCodec,
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec,
+}
+
+
+def available_codecs() -> Dict[str, bool]:
+    """每个内置编解码器是否可用"""
+    return {"orjson": HAS_ORJSON, "ujson": HAS_UJSON, "json": True}
+
+
+def get_codec(codec: Union[str, JSONCodec] = "auto") -> JSONCodec:
+    """
+    艹！获取 JSON 编解码器
+
+    Args:
+        codec: "auto"（orjson > ujson > json）、"orjson"、"ujson"、"json"，
+               或者直接传一个 JSONCodec 实例
+
+    Returns:
+        JSONCodec 实例
+
+    Raises:
+        ValueError: 名字不认识
+        ImportError: 指定的库没有安装
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == "auto":
+        if HAS_ORJSON:
+            return OrjsonCodec()
+        if HAS_UJSON:
+            return UjsonCodec()
+        return StdlibJSONCodec()
+    if codec not in CODECS:
+        raise ValueError(f"艹，不认识的 JSON 编解码器: {codec}（可选 auto / {' / '.join(CODECS)}）")
+    return CODECS[codec]()
@@ -0,0 +1,378 @@
+"""
+艹！Nano Banana GraphQL SDK 查询复杂度模块
+
+服务端（lib/graphql/query-complexity.ts）用 calculateQueryComplexity 给每个文档打分，
+超过订阅层级的 maxComplexity 直接拒绝。以前 SDK 要白跑一趟才知道。这个SB模块提供：
+- 一模一样的打分规则（COMPLEXITY_WEIGHTS），请求发出去之前就算好分数
+- 按文档文本缓存分数（LRU），同一个查询只算一次
+- 超限的查询按顶层字段拆成几个不超限的请求，结果再合并成一份 data
+- 超限的变更、拆到单个顶层字段还超限的查询：本地直接报 VALIDATION_ERROR，不浪费一次请求
+
+注意服务端的打分不看参数：first / limit 改多小分数都一样，所以只能按顶层字段拆。
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .errors import validation_error
+
+try:
+    from graphql import (
+        DocumentNode,
+        FieldNode,
+        FragmentDefinitionNode,
+        FragmentSpreadNode,
+        InlineFragmentNode,
+        OperationDefinitionNode,
+        SelectionSetNode,
+        parse,
+        print_ast,
+        visit,
+        Visitor,
+    )
+    HAS_GRAPHQL = True
+except ImportError:
+    HAS_GRAPHQL = False
+
+# 复杂度权重（和 lib/graphql/query-complexity.ts 的 COMPLEXITY_WEIGHTS 一致）
+COMPLEXITY_WEIGHTS: Dict[str, int] = {
+    "scalar_field": 1,
+    "object_field": 5,
+    "list_field": 10,
+    "connection_field": 10,
+    "relation_field": 5,
+    "mutation": 10,
+}
+
+# 每个订阅层级允许的最大复杂度（和 lib/graphql/rate-limiter.ts 的 RATE_LIMITS 一致）
+COMPLEXITY_LIMITS: Dict[str, int] = {
+    "free": 500,
+    "basic": 750,
+    "pro": 1000,
+    "max": 2000,
+    "admin": 5000,
+}
+
+
+def selection_complexity(selection: Any) -> int:
+    """
+    艹！一个选择（字段 / 片段展开 / 内联片段）的复杂度，规则和服务端逐条对应
+
+    - 字段：1，名字以 Connection 结尾再 +10，否则以 s 结尾或含 List 再 +10，否则有子选择再 +5
+    - 片段展开：服务端不展开，只算 1
+    - 内联片段：只算里面的字段
+    """
+    if isinstance(selection, FieldNode):
+        name = selection.name.value
+        score = COMPLEXITY_WEIGHTS["scalar_field"]
+        if name.endswith("Connection"):
+            score += COMPLEXITY_WEIGHTS["connection_field"]
+        elif name.endswith("s") or "List" in name:
+            score += COMPLEXITY_WEIGHTS["list_field"]
+        elif selection.selection_set:
+            score += COMPLEXITY_WEIGHTS["object_field"]
+        if selection.selection_set:
+            score += _selection_set_complexity(selection.selection_set)
+        return score
+    if isinstance(selection, FragmentSpreadNode):
+        return COMPLEXITY_WEIGHTS["scalar_field"]
+    if isinstance(selection, InlineFragmentNode) and selection.selection_set:
+        return _selection_set_complexity(selection.selection_set)
+    return 0
+
+
+def _selection_set_complexity(selection_set: "SelectionSetNode") -> int:
+    return sum(selection_complexity(selection) for selection in selection_set.selections)
+
+
+def calculate_complexity(document: "DocumentNode") -> int:
+    """
+    艹！计算整个文档的复杂度（文档里所有操作都算，变更每个再 +10）
+
+    Args:
+        document: 解析后的文档
+
+    Returns:
+        复杂度分数
+    """
+    total = 0
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinitionNode):
+            if definition.operation.value == "mutation":
+                total += COMPLEXITY_WEIGHTS["mutation"]
+            total += _selection_set_complexity(definition.selection_set)
+    return total
+
+
+def merge_results(parts: List[Any]) -> Any:
+    """
+    艹！把拆开执行的几份 data 合并成一份（对象按 key 深度合并，等长列表逐个元素合并）
+
+    Args:
+        parts: 每个子请求的 data
+
+    Returns:
+        合并后的 data
+    """
+    merged: Any = None
+    for part in parts:
+        merged = _merge(merged, part)
+    return merged
+
+
+def _merge(left: Any, right: Any) -> Any:
+    if isinstance(left, dict) and isinstance(right, dict):
+        result = dict(left)
+        for key, value in right.items():
+            result[key] = _merge(result[key], value) if key in result else value
+        return result
+    if isinstance(left, list) and isinstance(right, list) and len(left) == len(right):
+        return [_merge(a, b) for a, b in zip(left, right)]
+    return right if right is not None else left
+
+
+class _UsageVisitor(Visitor if HAS_GRAPHQL else object):
+    """收集一段 AST 里用到的变量名和片段名"""
+
+    def __init__(self):
+        super().__init__()
+        self.variables: Set[str] = set()
+        self.fragments: Set[str] = set()
+
+    def enter_variable(self, node, *_):
+        self.variables.add(node.name.value)
+
+    def enter_fragment_spread(self, node, *_):
+        self.fragments.add(node.name.value)
+
+
+def _usage(nodes: List[Any], fragments: Dict[str, Any]) -> Tuple[Set[str], List[Any]]:
+    """一组选择用到的变量名，以及（递归）用到的片段定义"""
+    visitor = _UsageVisitor()
+    for node in nodes:
+        visit(node, visitor)
+    seen: Set[str] = set()
+    pending = list(visitor.fragments)
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in fragments:
+            continue
+        seen.add(name)
+        before = set(visitor.fragments)
+        visit(fragments[name], visitor)
+        pending.extend(visitor.fragments - before)
+    return visitor.variables, [fragments[name] for name in fragments if name in seen]
+
+
+@dataclass
+class ComplexityConfig:
+    """
+    查询复杂度配置
+
+    老王的参数说明：
+    - tier: 订阅层级（free / basic / pro / max / admin），和 max_complexity 二选一
+    - max_complexity: 显式的复杂度上限
+    - split: 超限的查询是否自动按顶层字段拆开（默认 True；False 时超限直接报错）
+    - cache_size: 分数缓存的文档数（默认 512）
+    """
+    tier: Optional[str] = None
+    max_complexity: Optional[int] = None
+    split: bool = True
+    cache_size: int = 512
+
+    def __post_init__(self):
+        """老王的参数验证"""
+        if (self.tier is None) == (self.max_complexity is None):
+            raise ValueError("艹，tier 和 max_complexity 必须二选一！")
+        if self.tier is not None and self.tier not in COMPLEXITY_LIMITS:
+            raise ValueError(f"艹，tier 必须是 {' / '.join(COMPLEXITY_LIMITS)} 之一！")
+        if self.max_complexity is not None and self.max_complexity < 1:
+            raise ValueError("艹，max_complexity 必须 >= 1！")
+        if self.cache_size < 0:
+            raise ValueError("艹，cache_size 必须 >= 0！")
+
+    @property
+    def limit(self) -> int:
+        """复杂度上限"""
+        return self.max_complexity if self.tier is None else COMPLEXITY_LIMITS[self.tier]
+
+
+@dataclass
+class ComplexityStats:
+    """
+    查询复杂度统计
+
+    - scored: 实际计算分数的次数（缓存未命中）
+    - cache_hits: 分数缓存命中次数
+    - split: 被拆开的查询数
+    - parts: 拆出来的子请求数
+    - rejected: 本地直接拒绝的请求数
+    """
+    scored: int = 0
+    cache_hits: int = 0
+    split: int = 0
+    parts: int = 0
+    rejected: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典格式"""
+        return {
+            "scored": self.scored,
+            "cache_hits": self.cache_hits,
+            "split": self.split,
+            "parts": self.parts,
+            "rejected": self.rejected,
+        }
+
+
+class ComplexityEstimator:
+    """
+    艹！发送前的复杂度检查器（线程安全）
+
+    使用示例:
+        estimator = ComplexityEstimator(ComplexityConfig(tier="free"))
+        estimator.score(QUERY)               # 分数（同一段文本只算一次）
+        estimator.plan(QUERY, variables)     # None 表示不用拆；否则是 [(子查询文本, 子查询变量), ...]
+
+    一般不用自己调：配置了 GraphQLSDKConfig.complexity，query() / mutate() 会自动检查、拆分、合并。
+    """
+
+    def __init__(self, config: ComplexityConfig):
+        """
+        初始化检查器
+
+        Args:
+            config: 复杂度配置
+        """
+        if not HAS_GRAPHQL:
+            raise ImportError("艹！graphql-core 没有安装！运行: pip install gql[requests,aiohttp]")
+
+        self.config = config
+        self.limit = config.limit
+
+        self._scores: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = ComplexityStats()
+
+    def score(self, text: str) -> int:
+        """
+        艹！算一段查询文本的复杂度（走 LRU 缓存）
+
+        Args:
+            text: 实际要发送的查询文本
+
+        Returns:
+            复杂度分数
+        """
+        with self._lock:
+            score = self._scores.get(text)
+            if score is not None:
+                self._scores.move_to_end(text)
+                self._stats.cache_hits += 1
+                return score
+
+        score = calculate_complexity(parse(text))
+        with self._lock:
+            self._stats.scored += 1
+            if self.config.cache_size > 0:
+                self._scores[text] = score
+                while len(self._scores) > self.config.cache_size:
+                    self._scores.popitem(last=False)
+        return score
+
+    def plan(
+        self,
+        text: str,
+        variables: Optional[Dict[str, Any]] = None,
+        sent_text: Optional[str] = None,
+    ) -> Optional[List[Tuple[str, Optional[Dict[str, Any]]]]]:
+        """
+        艹！检查一个请求，超限时给出拆分方案
+
+        拆分按顶层字段装箱（大的先放，放得下就放进已有的子查询），每个子查询只带自己用到的变量和片段，
+        字段顺序不变。拆出来的子查询发送前还会再检查一次（比如规范化缓存补了 __typename 又超了就接着拆）。
+
+        Args:
+            text: 原始查询文本（拆分的对象）
+            variables: 变量
+            sent_text: 实际发送的文本（规范化缓存会补 __typename，按它打分；默认就是 text）
+
+        Returns:
+            None 表示不超限；否则是 [(子查询文本, 子查询变量), ...]
+
+        Raises:
+            GraphQLSDKError: 超限且拆不动（变更、多个操作、单个顶层字段就超限、split=False）
+        """
+        score = self.score(sent_text or text)
+        if score <= self.limit:
+            return None
+
+        document = parse(text)
+        operations = [d for d in document.definitions if isinstance(d, OperationDefinitionNode)]
+        operation = operations[0] if len(operations) == 1 else None
+        if not self.config.split or operation is None or operation.operation.value != "query":
+            self._reject()
+            raise validation_error(
+                f"艹，复杂度 {score} 超过上限 {self.limit}！"
+                f"{'' if operation is None or operation.operation.value == 'query' else '变更不能拆，'}"
+                "请精简查询或者升级订阅层级。"
+            )
+
+        selections = list(operation.selection_set.selections)
+        scores = [selection_complexity(selection) for selection in selections]
+        if len(selections) < 2 or max(scores) > self.limit:
+            worst = selections[scores.index(max(scores))]
+            name = worst.name.value if hasattr(worst, "name") and worst.name else type(worst).__name__
+            self._reject()
+            raise validation_error(
+                f"艹，复杂度 {score} 超过上限 {self.limit}，而且顶层字段 {name} 自己就有 {max(scores)}，拆不动！"
+                "（first / limit 不影响服务端打分，只能少选字段或者升级订阅层级）"
+            )
+
+        # 大的先放，放得下就放进已有的箱子
+        bins: List[List[int]] = []
+        totals: List[int] = []
+        for index in sorted(range(len(selections)), key=lambda i: -scores[i]):
+            for slot, total in enumerate(totals):
+                if total + scores[index] <= self.limit:
+                    bins[slot].append(index)
+                    totals[slot] += scores[index]
+                    break
+            else:
+                bins.append([index])
+                totals.append(scores[index])
+
+        fragments = {d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)}
+        parts = []
+        for indexes in bins:
+            chosen = [selections[i] for i in sorted(indexes)]
+            used_variables, used_fragments = _usage(chosen + list(operation.directives or []), fragments)
+            part = OperationDefinitionNode(
+                operation=operation.operation,
+                name=operation.name,
+                directives=operation.directives,
+                variable_definitions=tuple(
+                    d for d in operation.variable_definitions or () if d.variable.name.value in used_variables
+                ),
+                selection_set=SelectionSetNode(selections=tuple(chosen)),
+            )
+            part_variables = None
+            if variables is not None:
+                part_variables = {k: v for k, v in variables.items() if k in used_variables}
+            parts.append((print_ast(DocumentNode(definitions=(part, *used_fragments))), part_variables))
+
+        with self._lock:
+            self._stats.split += 1
+            self._stats.parts += len(parts)
+        return parts
+
+    def _reject(self):
+        with self._lock:
+            self._stats.rejected += 1
+
+    def stats(self) -> ComplexityStats:
+        """获取统计快照"""
+        with self._lock:
+            return ComplexityStats(**self._stats.to_dict())
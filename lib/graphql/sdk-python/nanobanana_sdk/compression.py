@@ -0,0 +1,223 @@
+"""
+艹！Nano Banana GraphQL SDK 请求/响应压缩模块
+
+长 prompt 的变更、CreateBlogPostInput 的正文、artworks(limit: 100) 的大列表，
+原样在网络上跑太tm浪费带宽了！这个SB模块负责：
+- 请求体超过阈值时用 gzip / brotli / zstd 压缩（带 Content-Encoding）
+- 告诉服务端我们能解哪些响应编码（Accept-Encoding，由各个传输按自己的 HTTP 库决定）
+- 按操作统计省下的字节数和压缩花的时间
+
+brotli / zstd 是可选依赖：pip install nanobanana-sdk[compression]
+"""
+
+import gzip
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# 支持的请求体压缩算法（Content-Encoding 的值）
+ALGORITHMS = ("gzip", "deflate", "br", "zstd")
+
+# 每种算法的默认压缩等级：JSON 压缩率够高了，等级开太高只是白白烧 CPU
+DEFAULT_LEVELS = {"gzip": 6, "deflate": 6, "br": 5, "zstd": 3}
+
+
+@dataclass
+class CompressionConfig:
+    """
+    压缩配置
+
+    老王的参数说明：
+    - algorithm: 请求体压缩算法（gzip / deflate / br / zstd，默认 gzip）
+    - threshold: 请求体超过多少字节才压缩（默认 1024，小请求压缩反而更慢）
+    - level: 压缩等级（可选，默认按算法取一个偏快的等级）
+    - accept_encoding: 是否显式协商响应压缩（默认 True）
+    """
+    algorithm: str = "gzip"
+    threshold: int = 1024
+    level: Optional[int] = None
+    accept_encoding: bool = True
+
+    def __post_init__(self):
+        """老王的参数验证"""
+        if self.algorithm not in ALGORITHMS:
+            raise ValueError(f"艹，algorithm 必须是 {', '.join(ALGORITHMS)} 之一！")
+        if self.threshold < 0:
+            raise ValueError("艹，threshold 必须 >= 0！")
+        if self.algorithm == "br" and not HAS_BROTLI:
+            raise ImportError("艹！brotli 没有安装！运行: pip install brotli")
+        if self.algorithm == "zstd" and not HAS_ZSTD:
+            raise ImportError("艹！zstandard 没有安装！运行: pip install zstandard")
+
+
+def compress(data: bytes, algorithm: str = "gzip", level: Optional[int] = None) -> bytes:
+    """
+    艹！压缩字节串
+
+    Args:
+        data: 原始数据
+        algorithm: gzip / deflate / br / zstd
+        level: 压缩等级（可选）
+
+    Returns:
+        压缩后的数据
+    """
+    level = DEFAULT_LEVELS[algorithm] if level is None else level
+    if algorithm == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if algorithm == "deflate":
+        return zlib.compress(data, level)
+    if algorithm == "br":
+        return brotli.compress(data, quality=level)
+    if algorithm == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"艹，不支持的压缩算法: {algorithm}")
+
+
+@dataclass
+class CompressionStats:
+    """
+    单个操作的压缩统计
+
+    - requests: 请求数
+    - compressed: 请求体被压缩的请求数
+    - request_bytes: 请求体原始字节数
+    - sent_bytes: 请求体实际发送字节数
+    - compress_ms: 压缩花的时间（毫秒）
+    - response_wire_bytes: 压缩响应在网络上的字节数
+    - response_bytes: 压缩响应解压后的字节数
+    """
+    requests: int = 0
+    compressed: int = 0
+    request_bytes: int = 0
+    sent_bytes: int = 0
+    compress_ms: float = 0.0
+    response_wire_bytes: int = 0
+    response_bytes: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        """请求和响应一共省下的字节数"""
+        return (self.request_bytes - self.sent_bytes) + (self.response_bytes - self.response_wire_bytes)
+
+    def to_dict(self) -> Dict[str, float]:
+        """转换为字典格式"""
+        return {
+            "requests": self.requests,
+            "compressed": self.compressed,
+            "request_bytes": self.request_bytes,
+            "sent_bytes": self.sent_bytes,
+            "compress_ms": round(self.compress_ms, 3),
+            "response_wire_bytes": self.response_wire_bytes,
+            "response_bytes": self.response_bytes,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class RequestCompressor:
+    """
+    艹！请求体压缩器（线程安全，同步和异步传输共用一个）
+
+    - encode(): 超过阈值就压缩并加上 Content-Encoding
+    - record_response(): 记录压缩响应的网络字节数和解压后的字节数
+    - stats(): 按操作名汇总的统计
+    """
+
+    def __init__(self, config: Optional[CompressionConfig] = None):
+        """
+        初始化压缩器
+
+        Args:
+            config: 压缩配置（可选，默认 gzip + 1KB 阈值）
+        """
+        self.config = config or CompressionConfig()
+        self._stats: Dict[str, CompressionStats] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, operation: Optional[str]) -> CompressionStats:
+        """取出（或新建）一个操作的统计，调用方必须持有锁"""
+        name = operation or "Anonymous"
+        entry = self._stats.get(name)
+        if entry is None:
+            entry = self._stats[name] = CompressionStats()
+        return entry
+
+    def encode(
+        self,
+        data: bytes,
+        headers: Optional[Dict[str, str]],
+        operation: Optional[str] = None,
+    ) -> Tuple[bytes, Dict[str, str]]:
+        """
+        艹！按需压缩请求体
+
+        Args:
+            data: JSON 编码后的请求体
+            headers: 本次请求的请求头
+            operation: 操作名（用于统计）
+
+        Returns:
+            (要发送的数据, 要发送的请求头)
+        """
+        headers = dict(headers or {})
+        compressed = None
+        elapsed_ms = 0.0
+        if len(data) >= self.config.threshold:
+            start = time.perf_counter()
+            compressed = compress(data, self.config.algorithm, self.config.level)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if len(compressed) >= len(data):
+                # 压完反而更大（比如已经是随机数据），直接发原文
+                compressed = None
+
+        with self._lock:
+            entry = self._entry(operation)
+            entry.requests += 1
+            entry.request_bytes += len(data)
+            entry.compress_ms += elapsed_ms
+            if compressed is not None:
+                entry.compressed += 1
+                entry.sent_bytes += len(compressed)
+            else:
+                entry.sent_bytes += len(data)
+
+        if compressed is None:
+            return data, headers
+        headers["Content-Encoding"] = self.config.algorithm
+        return compressed, headers
+
+    def record_response(self, operation: Optional[str], wire_bytes: int, decoded_bytes: int):
+        """
+        记录一个压缩响应
+
+        Args:
+            operation: 操作名
+            wire_bytes: 网络上传输的字节数
+            decoded_bytes: 解压后的字节数
+        """
+        with self._lock:
+            entry = self._entry(operation)
+            entry.response_wire_bytes += wire_bytes
+            entry.response_bytes += decoded_bytes
+
+    def stats(self) -> Dict[str, CompressionStats]:
+        """获取按操作名汇总的统计快照"""
+        with self._lock:
+            return {name: CompressionStats(**{
+                k: v for k, v in entry.__dict__.items()
+            }) for name, entry in self._stats.items()}
+
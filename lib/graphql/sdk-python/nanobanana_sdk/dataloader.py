@@ -0,0 +1,286 @@
+"""
+艹！Nano Banana GraphQL SDK 客户端 DataLoader 模块
+
+服务端 lib/graphql/dataloaders.ts 的客户端镜像：
+同一个事件循环 tick 里的 load() 调用会被收集起来，改写成一个带别名的操作，
+
+    query Loader_artwork($k0_id: ID!, $k0_type: String!, $k1_id: ID!, ...) {
+        a0: artwork(id: $k0_id, type: $k0_type) { id ... }
+        a1: artwork(id: $k1_id, type: $k1_type) { id ... }
+    }
+
+重复的 key 只查一次，结果再分发回各个调用方。扇出型代码的请求数能降好几个数量级！
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .errors import GraphQLSDKError
+
+if TYPE_CHECKING:
+    from .client import GraphQLSDK
+
+
+@dataclass(frozen=True)
+class LoaderSpec:
+    """
+    按 ID 查询字段的描述
+
+    - field: Query 上的字段名（例如 artwork）
+    - args: 参数名 → GraphQL 类型（第一个参数就是 load() 的 key）
+    - selection: 默认选择集
+    """
+    field: str
+    args: Dict[str, str]
+    selection: str = "id"
+
+    @property
+    def key_arg(self) -> str:
+        """load(key) 的 key 对应的参数名"""
+        return next(iter(self.args))
+
+
+# 内置的按 ID 查询字段（和 schema.graphql 保持一致）
+BUILTIN_LOADERS: Dict[str, LoaderSpec] = {
+    "artwork": LoaderSpec(
+        field="artwork",
+        args={"id": "ID!", "type": "String!"},
+        selection="id artworkType prompt url thumbnailUrl status userId likeCount viewCount createdAt",
+    ),
+    "blogPost": LoaderSpec(
+        field="blogPost",
+        args={"id": "ID!"},
+        selection="id title slug excerpt status userId likeCount viewCount publishedAt createdAt",
+    ),
+    "video": LoaderSpec(
+        field="video",
+        args={"id": "ID!"},
+        selection="id status prompt duration resolution permanentVideoUrl thumbnailUrl userId createdAt",
+    ),
+    "user": LoaderSpec(
+        field="user",
+        args={"id": "ID!"},
+        selection="id displayName avatarUrl bio artworkCount followerCount createdAt",
+    ),
+}
+
+
+@dataclass
+class LoaderStats:
+    """
+    DataLoader 统计
+
+    - loads: load() 调用次数
+    - deduped: 因为 key 重复（或命中缓存）没有单独查询的次数
+    - batches: 实际发出的操作数
+    """
+    loads: int = 0
+    deduped: int = 0
+    batches: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典格式"""
+        return {"loads": self.loads, "deduped": self.deduped, "batches": self.batches}
+
+
+class DataLoader:
+    """
+    艹！客户端 DataLoader
+
+    一般通过 sdk.loader("artwork") 获取，同一个 SDK 上同名 loader 是同一个实例，
+    所以不同代码位置的 load() 也能合并到一个请求里。
+
+    使用示例:
+        loader = sdk.loader("user")
+        users = await asyncio.gather(*[loader.load(uid) for uid in user_ids])
+
+        artworks = sdk.loader("artwork")
+        art = await artworks.load("a1", type="image")
+    """
+
+    def __init__(
+        self,
+        sdk: "GraphQLSDK",
+        spec: LoaderSpec,
+        selection: Optional[str] = None,
+        max_batch_size: int = 100,
+        cache: bool = False,
+    ):
+        """
+        初始化 DataLoader
+
+        Args:
+            sdk: GraphQLSDK 实例（用 query_async 发请求）
+            spec: 字段描述
+            selection: 选择集（默认用 spec 里的）
+            max_batch_size: 单个操作最多合并的 key 数
+            cache: 是否缓存已加载的结果（默认只合并进行中的重复 key）
+        """
+        if max_batch_size < 1:
+            raise ValueError("艹，max_batch_size 必须 >= 1！")
+
+        self.sdk = sdk
+        self.spec = spec
+        self.selection = selection or spec.selection
+        self.max_batch_size = max_batch_size
+        self.cache = cache
+        self.stats = LoaderStats()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: List[Tuple[Hashable, Dict[str, Any]]] = []
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._dispatch_scheduled = False
+
+    @staticmethod
+    def _cache_key(args: Dict[str, Any]) -> Hashable:
+        """参数字典 → 可哈希的去重 key"""
+        return tuple(sorted((k, repr(v)) for k, v in args.items()))
+
+    def _bind_loop(self):
+        """绑定当前事件循环（换了事件循环就丢掉旧状态，Future 不能跨循环用）"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = []
+            self._futures = {}
+            self._dispatch_scheduled = False
+        return loop
+
+    def load(self, key: Any, **args: Any) -> "asyncio.Future":
+        """
+        艹！加载一个对象
+
+        Args:
+            key: 第一个参数的值（通常是 id）
+            **args: 其他参数（例如 artwork 的 type="image"）
+
+        Returns:
+            awaitable，结果是对象字典（不存在时为 None）
+        """
+        loop = self._bind_loop()
+        call_args = {self.spec.key_arg: key, **args}
+        cache_key = self._cache_key(call_args)
+
+        self.stats.loads += 1
+        future = self._futures.get(cache_key)
+        if future is not None:
+            self.stats.deduped += 1
+            return future
+
+        future = loop.create_future()
+        self._futures[cache_key] = future
+        self._queue.append((cache_key, call_args))
+
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            # 等这一轮已经就绪的协程都跑完（它们的 load() 都会进队列）再发请求
+            loop.call_soon(self._dispatch)
+
+        return future
+
+    async def load_many(self, keys: Iterable[Any], **args: Any) -> List[Any]:
+        """
+        艹！批量加载
+
+        Args:
+            keys: key 列表
+            **args: 所有 key 共用的其他参数
+
+        Returns:
+            和 keys 顺序一致的结果列表
+        """
+        return list(await asyncio.gather(*[self.load(key, **args) for key in keys]))
+
+    def clear(self, key: Any, **args: Any):
+        """清除一个 key 的缓存"""
+        cache_key = self._cache_key({self.spec.key_arg: key, **args})
+        future = self._futures.get(cache_key)
+        if future is not None and future.done():
+            del self._futures[cache_key]
+
+    def clear_all(self):
+        """清除所有已完成的缓存"""
+        self._futures = {k: f for k, f in self._futures.items() if not f.done()}
+
+    def _dispatch(self):
+        """把队列里的 key 切块，每块发一个带别名的操作"""
+        self._dispatch_scheduled = False
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self.max_batch_size):
+            self._loop.create_task(self._load_chunk(queue[start:start + self.max_batch_size]))
+
+    def build_operation(self, chunk: List[Tuple[Hashable, Dict[str, Any]]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        艹！把一块 key 改写成一个带别名的操作
+
+        参数全部走变量，不往查询文本里拼值（防注入，而且同样大小的块查询文本相同，能命中文档缓存）
+
+        Returns:
+            (查询文本, 变量)
+        """
+        definitions: List[str] = []
+        selections: List[str] = []
+        variables: Dict[str, Any] = {}
+
+        for i, (_, call_args) in enumerate(chunk):
+            arg_refs: List[str] = []
+            for name, value in call_args.items():
+                var_name = f"k{i}_{name}"
+                var_type = self.spec.args.get(name, "String")
+                definitions.append(f"${var_name}: {var_type}")
+                arg_refs.append(f"{name}: ${var_name}")
+                variables[var_name] = value
+            selections.append(
+                f"a{i}: {self.spec.field}({', '.join(arg_refs)}) {{ {self.selection} }}"
+            )
+
+        query = (
+            f"query Loader_{self.spec.field}({', '.join(definitions)}) {{ "
+            + " ".join(selections)
+            + " }"
+        )
+        return query, variables
+
+    async def _load_chunk(self, chunk: List[Tuple[Hashable, Dict[str, Any]]]):
+        """发送一块并把结果分发给各个 Future"""
+        query, variables = self.build_operation(chunk)
+        self.stats.batches += 1
+
+        data: Dict[str, Any] = {}
+        alias_errors: Dict[str, GraphQLSDKError] = {}
+        batch_error: Optional[GraphQLSDKError] = None
+
+        try:
+            data = await self.sdk.query_async(
+                query, variables, operation_name=f"Loader:{self.spec.field}[{len(chunk)}]"
+            ) or {}
+        except GraphQLSDKError as e:
+            partial = getattr(e.original_error, "data", None)
+            if isinstance(partial, dict) and e.graphql_errors:
+                # 部分成功：按错误 path 的第一段（别名）把错误分给对应的 key
+                data = partial
+                for gql_error in e.graphql_errors:
+                    path = gql_error.get("path") or []
+                    if path:
+                        alias_errors[str(path[0])] = e
+                if not alias_errors:
+                    batch_error = e
+            else:
+                batch_error = e
+        except Exception as e:  # 理论上 query_async 只抛 GraphQLSDKError
+            batch_error = e
+
+        for i, (cache_key, _) in enumerate(chunk):
+            future = self._futures.get(cache_key)
+            if not self.cache or batch_error is not None or f"a{i}" in alias_errors:
+                self._futures.pop(cache_key, None)
+            if future is None or future.done():
+                continue
+
+            alias = f"a{i}"
+            error = batch_error or alias_errors.get(alias)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(data.get(alias))
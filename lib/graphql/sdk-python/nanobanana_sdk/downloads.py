@@ -0,0 +1,347 @@
+"""
+艹！Nano Banana GraphQL SDK 视频下载模块
+
+Video 上有 permanentVideoUrl / googleVideoUrl / fileSizeBytes，可下游脚本全是
+requests.get(url).content 一把读进内存再写盘，几百 MB 的 1080p 视频内存直接爆，
+断一次网就从头再来。这个SB模块提供：
+- 流式写盘：边收边写，内存里最多一个读缓冲（chunk_size）
+- 断点续传：先写到 <dest>.part，断了用 Range 接着下；下完才改名成 dest
+- 大文件并行分块：按 part_size 切成字节区间同时下载，每块下完记到 <dest>.part.json，崩了重跑只补没下完的块
+- 完整性校验：下完的大小必须等于 fileSizeBytes（没有就用服务端的 Content-Length）
+- 批量下载时，只有 Google 临时链接（2 天过期）的视频按创建时间排在最前面，已过期的直接报错
+"""
+
+import json
+import os
+import re
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .errors import GraphQLSDKError, network_error, parse_error, server_error, unknown_error, validation_error
+from .transport import parse_rest_result
+
+try:
+    import requests
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(?:(\d+)-(\d+)|\*)/(\d+|\*)")
+
+
+@dataclass
+class DownloadConfig:
+    """
+    视频下载配置
+
+    老王的参数说明：
+    - chunk_size: 每次从连接读多少字节写盘（默认 256KB，也是单个连接的内存上限）
+    - part_size: 并行下载时每块的大小（默认 8MB）
+    - parallel_threshold: 文件超过多大才并行分块下载（默认 32MB，服务端不支持 Range 时始终单流）
+    - max_parts_in_flight: 单个文件同时下载的块数（默认 4）
+    - max_attempts: 连接断开 / 超时后最多尝试几次（每次都从断开的位置接着下，默认 3）
+    - timeout: 建连和两次读之间的超时（秒，默认 60）
+    """
+    chunk_size: int = 256 * 1024
+    part_size: int = 8 * 1024 * 1024
+    parallel_threshold: int = 32 * 1024 * 1024
+    max_parts_in_flight: int = 4
+    max_attempts: int = 3
+    timeout: float = 60.0
+
+    def __post_init__(self):
+        """老王的参数验证"""
+        if self.chunk_size < 1 or self.part_size < 1:
+            raise ValueError("艹，chunk_size / part_size 必须 >= 1！")
+        if self.parallel_threshold < 0:
+            raise ValueError("艹，parallel_threshold 必须 >= 0！")
+        if self.max_parts_in_flight < 1:
+            raise ValueError("艹，max_parts_in_flight 必须 >= 1！")
+        if self.max_attempts < 1:
+            raise ValueError("艹，max_attempts 必须 >= 1！")
+        if self.timeout <= 0:
+            raise ValueError("艹，timeout 必须 > 0！")
+
+
+@dataclass
+class DownloadResult:
+    """
+    一个视频的下载结果
+
+    - video_id: 视频 ID
+    - path: 下载到的文件路径
+    - size: 文件大小（字节）
+    - downloaded: 这次实际从网络收了多少字节（续传时小于 size）
+    - source: 用的哪个地址（permanent / google）
+    - parts: 分了几块下载（1 表示单流）
+    - resumed: 是否接着之前没下完的文件续传
+    - skipped: 目标文件已经完整存在，没有下载
+    """
+    video_id: Optional[str]
+    path: str
+    size: int = 0
+    downloaded: int = 0
+    source: str = "permanent"
+    parts: int = 1
+    resumed: bool = False
+    skipped: bool = False
+
+
+def pick_source(video: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    艹！选下载地址：优先永久地址，没有才用 Google 临时地址
+
+    Args:
+        video: Video 字典（permanentVideoUrl / googleVideoUrl / isExpired）
+
+    Returns:
+        (url, "permanent" / "google")
+    """
+    if video.get("permanentVideoUrl"):
+        return video["permanentVideoUrl"], "permanent"
+    if video.get("googleVideoUrl"):
+        if video.get("isExpired"):
+            raise validation_error(f"艹！视频 {video.get('id')} 的 Google 临时链接已经过期，又没有永久地址")
+        return video["googleVideoUrl"], "google"
+    raise validation_error(f"艹！视频 {video.get('id')} 没有可下载的地址（查询里选上 permanentVideoUrl / googleVideoUrl）")
+
+
+def download_order(videos: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    艹！批量下载的顺序：只有 Google 临时链接（还没过期）的排最前面（越早创建越先过期），其余保持原顺序
+
+    Args:
+        videos: Video 字典列表
+
+    Returns:
+        排好序的列表
+    """
+    def key(item: Tuple[int, Dict[str, Any]]):
+        index, video = item
+        expiring = (
+            not video.get("permanentVideoUrl") and bool(video.get("googleVideoUrl")) and not video.get("isExpired")
+        )
+        return (0, video.get("createdAt") or "", index) if expiring else (1, "", index)
+
+    return [video for _, video in sorted(enumerate(videos), key=key)]
+
+
+def _parse_content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Content-Range: bytes 100-199/1000 → (100, 1000)；bytes */1000 → (None, 1000)"""
+    m = _CONTENT_RANGE.match(value or "")
+    if m is None:
+        return None, None
+    start = int(m.group(1)) if m.group(1) is not None else None
+    total = int(m.group(3)) if m.group(3) != "*" else None
+    return start, total
+
+
+class VideoDownloader:
+    """
+    艹！单个视频的下载器（sdk.download_video() 内部用）
+
+    用 SDK 同步传输的共享会话（线程安全连接池），批量下载和并行分块都在线程里跑。
+    视频地址是 CDN / Google 的，不会带上 SDK 的 Authorization 请求头。
+    """
+
+    def __init__(self, session: "requests.Session", config: Optional[DownloadConfig] = None, verify: bool = True):
+        """
+        初始化下载器
+
+        Args:
+            session: requests 会话
+            config: 下载配置（可选）
+            verify: 是否校验 TLS 证书
+        """
+        if not HAS_REQUESTS:
+            raise ImportError("艹！requests 没有安装！运行: pip install requests")
+
+        self.session = session
+        self.config = config or DownloadConfig()
+        self.verify = verify
+        self.headers = {"User-Agent": "NanoBanana-SDK-Python/1.0"}
+
+    def download(self, video: Dict[str, Any], dest: str) -> DownloadResult:
+        """
+        艹！下载一个视频到 dest（dest 是目录时存成 <dir>/<id>.mp4）
+
+        Args:
+            video: Video 字典（至少要有 permanentVideoUrl 或 googleVideoUrl，最好有 id / fileSizeBytes）
+            dest: 目标文件或目录
+
+        Returns:
+            DownloadResult
+        """
+        url, source = pick_source(video)
+        if os.path.isdir(dest):
+            dest = os.path.join(dest, f"{video.get('id') or os.path.basename(url.split('?')[0])}.mp4")
+        expected = video.get("fileSizeBytes")
+        result = DownloadResult(video_id=video.get("id"), path=dest, source=source)
+
+        try:
+            if expected is not None and os.path.exists(dest) and os.path.getsize(dest) == expected:
+                result.size, result.skipped = expected, True
+                return result
+
+            part_path = dest + ".part"
+            total, ranges = expected, False
+            if expected is None or expected >= self.config.parallel_threshold:
+                total, ranges = self._probe(url, expected)
+
+            if ranges and total is not None and total >= self.config.parallel_threshold:
+                self._parallel(url, part_path, total, result)
+            else:
+                self._stream(url, part_path, total, result)
+
+            result.size = os.path.getsize(part_path)
+            if total is not None and result.size != total:
+                self._discard(part_path)
+                self._discard(part_path + ".json")
+                raise server_error(
+                    f"艹！视频 {result.video_id} 下载完是 {result.size} 字节，应该是 {total} 字节，文件已删除"
+                )
+            os.replace(part_path, dest)
+            return result
+        except GraphQLSDKError:
+            raise
+        except requests.RequestException as e:
+            raise network_error(f"艹！下载视频 {result.video_id} 失败: {e}", e)
+        except OSError as e:
+            # 磁盘满、没权限、os.replace 失败：本地的问题，别按响应内容分类（重试也没用）
+            raise unknown_error(f"艹！视频 {result.video_id} 写入本地文件失败（{dest}）: {e}", e)
+        except Exception as e:
+            raise parse_error(e, "DownloadVideo")
+
+    def _get(self, url: str, headers: Optional[Dict[str, str]] = None) -> "requests.Response":
+        return self.session.get(
+            url, headers={**self.headers, **(headers or {})}, stream=True,
+            timeout=self.config.timeout, verify=self.verify,
+        )
+
+    def _probe(self, url: str, expected: Optional[int]) -> Tuple[Optional[int], bool]:
+        """HEAD 一下：拿文件大小（没有 fileSizeBytes 时）和是否支持 Range"""
+        resp = self.session.head(
+            url, headers=self.headers, timeout=self.config.timeout, verify=self.verify, allow_redirects=True
+        )
+        if resp.status_code >= 400:
+            return expected, False  # 有的 CDN 不让 HEAD，老老实实单流下
+        length = resp.headers.get("Content-Length")
+        total = expected if expected is not None else (int(length) if length and length.isdigit() else None)
+        return total, resp.headers.get("Accept-Ranges", "").lower() == "bytes"
+
+    def _stream(self, url: str, part_path: str, total: Optional[int], result: DownloadResult):
+        """单流下载：.part 已经有内容就用 Range 接着下，断了再接着下"""
+        attempts = 0
+        while True:
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if total is not None and offset >= total:
+                if offset > total:
+                    self._discard(part_path)  # 比应有的还大，肯定不对，重来
+                    continue
+                return
+
+            try:
+                with self._get(url, {"Range": f"bytes={offset}-"} if offset else None) as resp:
+                    if resp.status_code == 416 and offset:
+                        _, actual = _parse_content_range(resp.headers.get("Content-Range"))
+                        if actual == offset:
+                            return  # 上次其实已经下完了
+                        self._discard(part_path)
+                        continue
+                    parse_rest_result(resp.status_code, None, resp.reason or "")
+
+                    if offset and resp.status_code != 206:
+                        offset = 0  # 服务端不认 Range，只能从头来
+                    elif offset:
+                        result.resumed = True
+                    if total is None:
+                        _, total = _parse_content_range(resp.headers.get("Content-Range"))
+                        length = resp.headers.get("Content-Length")
+                        if total is None and length and length.isdigit():
+                            total = offset + int(length)
+
+                    with open(part_path, "r+b" if offset else "wb") as f:
+                        f.seek(offset)
+                        f.truncate()
+                        for chunk in resp.iter_content(self.config.chunk_size):
+                            f.write(chunk)
+                            result.downloaded += len(chunk)
+                if total is None or os.path.getsize(part_path) >= total:
+                    return
+                raise requests.ConnectionError("连接提前结束")
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                attempts += 1
+                if attempts >= self.config.max_attempts:
+                    raise network_error(f"艹！下载视频 {result.video_id} 失败，试了 {attempts} 次: {e}", e)
+
+    def _parallel(self, url: str, part_path: str, total: int, result: DownloadResult):
+        """并行分块下载：每块下完记进 .part.json，重跑时只补没下完的块"""
+        state_path = part_path + ".json"
+        done: Set[int] = set()
+        if os.path.exists(part_path) and os.path.getsize(part_path) == total and os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            if state.get("total") == total and state.get("part_size") == self.config.part_size:
+                done = set(state.get("done", []))
+        if not done:
+            with open(part_path, "wb") as f:
+                f.truncate(total)  # 先占好位置，每块写自己的区间
+
+        part_size = self.config.part_size
+        parts = [(i, start, min(start + part_size, total) - 1) for i, start in enumerate(range(0, total, part_size))]
+        result.parts = len(parts)
+        result.resumed = bool(done)
+
+        lock = threading.Lock()
+
+        def fetch(index: int, start: int, end: int):
+            received = self._fetch_range(url, part_path, start, end, result)
+            with lock:
+                result.downloaded += received
+                done.add(index)
+                with open(state_path, "w") as f:
+                    json.dump({"total": total, "part_size": part_size, "done": sorted(done)}, f)
+
+        todo = [part for part in parts if part[0] not in done]
+        with ThreadPoolExecutor(max_workers=self.config.max_parts_in_flight, thread_name_prefix="nanobanana-download") as pool:
+            futures = [pool.submit(fetch, *part) for part in todo]
+            finished, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in finished:
+                future.result()  # 有块失败就抛出来（已经下完的块记在 .part.json 里，下次接着下）
+
+        self._discard(state_path)
+
+    def _fetch_range(self, url: str, part_path: str, start: int, end: int, result: DownloadResult) -> int:
+        """下载一块（断了从这块已经收到的位置接着下）"""
+        received = 0
+        attempts = 0
+        while start + received <= end:
+            try:
+                with self._get(url, {"Range": f"bytes={start + received}-{end}"}) as resp:
+                    parse_rest_result(resp.status_code, None, resp.reason or "")
+                    if resp.status_code != 206:
+                        raise server_error("艹！服务端说支持 Range，分块请求却没返回 206")
+                    with open(part_path, "r+b") as f:
+                        f.seek(start + received)
+                        for chunk in resp.iter_content(self.config.chunk_size):
+                            chunk = chunk[: end + 1 - start - received]
+                            f.write(chunk)
+                            received += len(chunk)
+                if start + received <= end:
+                    raise requests.ConnectionError("连接提前结束")
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                attempts += 1
+                if attempts >= self.config.max_attempts:
+                    raise network_error(f"艹！下载视频 {result.video_id} 的第 {start}-{end} 字节失败: {e}", e)
+        return received
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
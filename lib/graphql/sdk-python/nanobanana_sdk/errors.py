@@ -5,7 +5,9 @@
 """
 
 from enum import Enum
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Mapping
+
+from .rate_limit import RateLimitInfo
 
 
 class GraphQLErrorType(str, Enum):
@@ -46,6 +48,7 @@ class GraphQLSDKError(Exception):
         extensions: Optional[Dict[str, Any]] = None,
         operation_name: Optional[str] = None,
         variables: Optional[Dict[str, Any]] = None,
+        response_headers: Optional[Mapping[str, str]] = None,
     ):
         """
         初始化 GraphQL SDK 错误
@@ -58,6 +61,7 @@ class GraphQLSDKError(Exception):
             extensions: 错误扩展信息
             operation_name: 操作名称（哪个查询/变更出错了）
             variables: 变量（用于调试）
+            response_headers: 出错响应的响应头（Retry-After / X-RateLimit-* 都在这里）
         """
         super().__init__(message)
         self.error_type = error_type
@@ -67,6 +71,7 @@ class GraphQLSDKError(Exception):
         self.extensions = extensions or {}
         self.operation_name = operation_name
         self.variables = variables
+        self.response_headers: Dict[str, str] = dict(response_headers or {})
 
     def __str__(self) -> str:
         """老王风格的错误信息"""
@@ -102,6 +107,15 @@ class GraphQLSDKError(Exception):
             GraphQLErrorType.SERVER_ERROR,
         ]
 
+    @property
+    def rate_limit(self) -> RateLimitInfo:
+        """
+        响应头里的限流信息
+
+        rate_limit.wait 就是服务端要求等待的秒数（Retry-After，或者配额用完时到窗口重置），没说就是 None
+        """
+        return RateLimitInfo.from_headers(self.response_headers)
+
     def to_dict(self) -> Dict[str, Any]:
         """
         转换为字典格式（方便序列化）
@@ -115,6 +129,7 @@ class GraphQLSDKError(Exception):
             "operation_name": self.operation_name,
             "graphql_errors": self.graphql_errors,
             "extensions": self.extensions,
+            "response_headers": self.response_headers,
             "is_retryable": self.is_retryable(),
         }
 
@@ -231,6 +246,7 @@ def parse_error(
         extensions=extensions,
         operation_name=operation_name,
         variables=variables,
+        response_headers=getattr(error, "response_headers", None),
     )
 
 
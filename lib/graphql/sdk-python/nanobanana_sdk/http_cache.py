@@ -0,0 +1,155 @@
+"""
+艹！Nano Banana GraphQL SDK HTTP 条件请求缓存模块
+
+publicArtworks / featuredArtworks / blogPosts / leaderboard 这种公开、读多写少的字段，
+一直 POST 的话 CDN 和中间代理根本没法缓存！这个SB模块提供：
+- build_get_url(): 把操作（或者 APQ 哈希）编码进 URL，走 GET
+- HTTPResponseStore: 本地响应存储，记住 ETag / Last-Modified 和解析好的 data，
+  下次带 If-None-Match / If-Modified-Since 重新验证，304 时既不传 body 也不解码 JSON
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+from urllib.parse import urlencode
+
+
+def build_get_url(url: str, payload: Dict[str, Any]) -> str:
+    """
+    艹！把请求体编码成 GET URL（GraphQL over HTTP 规范的格式）
+
+    query / operationName 直接作为参数，variables / extensions 序列化成 JSON。
+    序列化时 key 排序、去掉多余空格，同样的请求永远生成同样的 URL，CDN 才能命中。
+
+    Args:
+        url: GraphQL 端点
+        payload: 请求体（见 build_payload / PersistedQueryRegistry.build_payload）
+
+    Returns:
+        完整的 GET URL
+    """
+    params = []
+    for name in ("query", "operationName", "variables", "extensions"):
+        value = payload.get(name)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            value = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        params.append((name, value))
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}{urlencode(params)}"
+
+
+@dataclass
+class CachedResponse:
+    """
+    存储的一个响应
+
+    - etag / last_modified: 服务端返回的验证器
+    - data: 解析好的 data（304 时直接返回它）
+    - size: 原始响应体字节数（用于统计省下的流量）
+    """
+    etag: Optional[str]
+    last_modified: Optional[str]
+    data: Any
+    size: int = 0
+
+    def validator_headers(self) -> Dict[str, str]:
+        """重新验证用的条件请求头"""
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class HTTPCacheStats:
+    """
+    HTTP 条件请求统计
+
+    - requests: GET 请求数
+    - not_modified: 服务端返回 304 的次数
+    - stored: 当前存储的响应数
+    - bytes_saved: 因为 304 没有传输的响应体字节数
+    """
+    requests: int = 0
+    not_modified: int = 0
+    stored: int = 0
+    bytes_saved: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典格式"""
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "stored": self.stored,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class HTTPResponseStore:
+    """
+    艹！线程安全的本地响应存储（LRU）
+
+    key 是 (URL, 认证头)：同一个 URL 不同用户看到的结果可能不一样，必须分开存。
+    只有带 ETag 或 Last-Modified、而且没有 GraphQL 错误的响应才会被存下来。
+    """
+
+    def __init__(self, max_size: int = 256):
+        """
+        初始化响应存储
+
+        Args:
+            max_size: 最多存多少个响应
+        """
+        if max_size < 1:
+            raise ValueError("艹，max_size 必须 >= 1！")
+
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = HTTPCacheStats()
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """取出存储的响应（顺便记一次 GET 请求）"""
+        with self._lock:
+            self._stats.requests += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: CachedResponse):
+        """存储响应，超出容量时淘汰最久没用的"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        """删除一个响应（比如服务端不再返回验证器了）"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def record_not_modified(self, entry: CachedResponse):
+        """统计一次 304"""
+        with self._lock:
+            self._stats.not_modified += 1
+            self._stats.bytes_saved += entry.size
+
+    def clear(self):
+        """清空存储（统计计数不清零）"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> HTTPCacheStats:
+        """获取统计快照"""
+        with self._lock:
+            snapshot = HTTPCacheStats(**self._stats.to_dict())
+            snapshot.stored = len(self._entries)
+            return snapshot
@@ -5,10 +5,11 @@
 """
 
 import logging
-import json
 from typing import Any, Dict, Optional
 from datetime import datetime
 
+from .codec import JSONCodec, StdlibJSONCodec
+
 
 class SDKLogger:
     """
@@ -27,6 +28,7 @@ class SDKLogger:
         name: str = "nanobanana_sdk",
         level: int = logging.INFO,
         enable_logging: bool = True,
+        codec: Optional[JSONCodec] = None,
     ):
         """
         初始化日志记录器
@@ -35,10 +37,12 @@ class SDKLogger:
             name: 日志记录器名称
             level: 日志级别（DEBUG, INFO, WARNING, ERROR, CRITICAL）
             enable_logging: 是否启用日志（默认 True）
+            codec: 格式化日志数据用的 JSON 编解码器（可选，默认标准库 json）
         """
         self.logger = logging.getLogger(name)
         self.logger.setLevel(level)
         self.enable_logging = enable_logging
+        self.codec = codec or StdlibJSONCodec()
 
         # 如果没有 handler，添加一个控制台 handler
         if not self.logger.handlers:
@@ -64,7 +68,7 @@ class SDKLogger:
             格式化后的字符串
         """
         try:
-            return json.dumps(data, ensure_ascii=False, indent=2)
+            return self.codec.dumps(data, pretty=True).decode("utf-8")
         except Exception:
             return str(data)
 
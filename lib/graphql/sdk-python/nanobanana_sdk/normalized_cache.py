@@ -0,0 +1,518 @@
+"""
+艹！Nano Banana GraphQL SDK 规范化响应缓存模块
+
+User / Artwork / BlogPost / Video 这些对象被反复读取，每次都走网络太tm浪费了！
+这个SB模块实现一个 Apollo 风格的规范化缓存：
+- 响应里的对象按 `__typename:id` 拆开存储，不同查询共享同一份实体
+- 发送前自动给选择集补上 `__typename`（提供 schema 时还会补 `id`）
+- 再次查询时，如果所有请求的字段都在缓存里且没过期，直接从缓存返回
+- 按类型设置 TTL，超出内存预算时按 LRU 淘汰实体
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from graphql import (
+        FieldNode,
+        FragmentDefinitionNode,
+        FragmentSpreadNode,
+        InlineFragmentNode,
+        NameNode,
+        OperationDefinitionNode,
+        SelectionSetNode,
+        TypeInfo,
+        TypeInfoVisitor,
+        Visitor,
+        build_schema,
+        get_named_type,
+        print_ast,
+        value_from_ast_untyped,
+        visit,
+    )
+    HAS_GRAPHQL = True
+except ImportError:
+    HAS_GRAPHQL = False
+
+ROOT_QUERY = "ROOT_QUERY"
+
+
+@dataclass
+class NormalizedCacheConfig:
+    """
+    规范化缓存配置
+
+    老王的参数说明：
+    - default_ttl: 默认 TTL（秒，默认 60）
+    - type_ttls: 按类型覆盖 TTL，例如 {"User": 300, "Video": 10}；"Query" 控制根字段
+    - max_bytes: 内存预算（按 JSON 大小估算，默认 32MB），超出后按 LRU 淘汰实体
+    - schema: schema SDL 文本或 .graphql 文件路径（可选）。提供后会自动给有 id 字段的类型补上 id
+    """
+    default_ttl: float = 60.0
+    type_ttls: Dict[str, float] = field(default_factory=dict)
+    max_bytes: int = 32 * 1024 * 1024
+    schema: Optional[str] = None
+
+    def __post_init__(self):
+        """老王的参数验证"""
+        if self.default_ttl <= 0:
+            raise ValueError("艹，default_ttl 必须 > 0！")
+        if self.max_bytes <= 0:
+            raise ValueError("艹，max_bytes 必须 > 0！")
+        if any(ttl <= 0 for ttl in self.type_ttls.values()):
+            raise ValueError("艹，type_ttls 里的 TTL 必须 > 0！")
+
+    def ttl_for(self, typename: Optional[str]) -> float:
+        """获取某个类型的 TTL"""
+        return self.type_ttls.get(typename or "", self.default_ttl)
+
+
+@dataclass
+class NormalizedCacheStats:
+    """
+    规范化缓存统计
+
+    - hits: 完全从缓存返回的查询数
+    - misses: 需要走网络的查询数
+    - expired: 因为字段过期导致的未命中数（包含在 misses 里）
+    - writes: 写入缓存的响应数
+    - evictions: 因内存预算被淘汰的实体数
+    - entities: 当前实体数
+    - bytes: 当前估算占用字节数
+    """
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    writes: int = 0
+    evictions: int = 0
+    entities: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """命中率（0.0 - 1.0）"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entities": self.entities,
+            "bytes": self.bytes,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class _Miss(Exception):
+    """读缓存时缺字段（或过期）"""
+
+    def __init__(self, expired: bool = False):
+        super().__init__()
+        self.expired = expired
+
+
+@dataclass
+class _Entity:
+    """一个规范化实体（或 ROOT_QUERY）"""
+    typename: Optional[str]
+    fields: Dict[str, Any] = field(default_factory=dict)
+    expires: Dict[str, float] = field(default_factory=dict)
+    size: int = 0
+
+
+def _field_key(node: "FieldNode", variables: Optional[Dict[str, Any]]) -> str:
+    """
+    字段的存储 key：不带参数时是字段名，带参数时是 name({...})（参数排序后序列化）
+
+    别名不影响存储 key，所以 `a0: user(id: 1)` 和 `user(id: 1)` 命中同一份数据。
+    """
+    name = node.name.value
+    if not node.arguments:
+        return name
+    args = {
+        arg.name.value: value_from_ast_untyped(arg.value, variables or {})
+        for arg in node.arguments
+    }
+    return f"{name}({json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)})"
+
+
+def _is_included(node: Any, variables: Optional[Dict[str, Any]]) -> bool:
+    """处理 @include / @skip 指令"""
+    for directive in node.directives or ():
+        name = directive.name.value
+        if name not in ("include", "skip"):
+            continue
+        condition = False
+        for arg in directive.arguments or ():
+            if arg.name.value == "if":
+                condition = bool(value_from_ast_untyped(arg.value, variables or {}))
+        if (name == "include" and not condition) or (name == "skip" and condition):
+            return False
+    return True
+
+
+class _AddTypenameVisitor(Visitor if HAS_GRAPHQL else object):
+    """给每个非根选择集补上 __typename（有 schema 时顺便补 id）"""
+
+    def __init__(self, type_info: Optional["TypeInfo"] = None):
+        super().__init__()
+        self.type_info = type_info
+
+    def leave_selection_set(self, node, key, parent, path, ancestors):
+        if isinstance(parent, OperationDefinitionNode):
+            return None
+
+        present = {
+            s.name.value
+            for s in node.selections
+            if isinstance(s, FieldNode) and s.alias is None
+        }
+        added: List[Any] = []
+
+        if self.type_info is not None:
+            parent_type = self.type_info.get_parent_type()
+            fields = getattr(parent_type, "fields", None) or {}
+            if "id" in fields and "id" not in present:
+                added.append(FieldNode(name=NameNode(value="id"), arguments=(), directives=()))
+
+        if "__typename" not in present:
+            added.append(FieldNode(name=NameNode(value="__typename"), arguments=(), directives=()))
+
+        if not added:
+            return None
+        return SelectionSetNode(selections=(*node.selections, *added))
+
+
+class NormalizedCache:
+    """
+    艹！规范化响应缓存（线程安全）
+
+    一般不直接用，配置 GraphQLSDKConfig(normalized_cache=NormalizedCacheConfig(...)) 后
+    query()/query_async() 会自动先查缓存，变更的返回结果也会更新缓存里的实体。
+    """
+
+    def __init__(self, config: Optional[NormalizedCacheConfig] = None):
+        """
+        初始化规范化缓存
+
+        Args:
+            config: 缓存配置（可选，默认配置）
+        """
+        if not HAS_GRAPHQL:
+            raise ImportError("艹！graphql-core 没有安装！运行: pip install gql[requests,aiohttp]")
+
+        self.config = config or NormalizedCacheConfig()
+        self._schema = self._load_schema(self.config.schema)
+        self._entities: "OrderedDict[str, _Entity]" = OrderedDict()
+        self._transformed: Dict[int, Tuple[Any, Any, str]] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats = NormalizedCacheStats()
+
+    @staticmethod
+    def _load_schema(schema: Optional[str]):
+        """加载 schema（SDL 文本或文件路径）"""
+        if not schema:
+            return None
+        if "{" not in schema:
+            with open(schema, "r", encoding="utf-8") as f:
+                schema = f.read()
+        return build_schema(schema)
+
+    # ------------------------------------------------------------------
+    # 文档改写
+    # ------------------------------------------------------------------
+
+    def transform(self, document: Any) -> Tuple[Any, str]:
+        """
+        艹！给文档补上 __typename（和 id），返回 (改写后的文档, 要发送的文本)
+
+        结果按原文档缓存，同一个文档只改写一次。
+        """
+        cached = self._transformed.get(id(document))
+        if cached is not None and cached[0] is document:
+            return cached[1], cached[2]
+
+        if self._schema is not None:
+            type_info = TypeInfo(self._schema)
+            visitor = TypeInfoVisitor(type_info, _AddTypenameVisitor(type_info))
+        else:
+            visitor = _AddTypenameVisitor()
+        transformed = visit(document, visitor)
+        text = print_ast(transformed)
+
+        with self._lock:
+            if len(self._transformed) > 1024:
+                self._transformed.clear()
+            # 保存原文档引用，防止 id() 被复用后拿到错误的结果
+            self._transformed[id(document)] = (document, transformed, text)
+        return transformed, text
+
+    @staticmethod
+    def _operation(document: Any) -> Tuple[Optional[Any], Dict[str, Any]]:
+        """取出第一个操作和所有片段定义"""
+        operation = None
+        fragments: Dict[str, Any] = {}
+        for definition in document.definitions:
+            if isinstance(definition, OperationDefinitionNode) and operation is None:
+                operation = definition
+            elif isinstance(definition, FragmentDefinitionNode):
+                fragments[definition.name.value] = definition
+        return operation, fragments
+
+    @staticmethod
+    def is_query(document: Any) -> bool:
+        """文档是否是查询（只有查询才能从缓存读）"""
+        operation, _ = NormalizedCache._operation(document)
+        return operation is not None and operation.operation.value == "query"
+
+    def _collect_fields(
+        self,
+        selection_set: Any,
+        typename: Optional[str],
+        fragments: Dict[str, Any],
+        variables: Optional[Dict[str, Any]],
+        reading: bool,
+    ) -> List[Any]:
+        """
+        展开片段，返回要处理的字段列表
+
+        读缓存时，类型条件和 __typename 对不上的片段（可能是接口/联合类型）一律当作未命中，
+        宁可多走一次网络也别返回缺字段的数据。
+        """
+        result: List[Any] = []
+        for selection in selection_set.selections:
+            if not _is_included(selection, variables):
+                continue
+            if isinstance(selection, FieldNode):
+                result.append(selection)
+                continue
+
+            if isinstance(selection, FragmentSpreadNode):
+                fragment = fragments.get(selection.name.value)
+                if fragment is None:
+                    raise _Miss()
+                condition = fragment.type_condition.name.value
+                inner = fragment.selection_set
+            elif isinstance(selection, InlineFragmentNode):
+                condition = selection.type_condition.name.value if selection.type_condition else None
+                inner = selection.selection_set
+            else:
+                continue
+
+            if condition is not None and condition != typename:
+                if reading:
+                    raise _Miss()
+            result.extend(self._collect_fields(inner, typename, fragments, variables, reading))
+        return result
+
+    # ------------------------------------------------------------------
+    # 写缓存
+    # ------------------------------------------------------------------
+
+    def write(self, document: Any, variables: Optional[Dict[str, Any]], data: Any):
+        """
+        艹！把响应写进缓存（document 必须是实际发送的、补过 __typename 的文档）
+
+        Args:
+            document: 发送的文档
+            variables: 变量
+            data: 响应里的 data 字段
+        """
+        if not isinstance(data, dict):
+            return
+        operation, fragments = self._operation(document)
+        if operation is None:
+            return
+
+        now = time.time()
+        with self._lock:
+            touched: Dict[str, _Entity] = {}
+            if operation.operation.value == "query":
+                root = self._entities.get(ROOT_QUERY) or _Entity(typename="Query")
+                self._write_fields(
+                    root, operation.selection_set, data, fragments, variables, now, touched
+                )
+                touched[ROOT_QUERY] = root
+                self._entities[ROOT_QUERY] = root
+            else:
+                # 变更/订阅的根字段不缓存，只更新返回的实体
+                scratch = _Entity(typename=None)
+                self._write_fields(
+                    scratch, operation.selection_set, data, fragments, variables, now, touched
+                )
+
+            for key, entity in touched.items():
+                self._resize(entity)
+                self._entities.move_to_end(key)
+            self._stats.writes += 1
+            self._evict()
+
+    def _write_fields(self, entity, selection_set, obj, fragments, variables, now, touched):
+        """把一个对象的字段写进实体记录"""
+        ttl = self.config.ttl_for(entity.typename)
+        typename = obj.get("__typename") if isinstance(obj, dict) else None
+        for node in self._collect_fields(selection_set, typename, fragments, variables, reading=False):
+            response_key = node.alias.value if node.alias else node.name.value
+            if response_key not in obj:
+                continue
+            key = _field_key(node, variables)
+            entity.fields[key] = self._normalize(
+                node.selection_set, obj[response_key], fragments, variables, now, touched
+            )
+            entity.expires[key] = now + ttl
+
+    def _normalize(self, selection_set, value, fragments, variables, now, touched):
+        """规范化一个字段值：实体换成 {"__ref": key}，普通对象原地展开"""
+        if value is None or selection_set is None:
+            return value
+        if isinstance(value, list):
+            return [
+                self._normalize(selection_set, item, fragments, variables, now, touched)
+                for item in value
+            ]
+        if not isinstance(value, dict):
+            return value
+
+        typename = value.get("__typename")
+        entity_id = value.get("id")
+        if typename and entity_id is not None:
+            key = f"{typename}:{entity_id}"
+            entity = touched.get(key) or self._entities.get(key) or _Entity(typename=typename)
+            self._write_fields(entity, selection_set, value, fragments, variables, now, touched)
+            touched[key] = entity
+            self._entities[key] = entity
+            return {"__ref": key}
+
+        inline = _Entity(typename=typename)
+        self._write_fields(inline, selection_set, value, fragments, variables, now, touched)
+        return {"__fields": inline.fields}
+
+    def _resize(self, entity: _Entity):
+        """重新估算实体大小"""
+        size = len(json.dumps(entity.fields, ensure_ascii=False, default=str))
+        self._bytes += size - entity.size
+        entity.size = size
+
+    def _evict(self):
+        """超出内存预算时按 LRU 淘汰实体"""
+        while self._bytes > self.config.max_bytes and self._entities:
+            _, entity = self._entities.popitem(last=False)
+            self._bytes -= entity.size
+            self._stats.evictions += 1
+
+    # ------------------------------------------------------------------
+    # 读缓存
+    # ------------------------------------------------------------------
+
+    def read(self, document: Any, variables: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+        """
+        艹！尝试完全从缓存回答一个查询
+
+        Args:
+            document: 要发送的（补过 __typename 的）文档
+            variables: 变量
+
+        Returns:
+            (是否命中, 数据)
+        """
+        operation, fragments = self._operation(document)
+        if operation is None or operation.operation.value != "query":
+            return False, None
+
+        now = time.time()
+        with self._lock:
+            try:
+                root = self._entities.get(ROOT_QUERY)
+                if root is None:
+                    raise _Miss()
+                data = self._read_fields(root, operation.selection_set, fragments, variables, now)
+            except _Miss as miss:
+                self._stats.misses += 1
+                if miss.expired:
+                    self._stats.expired += 1
+                return False, None
+
+            self._stats.hits += 1
+            return True, data
+
+    def _read_fields(self, entity, selection_set, fragments, variables, now):
+        """按选择集从实体记录里读字段"""
+        typename = entity.fields.get("__typename", entity.typename)
+        result: Dict[str, Any] = {}
+        for node in self._collect_fields(selection_set, typename, fragments, variables, reading=True):
+            response_key = node.alias.value if node.alias else node.name.value
+            key = _field_key(node, variables)
+            if key not in entity.fields:
+                raise _Miss()
+            expires = entity.expires.get(key)
+            if expires is not None and expires < now:
+                raise _Miss(expired=True)
+            result[response_key] = self._denormalize(
+                node.selection_set, entity.fields[key], fragments, variables, now
+            )
+        return result
+
+    def _denormalize(self, selection_set, value, fragments, variables, now):
+        """把 {"__ref": key} 换回实体数据"""
+        if value is None or selection_set is None:
+            return value
+        if isinstance(value, list):
+            return [self._denormalize(selection_set, item, fragments, variables, now) for item in value]
+        if "__ref" in value:
+            entity = self._entities.get(value["__ref"])
+            if entity is None:
+                raise _Miss()
+            self._entities.move_to_end(value["__ref"])
+            return self._read_fields(entity, selection_set, fragments, variables, now)
+        inline = _Entity(typename=value["__fields"].get("__typename"), fields=value["__fields"])
+        return self._read_fields(inline, selection_set, fragments, variables, now)
+
+    # ------------------------------------------------------------------
+    # 管理
+    # ------------------------------------------------------------------
+
+    def evict(self, typename: str, entity_id: Any) -> bool:
+        """
+        手动淘汰一个实体（比如知道它在别处被修改了）
+
+        Returns:
+            是否真的删掉了
+        """
+        with self._lock:
+            entity = self._entities.pop(f"{typename}:{entity_id}", None)
+            if entity is None:
+                return False
+            self._bytes -= entity.size
+            return True
+
+    def get_entity(self, typename: str, entity_id: Any) -> Optional[Dict[str, Any]]:
+        """获取实体的原始字段（调试用）"""
+        with self._lock:
+            entity = self._entities.get(f"{typename}:{entity_id}")
+            return dict(entity.fields) if entity else None
+
+    def clear(self):
+        """清空缓存（统计计数不清零）"""
+        with self._lock:
+            self._entities.clear()
+            self._bytes = 0
+
+    def stats(self) -> NormalizedCacheStats:
+        """获取统计快照"""
+        with self._lock:
+            snapshot = NormalizedCacheStats(**{
+                k: v for k, v in self._stats.__dict__.items()
+            })
+            snapshot.entities = len(self._entities)
+            snapshot.bytes = self._bytes
+            return snapshot
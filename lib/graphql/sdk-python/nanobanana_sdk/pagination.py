@@ -0,0 +1,353 @@
+"""
+艹！Nano Banana GraphQL SDK 分页模块
+
+全量扫一遍目录的时候，以前是「等第 N 页 → 处理第 N 页 → 再去请求第 N+1 页」，
+网络延迟和处理时间串在一起。这个SB模块提供两种自动翻页：
+
+- ConnectionIterator: TS SDK 的 relay-pagination.ts 的 Python 版本，artworksConnection /
+  blogPostsConnection / videosConnection 跟着 pageInfo.endCursor / hasNextPage 往下翻，
+  拿到第 N 页就立刻预取第 N+1 页
+- OffsetPageIterator: artworks / artworksByPrompt / users 这种 limit/offset 列表，
+  游标不依赖上一页，直接并发请求后面几页，按顺序吐回来，遇到第一个不满的页就停
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .errors import server_error
+
+if TYPE_CHECKING:
+    from .client import GraphQLSDK, QueryInput
+
+
+# limit/offset 列表字段服务端的 limit 上限
+MAX_PAGE_SIZE = 100
+
+
+def get_path(data: Any, path: List[str]) -> Any:
+    """
+    按路径取出字段
+
+    Args:
+        data: 响应里的 data
+        path: key 路径（例如 ["artworksConnection"] 或 ["user", "artworks"]）
+
+    Returns:
+        字段的值（中间任何一层是 null 都返回 None）
+    """
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def _split(path: str, name: str) -> List[str]:
+    parts = [part for part in path.split(".") if part]
+    if not parts:
+        raise ValueError(f"艹，{name} 不能为空！")
+    return parts
+
+
+class ConnectionIterator:
+    """
+    艹！sdk.iter_connection() 的返回值，同步和异步都能迭代，逐个吐出 edges[].node
+
+    查询必须声明 $first / $after 两个变量，并且选上 pageInfo { endCursor hasNextPage }：
+
+        query Artworks($first: Int, $after: String) {
+            artworksConnection(first: $first, after: $after) {
+                edges { node { id url } }
+                pageInfo { endCursor hasNextPage }
+            }
+        }
+
+    使用示例:
+        for artwork in sdk.iter_connection(QUERY, "artworksConnection", page_size=50):
+            handle(artwork)
+
+        async for post in sdk.iter_connection(POSTS, "blogPostsConnection"):
+            await handle(post)
+
+    每次迭代都从头（或者 after 指定的游标）开始翻；中途 break 会丢掉已经预取的下一页。
+    """
+
+    def __init__(
+        self,
+        sdk: "GraphQLSDK",
+        query: "QueryInput",
+        connection_path: str,
+        page_size: int = 20,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "Connection",
+        prefetch: bool = True,
+        after: Optional[str] = None,
+    ):
+        """
+        初始化 Connection 迭代器
+
+        Args:
+            sdk: GraphQLSDK 实例
+            query: 声明了 $first / $after 的查询
+            connection_path: data 下面 Connection 字段的路径（点分隔，有别名就写别名）
+            page_size: 每页条数（作为 $first 传给服务端）
+            variables: 其他查询变量（例如 status / orderBy）
+            operation_name: 操作名称（用于日志）
+            prefetch: 处理当前页的同时预取下一页（默认 True）
+            after: 起始游标（可选，默认从第一页开始）
+        """
+        if page_size < 1:
+            raise ValueError("艹，page_size 必须 >= 1！")
+
+        self.sdk = sdk
+        self.query = query
+        self.path = _split(connection_path, "connection_path")
+        self.page_size = page_size
+        self.variables = dict(variables or {})
+        self.operation_name = operation_name
+        self.prefetch = prefetch
+        self.after = after
+        self.pages = 0
+
+    def _variables(self, cursor: Optional[str]) -> Dict[str, Any]:
+        return {**self.variables, "first": self.page_size, "after": cursor}
+
+    def _page(self, data: Any, cursor: Optional[str]) -> Tuple[List[Any], Optional[str]]:
+        """
+        艹！拆一页：返回 (这一页的 node 列表, 下一页的游标)，没有下一页时游标是 None
+        """
+        self.pages += 1
+        connection = get_path(data, self.path)
+        if connection is None:
+            return [], None
+
+        page_info = connection.get("pageInfo")
+        if not isinstance(page_info, dict) or "hasNextPage" not in page_info:
+            raise ValueError("艹，查询里没选 pageInfo { endCursor hasNextPage }，没法自动翻页！")
+
+        nodes = [
+            edge["node"] for edge in connection.get("edges") or []
+            if edge and edge.get("node") is not None
+        ]
+        if not page_info["hasNextPage"]:
+            return nodes, None
+
+        end_cursor = page_info.get("endCursor")
+        if not end_cursor or end_cursor == cursor:
+            # 服务端说还有下一页但游标没动，继续翻就是死循环
+            raise server_error(f"艹！{'.'.join(self.path)} 的 hasNextPage 为 true，但 endCursor 没有前进")
+        return nodes, end_cursor
+
+    # ------------------------------------------------------------------
+    # 同步
+    # ------------------------------------------------------------------
+
+    def _fetch(self, cursor: Optional[str]) -> Any:
+        return self.sdk.query(self.query, self._variables(cursor), self.operation_name)
+
+    def __iter__(self) -> Iterator[Any]:
+        # 同步传输是线程安全的，预取放在一个后台线程里
+        executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="nanobanana-prefetch")
+            if self.prefetch else None
+        )
+        try:
+            cursor = self.after
+            data = self._fetch(cursor)
+            while True:
+                nodes, next_cursor = self._page(data, cursor)
+                pending = None
+                if next_cursor is not None and executor is not None:
+                    pending = executor.submit(self._fetch, next_cursor)
+
+                yield from nodes
+
+                if next_cursor is None:
+                    return
+                data = pending.result() if pending is not None else self._fetch(next_cursor)
+                cursor = next_cursor
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # 异步
+    # ------------------------------------------------------------------
+
+    async def _fetch_async(self, cursor: Optional[str]) -> Any:
+        return await self.sdk.query_async(self.query, self._variables(cursor), self.operation_name)
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate_async()
+
+    async def _iterate_async(self) -> AsyncIterator[Any]:
+        pending: Optional[asyncio.Task] = None
+        try:
+            cursor = self.after
+            data = await self._fetch_async(cursor)
+            while True:
+                nodes, next_cursor = self._page(data, cursor)
+                if next_cursor is not None and self.prefetch:
+                    pending = asyncio.ensure_future(self._fetch_async(next_cursor))
+
+                for node in nodes:
+                    yield node
+
+                if next_cursor is None:
+                    return
+                if pending is not None:
+                    data, pending = await pending, None
+                else:
+                    data = await self._fetch_async(next_cursor)
+                cursor = next_cursor
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+
+class OffsetPageIterator:
+    """
+    艹！sdk.iter_pages() 的返回值：limit/offset 列表的并发翻页，同步和异步都能迭代
+
+    offset 不依赖上一页的结果，所以可以同时请求 concurrency 页：
+
+        offset=0    offset=100    offset=200    offset=300     ← 同时在飞
+          ↓ 按顺序吐出；每拿到一页就补发下一个 offset，保持 concurrency 个请求在飞
+
+    遇到第一个不满 page_size 的页（或者 null）就是最后一页：不再发新请求，
+    已经发出去的、更靠后的页（overshoot）直接丢掉，不会重复也不会漏。
+
+    查询必须声明 $limit / $offset 两个变量：
+
+        query Artworks($limit: Int, $offset: Int, $type: String) {
+            artworks(limit: $limit, offset: $offset, type: $type) { id url }
+        }
+
+    使用示例:
+        for artwork in sdk.iter_pages(QUERY, "artworks", concurrency=8):
+            handle(artwork)
+
+        async for user in sdk.iter_pages(USERS, "users", page_size=50):
+            await handle(user)
+    """
+
+    def __init__(
+        self,
+        sdk: "GraphQLSDK",
+        query: "QueryInput",
+        list_path: str,
+        page_size: int = MAX_PAGE_SIZE,
+        concurrency: int = 4,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "Pages",
+        offset: int = 0,
+    ):
+        """
+        初始化 limit/offset 翻页迭代器
+
+        Args:
+            sdk: GraphQLSDK 实例
+            query: 声明了 $limit / $offset 的查询
+            list_path: data 下面列表字段的路径（点分隔，有别名就写别名）
+            page_size: 每页条数（作为 $limit 传给服务端，最大 100）
+            concurrency: 同时在飞的页请求数
+            variables: 其他查询变量
+            operation_name: 操作名称（用于日志）
+            offset: 起始 offset（默认 0）
+        """
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"艹，page_size 必须在 1 到 {MAX_PAGE_SIZE} 之间（服务端 limit 上限）！")
+        if concurrency < 1:
+            raise ValueError("艹，concurrency 必须 >= 1！")
+        if offset < 0:
+            raise ValueError("艹，offset 必须 >= 0！")
+
+        self.sdk = sdk
+        self.query = query
+        self.path = _split(list_path, "list_path")
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.variables = dict(variables or {})
+        self.operation_name = operation_name
+        self.offset = offset
+        self.pages = 0
+        self.overshoot = 0
+
+    def _variables(self, offset: int) -> Dict[str, Any]:
+        return {**self.variables, "limit": self.page_size, "offset": offset}
+
+    def _page(self, data: Any) -> Tuple[List[Any], bool]:
+        """拆一页：返回 (这一页的元素, 是不是最后一页)"""
+        self.pages += 1
+        items = get_path(data, self.path)
+        if items is None:
+            return [], True
+        if not isinstance(items, list):
+            raise ValueError(f"艹，{'.'.join(self.path)} 不是列表字段！")
+        return items, len(items) < self.page_size
+
+    # ------------------------------------------------------------------
+    # 同步
+    # ------------------------------------------------------------------
+
+    def _fetch(self, offset: int) -> Any:
+        return self.sdk.query(self.query, self._variables(offset), self.operation_name)
+
+    def __iter__(self) -> Iterator[Any]:
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="nanobanana-pages")
+        pending: Deque[Future] = deque()
+        next_offset = self.offset
+        try:
+            for _ in range(self.concurrency):
+                pending.append(executor.submit(self._fetch, next_offset))
+                next_offset += self.page_size
+
+            while pending:
+                items, last = self._page(pending.popleft().result())
+                if last:
+                    self.overshoot += len(pending)
+                    yield from items
+                    return
+                pending.append(executor.submit(self._fetch, next_offset))
+                next_offset += self.page_size
+                yield from items
+        finally:
+            # 没开始的直接取消，已经在飞的等它跑完：迭代结束后不留任何页请求在后台
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    # ------------------------------------------------------------------
+    # 异步
+    # ------------------------------------------------------------------
+
+    async def _fetch_async(self, offset: int) -> Any:
+        return await self.sdk.query_async(self.query, self._variables(offset), self.operation_name)
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate_async()
+
+    async def _iterate_async(self) -> AsyncIterator[Any]:
+        pending: Deque[asyncio.Task] = deque()
+        next_offset = self.offset
+        try:
+            for _ in range(self.concurrency):
+                pending.append(asyncio.ensure_future(self._fetch_async(next_offset)))
+                next_offset += self.page_size
+
+            while pending:
+                items, last = self._page(await pending.popleft())
+                if last:
+                    self.overshoot += len(pending)
+                    for item in items:
+                        yield item
+                    return
+                pending.append(asyncio.ensure_future(self._fetch_async(next_offset)))
+                next_offset += self.page_size
+                for item in items:
+                    yield item
+        finally:
+            for task in pending:
+                task.cancel()
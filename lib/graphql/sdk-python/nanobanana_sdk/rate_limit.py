@@ -0,0 +1,299 @@
+"""
+艹！Nano Banana GraphQL SDK 客户端限流模块
+
+服务端（lib/graphql/rate-limiter.ts）按订阅层级给每个用户每分钟固定的请求数，超了直接封 60 秒。
+以前 SDK 只有收到 429 才知道，然后在 RetryHandler 里傻睡，结果就是一阵猛冲、一阵罚站。这个SB模块提供：
+- 按层级（free / basic / pro / max / admin）或者显式的每分钟请求数配置的令牌桶
+- 请求在发出去之前先拿令牌，匀速放行（预约制：拿不到就算出要等多久，锁里只做算术，不在锁里睡）
+- 同一个限流器可以同时给多个线程和多个事件循环里的协程用
+- 默认按配额的 95% 匀速跑，突发容量取剩下的 5%，任意 60 秒窗口里都不会超过配额
+- 读响应头里的 Retry-After / X-RateLimit-Remaining / X-RateLimit-Reset：
+  服务端说配额用完了，所有线程和协程一起等到窗口重置，而不是各自撞 429
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+# 每个层级每分钟的请求数（和 lib/graphql/rate-limiter.ts 的 RATE_LIMITS 一致）
+RATE_LIMIT_TIERS: Dict[str, int] = {
+    "free": 100,
+    "basic": 500,
+    "pro": 1000,
+    "max": 2000,
+    "admin": 10000,
+}
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _seconds_until(value: Optional[str], now: float) -> Optional[float]:
+    """
+    Retry-After / X-RateLimit-Reset 的值换算成还要等几秒
+
+    - 小数字：就是秒数（Retry-After: 30）
+    - 大数字：Unix 时间戳（秒；超过 1e12 按毫秒）
+    - HTTP 日期：Retry-After: Wed, 21 Oct 2026 07:28:00 GMT
+    """
+    if value is None:
+        return None
+    number = _number(value)
+    if number is None:
+        try:
+            number = parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError, IndexError):
+            return None
+    if number > 1e12:
+        number = number / 1000 - now
+    elif number > 1e9:
+        number -= now
+    return max(number, 0.0)
+
+
+@dataclass
+class RateLimitInfo:
+    """
+    响应头里的限流信息（哪个头都没有的字段是 None）
+
+    - limit: X-RateLimit-Limit（窗口内的配额）
+    - remaining: X-RateLimit-Remaining（窗口内还剩几次）
+    - reset_after: X-RateLimit-Reset 换算成的秒数（多久之后窗口重置）
+    - retry_after: Retry-After 换算成的秒数
+    """
+    limit: Optional[float] = None
+    remaining: Optional[float] = None
+    reset_after: Optional[float] = None
+    retry_after: Optional[float] = None
+
+    @property
+    def wait(self) -> Optional[float]:
+        """服务端要求等待的秒数：有 Retry-After 就用它，配额用完了就等到窗口重置，否则 None"""
+        if self.retry_after is not None:
+            return self.retry_after
+        if self.remaining is not None and self.remaining <= 0:
+            return self.reset_after
+        return None
+
+    @classmethod
+    def from_headers(cls, headers: Optional[Mapping[str, str]], now: Optional[float] = None) -> "RateLimitInfo":
+        """
+        从响应头解析（大小写无关，也认不带 X- 前缀的 RateLimit-*）
+
+        Args:
+            headers: 响应头
+            now: 当前 Unix 时间（可选，测试用）
+
+        Returns:
+            RateLimitInfo
+        """
+        lowered = {name.lower(): value for name, value in (headers or {}).items()}
+        now = time.time() if now is None else now
+
+        def header(name: str) -> Optional[str]:
+            return lowered.get(f"x-ratelimit-{name}", lowered.get(f"ratelimit-{name}"))
+
+        return cls(
+            limit=_number(header("limit")),
+            remaining=_number(header("remaining")),
+            reset_after=_seconds_until(header("reset"), now),
+            retry_after=_seconds_until(lowered.get("retry-after"), now),
+        )
+
+
+@dataclass
+class RateLimitConfig:
+    """
+    客户端限流配置
+
+    老王的参数说明：
+    - tier: 订阅层级（free / basic / pro / max / admin），和 requests_per_minute 二选一
+    - requests_per_minute: 显式的每分钟请求数（服务端配额改过、或者多个进程分一份配额时用）
+    - utilization: 匀速跑到配额的多少（默认 0.95）
+    - burst: 令牌桶容量，允许的瞬时突发（默认取配额的 1 - utilization，至少 1）
+
+    utilization × 配额 + burst 不超过配额时，任意 60 秒窗口里的请求数都不会超过配额。
+    """
+    tier: Optional[str] = None
+    requests_per_minute: Optional[float] = None
+    utilization: float = 0.95
+    burst: Optional[int] = None
+
+    def __post_init__(self):
+        """老王的参数验证"""
+        if (self.tier is None) == (self.requests_per_minute is None):
+            raise ValueError("艹，tier 和 requests_per_minute 必须二选一！")
+        if self.tier is not None and self.tier not in RATE_LIMIT_TIERS:
+            raise ValueError(f"艹，tier 必须是 {' / '.join(RATE_LIMIT_TIERS)} 之一！")
+        if self.requests_per_minute is not None and self.requests_per_minute <= 0:
+            raise ValueError("艹，requests_per_minute 必须 > 0！")
+        if not 0 < self.utilization <= 1:
+            raise ValueError("艹，utilization 必须在 (0, 1] 之间！")
+        if self.burst is not None and self.burst < 1:
+            raise ValueError("艹，burst 必须 >= 1！")
+
+    @property
+    def quota(self) -> float:
+        """服务端每分钟的配额"""
+        return self.requests_per_minute if self.tier is None else RATE_LIMIT_TIERS[self.tier]
+
+    @property
+    def rate(self) -> float:
+        """匀速放行的速率（每秒请求数）"""
+        return self.quota * self.utilization / 60
+
+    @property
+    def capacity(self) -> int:
+        """令牌桶容量"""
+        if self.burst is not None:
+            return self.burst
+        return max(1, int(self.quota * (1 - self.utilization)))
+
+
+@dataclass
+class RateLimiterStats:
+    """
+    限流统计
+
+    - acquired: 放行的请求数
+    - delayed: 需要等待才放行的请求数
+    - waited: 累计等待时间（秒）
+    - throttled: 响应头说配额用完（或者带了 Retry-After）、整个限流器暂停的次数
+    """
+    acquired: int = 0
+    delayed: int = 0
+    waited: float = 0.0
+    throttled: int = 0
+
+    def to_dict(self) -> Dict[str, float]:
+        """转换为字典格式"""
+        return {
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "waited": round(self.waited, 3),
+            "throttled": self.throttled,
+        }
+
+
+class RateLimiter:
+    """
+    艹！线程安全的令牌桶限流器（同步和异步都能用）
+
+    使用示例:
+        limiter = RateLimiter(RateLimitConfig(tier="pro"))
+        limiter.acquire()              # 同步：在当前线程里等
+        await limiter.acquire_async()  # 异步：只挂起当前协程，不堵事件循环
+
+    一般不用自己调：配置了 GraphQLSDKConfig.rate_limit，每个发往 GraphQL 端点的 HTTP 请求
+    （包括重试、批量、GET、流式、订阅建连）在发出去之前都会先拿一个令牌。
+    """
+
+    def __init__(self, config: RateLimitConfig):
+        """
+        初始化限流器
+
+        Args:
+            config: 限流配置
+        """
+        self.config = config
+        self.rate = config.rate
+        self.capacity = config.capacity
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._stats = RateLimiterStats()
+
+    def reserve(self) -> float:
+        """
+        预约一个令牌
+
+        令牌可以被预约成负数：后来的请求排在前面的预约后面，按到达顺序放行。
+
+        Returns:
+            需要等待的秒数（0 表示马上可以发）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+            self._stats.acquired += 1
+            if wait > 0:
+                self._stats.delayed += 1
+                self._stats.waited += wait
+            return wait
+
+    def pause(self, seconds: float):
+        """
+        艹！接下来 seconds 秒内不再放新的令牌（已经拿到预约在睡的请求不受影响）
+
+        Args:
+            seconds: 暂停秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 下一个预约拿到的正好是 seconds 秒之后的令牌
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+            self._stats.throttled += 1
+
+    def observe(self, headers: Optional[Mapping[str, Any]]):
+        """
+        艹！按响应头校准令牌桶（传输层每收到一个 GraphQL 响应都会调用）
+
+        - 带 Retry-After，或者剩余配额是 0：暂停到服务端说的时间
+        - 还有剩余配额：桶里的令牌不超过剩余配额（别的进程也在用这份配额时不会多冲）
+
+        Args:
+            headers: 响应头
+        """
+        info = RateLimitInfo.from_headers(headers)
+        wait = info.wait
+        if wait is not None:
+            if wait > 0:
+                self.pause(wait)
+        elif info.remaining is not None:
+            with self._lock:
+                self._tokens = min(self._tokens, info.remaining)
+
+    def refund(self):
+        """退还一个没用上的令牌（等待期间被取消的请求）"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+            self._stats.acquired -= 1
+
+    def acquire(self):
+        """
+        艹！同步拿一个令牌（拿不到就在当前线程里睡到能拿为止）
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        艹！异步拿一个令牌（拿不到就挂起当前协程，被取消时退还令牌）
+        """
+        wait = self.reserve()
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.refund()
+                raise
+
+    def stats(self) -> RateLimiterStats:
+        """获取统计快照"""
+        with self._lock:
+            return RateLimiterStats(**self._stats.__dict__)
@@ -2,9 +2,11 @@
 艹！Nano Banana GraphQL SDK 重试机制模块
 
 这个SB模块实现了智能重试逻辑，支持指数退避、最大重试次数等配置！
+服务端在响应头里说了要等多久（Retry-After / X-RateLimit-Reset）就按它说的等，不瞎猜。
 """
 
 import time
+import random
 import asyncio
 from typing import Callable, TypeVar, Optional, Any
 from dataclasses import dataclass
@@ -26,6 +28,7 @@ class RetryConfig:
     - max_delay: 最大延迟（秒，默认 30.0）
     - exponential_base: 指数退避基数（默认 2.0）
     - jitter: 是否添加随机抖动（默认 True，避免惊群效应）
+    - max_retry_after: 服务端要求等待超过这么多秒就不重试了，直接抛错（默认 300）
     """
     enabled: bool = True
     max_attempts: int = 3
@@ -33,6 +36,7 @@ class RetryConfig:
     max_delay: float = 30.0
     exponential_base: float = 2.0
     jitter: bool = True
+    max_retry_after: float = 300.0
 
     def __post_init__(self):
         """老王的参数验证"""
@@ -44,6 +48,8 @@ class RetryConfig:
             raise ValueError("艹，max_delay 必须 >= initial_delay！")
         if self.exponential_base <= 1:
             raise ValueError("艹，exponential_base 必须 > 1！")
+        if self.max_retry_after < 0:
+            raise ValueError("艹，max_retry_after 必须 >= 0！")
 
 
 class RetryHandler:
@@ -66,21 +72,29 @@ class RetryHandler:
         """
         self.config = config or RetryConfig()
 
-    def calculate_delay(self, attempt: int) -> float:
+    def calculate_delay(self, attempt: int, error: Optional[GraphQLSDKError] = None) -> float:
         """
         艹！计算延迟时间
 
-        使用指数退避算法：
+        错误的响应头里有 Retry-After，或者 X-RateLimit-Remaining 为 0 且带了 X-RateLimit-Reset：
+        服务端知道配额什么时候恢复，就等这么久（启用 jitter 时最多多等 10%，不会提前）。
+
+        否则使用指数退避算法：
         delay = min(initial_delay * (exponential_base ^ attempt), max_delay)
 
         如果启用 jitter，会添加随机抖动（0.5-1.5倍）
 
         Args:
             attempt: 当前尝试次数（从 0 开始）
+            error: 触发重试的错误（可选，用来读响应头）
 
         Returns:
             延迟秒数
         """
+        wait = error.rate_limit.wait if error is not None else None
+        if wait is not None:
+            return wait * (1 + random.random() * 0.1) if self.config.jitter else wait
+
         # 指数退避
         delay = self.config.initial_delay * (self.config.exponential_base ** attempt)
 
@@ -89,7 +103,6 @@ class RetryHandler:
 
         # 添加随机抖动（避免惊群效应）
         if self.config.jitter:
-            import random
             jitter_factor = 0.5 + random.random()  # 0.5 到 1.5 之间
             delay *= jitter_factor
 
@@ -103,6 +116,7 @@ class RetryHandler:
         1. 重试功能是否启用
         2. 是否达到最大重试次数
         3. 错误类型是否可重试
+        4. 服务端要求等待的时间是否超过 max_retry_after（等那么久还不如直接报错）
 
         Args:
             error: GraphQL SDK 错误
@@ -117,7 +131,11 @@ class RetryHandler:
         if attempt >= self.config.max_attempts:
             return False
 
-        return error.is_retryable()
+        if not error.is_retryable():
+            return False
+
+        wait = error.rate_limit.wait
+        return wait is None or wait <= self.config.max_retry_after
 
     def execute_with_retry(
         self,
@@ -152,7 +170,7 @@ class RetryHandler:
                     raise error
 
                 # 计算延迟时间
-                delay = self.calculate_delay(attempt - 1)
+                delay = self.calculate_delay(attempt - 1, error)
 
                 # 调用重试回调
                 if on_retry:
@@ -206,7 +224,7 @@ class RetryHandler:
                     raise error
 
                 # 计算延迟时间
-                delay = self.calculate_delay(attempt - 1)
+                delay = self.calculate_delay(attempt - 1, error)
 
                 # 调用重试回调
                 if on_retry:
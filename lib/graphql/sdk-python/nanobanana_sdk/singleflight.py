@@ -0,0 +1,187 @@
+"""
+艹！Nano Banana GraphQL SDK 单飞（single-flight）去重模块
+
+200 个协程同时查 leaderboard / trendingArtworks，就发 200 个一模一样的请求，太tm蠢了！
+这个SB模块保证：同一个 key（查询文本 + 变量 + 认证信息）正在飞的时候，
+后来的调用不再发请求，直接等第一个调用的结果，大家共享同一次网络调用和同一份解析结果。
+
+- SingleFlight: 同步版，跨线程合并（query()）
+- AsyncSingleFlight: 异步版，跨任务合并（query_async()），每个事件循环各管各的
+"""
+
+import asyncio
+import json
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+def flight_key(text: str, variables: Optional[Dict[str, Any]], scope: Any = None) -> Hashable:
+    """
+    生成单飞 key
+
+    Args:
+        text: 查询文本
+        variables: 变量（按 key 排序后序列化，顺序不同也算同一个请求）
+        scope: 额外的区分条件（例如 Authorization 头，不同用户的请求不能合并）
+
+    Returns:
+        可哈希的 key
+    """
+    variables_json = json.dumps(variables, sort_keys=True, ensure_ascii=False, default=str) if variables else ""
+    return (text, variables_json, scope)
+
+
+@dataclass
+class SingleFlightStats:
+    """
+    单飞统计
+
+    - flights: 实际发出的请求数
+    - collapsed: 被合并掉（没有单独发请求）的调用数
+    - in_flight: 当前正在飞的请求数
+    """
+    flights: int = 0
+    collapsed: int = 0
+    in_flight: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典格式"""
+        return {"flights": self.flights, "collapsed": self.collapsed, "in_flight": self.in_flight}
+
+
+class _Call:
+    """同步版正在飞的一次调用"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    艹！同步单飞（线程安全）
+
+    使用示例:
+        flight = SingleFlight()
+        data = flight.do(key, lambda: transport.execute(payload))
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = SingleFlightStats()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        艹！执行 fn，同一个 key 正在执行时直接等它的结果
+
+        Args:
+            key: 单飞 key
+            fn: 真正发请求的函数
+
+        Returns:
+            fn 的返回值（所有合并的调用拿到同一个对象）
+
+        Raises:
+            fn 抛出的异常（所有合并的调用都会收到）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats.flights += 1
+            else:
+                self._stats.collapsed += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def stats(self) -> SingleFlightStats:
+        """获取统计快照"""
+        with self._lock:
+            return SingleFlightStats(
+                flights=self._stats.flights,
+                collapsed=self._stats.collapsed,
+                in_flight=len(self._calls),
+            )
+
+
+class AsyncSingleFlight:
+    """
+    艹！异步单飞
+
+    第一个调用把请求包成一个独立的 Task，所有调用方 await shield(task)：
+    某个调用方被取消不会连累其他调用方，请求本身也照样跑完。
+    """
+
+    def __init__(self):
+        self._tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._stats = SingleFlightStats()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        艹！执行 fn()，同一个事件循环里同一个 key 正在执行时直接等它的结果
+
+        Args:
+            key: 单飞 key
+            fn: 返回协程的函数（只有第一个调用方会调用它）
+
+        Returns:
+            协程的结果（所有合并的调用拿到同一个对象）
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            tasks = self._tasks.get(loop)
+            if tasks is None:
+                tasks = self._tasks[loop] = {}
+            task = tasks.get(key)
+            if task is not None:
+                self._stats.collapsed += 1
+            else:
+                task = loop.create_task(fn())
+                tasks[key] = task
+                self._stats.flights += 1
+                task.add_done_callback(lambda t, tasks=tasks: self._finish(tasks, key, t))
+
+        return await asyncio.shield(task)
+
+    def _finish(self, tasks: Dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task):
+        """请求结束：移出正在飞的列表（并取走异常，免得所有调用方都取消时报警告）"""
+        with self._lock:
+            if tasks.get(key) is task:
+                del tasks[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> SingleFlightStats:
+        """获取统计快照"""
+        with self._lock:
+            return SingleFlightStats(
+                flights=self._stats.flights,
+                collapsed=self._stats.collapsed,
+                in_flight=sum(len(tasks) for tasks in self._tasks.values()),
+            )
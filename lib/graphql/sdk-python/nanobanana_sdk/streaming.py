@@ -0,0 +1,330 @@
+"""
+艹！Nano Banana GraphQL SDK 列表响应流式解码模块
+
+artworks / videos / userArtworks 这种返回 100 个大对象的字段，以前要等整个 body 收完、
+整棵 dict 树解码完才能拿到第一条，内存峰值就是整个文档。这个SB模块边收边解析：
+- 字节级扫描找到目标数组里每个元素的边界（字符串、转义、嵌套都处理了）
+- 每个元素一完整就用配置的 JSON 编解码器单独解码，立刻交给调用方
+- 已经处理完的字节马上丢掉，内存峰值大约就是一个元素 + 一个网络块
+"""
+
+import re
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Generator, Iterator, List, Optional, Sequence
+
+from .codec import JSONCodec, get_codec
+
+if TYPE_CHECKING:
+    from .client import GraphQLSDK
+
+try:
+    from gql.transport.exceptions import TransportProtocolError, TransportQueryError
+    HAS_GQL = True
+except ImportError:
+    HAS_GQL = False
+
+_WHITESPACE = re.compile(rb"[ \t\r\n]*")
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.S)
+_SCALAR = re.compile(rb"[^,\]}\s]+")
+_STRUCTURAL = re.compile(rb'["\[\]{}]')
+
+_OPEN = frozenset(b"{[")
+
+
+def split_path(path: str) -> List[str]:
+    """
+    "artworks" / "user.artworks" → 响应里 data 下面的 key 路径
+
+    Args:
+        path: 点分隔的路径（用响应里的 key，有别名就写别名）
+
+    Returns:
+        ["data", ...]
+    """
+    parts = [part for part in path.split(".") if part]
+    if not parts:
+        raise ValueError("艹，path 不能为空！")
+    return ["data", *parts]
+
+
+class StreamingListParser:
+    """
+    艹！增量解析 GraphQL 响应，逐个吐出目标数组里的元素
+
+    推模式：feed(chunk) 返回这一块里新完整的元素，close() 校验响应已经结束。
+    顶层的 errors 会被记下来（close() 之后再由调用方决定怎么抛），其他字段直接跳过不保留。
+
+    使用示例:
+        parser = StreamingListParser(["data", "artworks"])
+        for chunk in chunks:
+            for artwork in parser.feed(chunk):
+                handle(artwork)
+        parser.close()
+    """
+
+    def __init__(self, path: Sequence[str], codec: Optional[JSONCodec] = None):
+        """
+        初始化解析器
+
+        Args:
+            path: 目标数组的 key 路径（见 split_path）
+            codec: 解码单个元素用的 JSON 编解码器（可选，默认自动选最快的）
+        """
+        self.path = list(path)
+        self.codec = codec or get_codec()
+        self.errors: Optional[List[Any]] = None
+        self.found = False
+        self.done = False
+
+        self._buf = bytearray()
+        self._pos = 0
+        self._mark: Optional[int] = None
+        self._eof = False
+        self._items: List[Any] = []
+        self._gen = self._parse()
+        next(self._gen)  # 跑到第一次等数据
+
+    # ------------------------------------------------------------------
+    # 推模式接口
+    # ------------------------------------------------------------------
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        喂一块数据
+
+        Args:
+            chunk: 网络上收到的（已解压的）字节
+
+        Returns:
+            这一块里新解析完成的元素
+        """
+        if chunk:
+            self._buf += chunk
+        self._run()
+        items, self._items = self._items, []
+        return items
+
+    def close(self) -> List[Any]:
+        """
+        艹！数据收完了：跑完剩下的解析，响应不完整就抛 TransportProtocolError
+
+        Returns:
+            最后解析完成的元素
+        """
+        self._eof = True
+        self._run()
+        if not self.done:
+            raise TransportProtocolError("Server response ended before the GraphQL result was complete")
+        items, self._items = self._items, []
+        return items
+
+    def raise_for_errors(self):
+        """响应里有 GraphQL 错误就抛 TransportQueryError（和非流式请求的语义一致）"""
+        if self.errors:
+            raise TransportQueryError(str(self.errors[0]), errors=self.errors)
+
+    def _run(self):
+        if self.done:
+            return
+        try:
+            self._gen.send(None)
+        except StopIteration:
+            self.done = True
+
+    # ------------------------------------------------------------------
+    # 扫描原语（需要更多数据时 yield）
+    # ------------------------------------------------------------------
+
+    def _error(self, message: str) -> Exception:
+        return TransportProtocolError(f"Invalid GraphQL response: {message}")
+
+    def _decode(self, raw: bytes) -> Any:
+        """解码一段完整的 JSON 值（编解码器报错按响应格式错误处理）"""
+        try:
+            return self.codec.loads(raw)
+        except self.codec.decode_failure as e:
+            raise self._error(f"undecodable value ({e})") from e
+
+    def _wait(self) -> Generator[None, None, None]:
+        """等下一块数据，顺便丢掉已经处理完的字节"""
+        if self._eof:
+            raise self._error("unexpected end of response")
+        cut = self._pos if self._mark is None else self._mark
+        if cut:
+            del self._buf[:cut]
+            self._pos -= cut
+            if self._mark is not None:
+                self._mark -= cut
+        yield
+
+    def _peek(self) -> Generator[None, None, int]:
+        """跳过空白，返回下一个字节（不消费）"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            yield from self._wait()
+
+    def _expect(self, char: bytes) -> Generator[None, None, None]:
+        c = yield from self._peek()
+        if c != char[0]:
+            raise self._error(f"expected {char.decode()!r}, got {chr(c)!r}")
+        self._pos += 1
+
+    def _read_string(self) -> Generator[None, None, bytes]:
+        """读一个完整的字符串（包括引号）"""
+        while True:
+            m = _STRING.match(self._buf, self._pos)
+            if m is not None:
+                self._pos = m.end()
+                return m.group()
+            yield from self._wait()
+
+    def _scan_value(self, keep: bool) -> Generator[None, None, Optional[bytes]]:
+        """
+        扫过一个完整的值
+
+        keep=True 时返回它的原始字节；keep=False 时边扫边丢，不占内存
+        """
+        c = yield from self._peek()
+        if keep:
+            self._mark = self._pos
+
+        if c == 0x22:  # "
+            yield from self._read_string()
+        elif c in _OPEN:
+            depth = 0
+            while True:
+                m = _STRUCTURAL.search(self._buf, self._pos)
+                if m is None:
+                    self._pos = len(self._buf)
+                    yield from self._wait()
+                    continue
+                self._pos = m.start()
+                ch = self._buf[self._pos]
+                if ch == 0x22:
+                    yield from self._read_string()
+                    continue
+                self._pos += 1
+                depth += 1 if ch in _OPEN else -1
+                if depth == 0:
+                    break
+        else:
+            while True:
+                m = _SCALAR.match(self._buf, self._pos)
+                if m is None:
+                    raise self._error(f"unexpected {chr(c)!r}")
+                if m.end() < len(self._buf) or self._eof:
+                    self._pos = m.end()
+                    break
+                yield from self._wait()
+
+        if not keep:
+            return None
+        start, self._mark = self._mark, None
+        return bytes(self._buf[start:self._pos])
+
+    # ------------------------------------------------------------------
+    # 结构遍历
+    # ------------------------------------------------------------------
+
+    def _parse(self) -> Generator[None, None, None]:
+        yield from self._expect(b"{")
+        yield from self._walk_object(0)
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                raise self._error("trailing data after the result")
+            if self._eof:
+                return
+            yield from self._wait()
+
+    def _after_member(self, close: bytes) -> Generator[None, None, bool]:
+        """成员之后：遇到结束符返回 True，逗号返回 False"""
+        c = yield from self._peek()
+        self._pos += 1
+        if c == close[0]:
+            return True
+        if c != 0x2C:  # ,
+            raise self._error(f"expected ',' or {close.decode()!r}, got {chr(c)!r}")
+        return False
+
+    def _walk_object(self, level: int) -> Generator[None, None, None]:
+        """遍历一个对象（'{' 已经消费），只沿着目标路径往下走"""
+        c = yield from self._peek()
+        if c == 0x7D:  # }
+            self._pos += 1
+            return
+
+        target = self.path[level] if level < len(self.path) else None
+        last = level == len(self.path) - 1
+        while True:
+            if (yield from self._peek()) != 0x22:
+                raise self._error("expected an object key")
+            key = self._decode((yield from self._read_string()))
+            yield from self._expect(b":")
+
+            c = yield from self._peek()
+            if key == target and last and c == 0x5B:  # [
+                self._pos += 1
+                self.found = True
+                yield from self._walk_array()
+            elif key == target and not last and c == 0x7B:  # {
+                self._pos += 1
+                yield from self._walk_object(level + 1)
+            elif key == target and last and c != 0x6E:  # 不是 null 也不是数组
+                raise self._error(f"{'.'.join(self.path[1:])} is not a list")
+            elif level == 0 and key == "errors":
+                self.errors = self._decode((yield from self._scan_value(keep=True)))
+            else:
+                yield from self._scan_value(keep=False)
+
+            if (yield from self._after_member(b"}")):
+                return
+
+    def _walk_array(self) -> Generator[None, None, None]:
+        """遍历目标数组（'[' 已经消费），每个元素完整了就解码"""
+        c = yield from self._peek()
+        if c == 0x5D:  # ]
+            self._pos += 1
+            return
+
+        while True:
+            raw = yield from self._scan_value(keep=True)
+            self._items.append(self._decode(raw))
+            if (yield from self._after_member(b"]")):
+                return
+
+
+class QueryStream:
+    """
+    艹！sdk.stream_query() 的返回值，同步和异步都能迭代
+
+    使用示例:
+        for artwork in sdk.stream_query(QUERY, path="artworks"):
+            handle(artwork)
+
+        async for video in sdk.stream_query(QUERY, path="videos"):
+            await handle(video)
+
+    每次迭代都会发一个新请求；中途 break 会直接断开连接，剩下的数据不再接收。
+    """
+
+    def __init__(
+        self,
+        sdk: "GraphQLSDK",
+        query: Any,
+        path: str,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "StreamQuery",
+    ):
+        self.sdk = sdk
+        self.query = query
+        self.path = split_path(path)
+        self.variables = variables
+        self.operation_name = operation_name
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.sdk._stream(self.query, self.path, self.variables, self.operation_name)
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self.sdk._stream_async(self.query, self.path, self.variables, self.operation_name)
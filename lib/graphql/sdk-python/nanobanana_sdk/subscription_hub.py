@@ -0,0 +1,248 @@
+"""
+艹！Nano Banana GraphQL SDK 订阅扇出模块
+
+一个进程里几十个协程都订阅 newBlogPost，每个都开一条 SSE 长连接，
+服务端的单订阅限流分分钟把你掐掉！这个SB模块让相同的订阅共用一条上游连接：
+- 同一个事件循环里，(文档, 变量, Authorization) 相同的订阅只开一条上游 SSE 流
+- 每个本地消费者一个有界队列，上游的事件广播进去
+- 消费者太慢、队列满了：drop_oldest 丢掉最旧的事件，disconnect 直接断开这个消费者
+- 最后一个消费者离开时关掉上游连接
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, Hashable, Optional, Set, Tuple
+
+from .errors import GraphQLErrorType, GraphQLSDKError, parse_error
+from .singleflight import flight_key
+from .subscriptions import OVERFLOW_POLICIES, Subscription, SubscriptionConfig
+
+if TYPE_CHECKING:
+    from .client import GraphQLSDK, QueryInput
+
+
+class SlowConsumerError(GraphQLSDKError):
+    """艹！消费者太慢，队列满了，按 disconnect 策略被断开"""
+
+    def __init__(self, queue_size: int, operation_name: Optional[str] = None):
+        super().__init__(
+            error_type=GraphQLErrorType.UNKNOWN_ERROR,
+            message=f"艹，消费太慢了！队列满了（{queue_size} 条），这个消费者已被断开",
+            operation_name=operation_name,
+        )
+
+
+@dataclass
+class SubscriptionHubStats:
+    """
+    订阅扇出统计
+
+    - upstreams: 当前的上游 SSE 连接数
+    - consumers: 当前的本地消费者数
+    - events: 上游收到的事件数
+    - delivered: 放进消费者队列的事件数
+    - dropped: 因为队列满被丢掉的事件数（drop_oldest）
+    - disconnected: 因为队列满被断开的消费者数（disconnect）
+    """
+    upstreams: int = 0
+    consumers: int = 0
+    events: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    disconnected: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典格式"""
+        return {
+            "upstreams": self.upstreams,
+            "consumers": self.consumers,
+            "events": self.events,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+        }
+
+
+class _Consumer:
+    """一个本地消费者：有界队列 + 唤醒事件"""
+
+    def __init__(self, queue_size: int, overflow: str):
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.queue: Deque[Any] = deque()
+        self.wakeup = asyncio.Event()
+        self.done = False
+        self.error: Optional[Exception] = None
+
+    def put(self, data: Any) -> Optional[str]:
+        """放进一个事件，返回 None / "dropped" / "disconnected\""""
+        outcome = None
+        if len(self.queue) >= self.queue_size:
+            if self.overflow == "disconnect":
+                self.queue.clear()
+                self.finish(SlowConsumerError(self.queue_size))
+                return "disconnected"
+            self.queue.popleft()
+            outcome = "dropped"
+        self.queue.append(data)
+        self.wakeup.set()
+        return outcome
+
+    def finish(self, error: Optional[Exception] = None):
+        """上游结束（或出错）：剩下的事件照样交出去，然后结束 / 抛错"""
+        self.done = True
+        self.error = error
+        self.wakeup.set()
+
+    async def get(self) -> Tuple[bool, Any]:
+        """返回 (是否还有, 事件)"""
+        while not self.queue:
+            if self.error is not None:
+                raise self.error
+            if self.done:
+                return False, None
+            self.wakeup.clear()
+            await self.wakeup.wait()
+        return True, self.queue.popleft()
+
+
+class _Upstream:
+    """一条上游 SSE 连接和挂在它上面的消费者"""
+
+    def __init__(self, subscription: Subscription):
+        self.subscription = subscription
+        self.consumers: Set[_Consumer] = set()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SubscriptionHub:
+    """
+    艹！订阅扇出中心：相同的订阅共用一条上游 SSE 连接
+
+    一般通过 sdk.subscribe_shared() 使用，一个 SDK 实例一个 hub。
+    广播给所有消费者的是同一个 data 对象，别在消费者里改它。
+
+    使用示例:
+        async for event in sdk.subscribe_shared("subscription { newBlogPost { id title } }"):
+            handle(event)
+    """
+
+    def __init__(self, sdk: "GraphQLSDK"):
+        """
+        初始化扇出中心
+
+        Args:
+            sdk: GraphQLSDK 实例（用 sdk.subscribe 开上游连接）
+        """
+        self.sdk = sdk
+        self._upstreams: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], _Upstream] = {}
+        self._stats = SubscriptionHubStats()
+
+    def subscribe(
+        self,
+        query: "QueryInput",
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "SharedSubscription",
+        queue_size: Optional[int] = None,
+        overflow: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        艹！加入（或者新开）一个共享订阅
+
+        Args:
+            query: subscription 文档
+            variables: 变量（可选）
+            operation_name: 操作名称（用于日志，上游用第一个订阅者的）
+            queue_size: 这个消费者的队列容量（可选，默认用订阅配置里的）
+            overflow: 队列满了怎么办（drop_oldest / disconnect，默认用订阅配置里的）
+
+        Returns:
+            事件的异步迭代器（从加入的那一刻开始收，之前的事件收不到）
+        """
+        config = self.sdk.config.subscription_config or SubscriptionConfig()
+        queue_size = config.queue_size if queue_size is None else queue_size
+        overflow = overflow or config.overflow
+        if queue_size < 1:
+            raise ValueError("艹，queue_size 必须 >= 1！")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"艹，overflow 必须是 {' / '.join(OVERFLOW_POLICIES)} 之一！")
+        return self._consume(query, variables, operation_name, queue_size, overflow)
+
+    async def _consume(
+        self,
+        query: "QueryInput",
+        variables: Optional[Dict[str, Any]],
+        operation_name: str,
+        queue_size: int,
+        overflow: str,
+    ) -> AsyncIterator[Any]:
+        text = self.sdk._query_text(query)
+        key = (asyncio.get_running_loop(), flight_key(text, variables, self.sdk._headers.get("Authorization")))
+
+        upstream = self._upstreams.get(key)
+        if upstream is None:
+            upstream = self._upstreams[key] = _Upstream(
+                self.sdk.subscribe(query, variables, operation_name)
+            )
+            upstream.task = asyncio.ensure_future(self._pump(key, upstream))
+            self.sdk.logger.info(f"共享订阅上游已创建: {operation_name}")
+
+        consumer = _Consumer(queue_size, overflow)
+        upstream.consumers.add(consumer)
+        try:
+            while True:
+                has_more, data = await consumer.get()
+                if not has_more:
+                    return
+                yield data
+        finally:
+            self._leave(key, upstream, consumer)
+
+    async def _pump(self, key: Hashable, upstream: _Upstream):
+        """上游循环：收一个事件就广播给所有消费者"""
+        error: Optional[Exception] = None
+        events = upstream.subscription.__aiter__()
+        try:
+            async for data in events:
+                self._stats.events += 1
+                for consumer in list(upstream.consumers):
+                    outcome = consumer.put(data)
+                    if outcome == "disconnected":
+                        upstream.consumers.discard(consumer)
+                        self._stats.disconnected += 1
+                        continue
+                    self._stats.delivered += 1
+                    if outcome == "dropped":
+                        self._stats.dropped += 1
+                if not upstream.consumers:
+                    break  # 消费者全被断开了，上游也没必要留着
+        except asyncio.CancelledError:
+            raise
+        except GraphQLSDKError as e:
+            error = e
+        except Exception as e:
+            error = parse_error(e, upstream.subscription.operation_name, upstream.subscription.variables)
+        finally:
+            await events.aclose()
+            if self._upstreams.get(key) is upstream:
+                del self._upstreams[key]
+            for consumer in upstream.consumers:
+                consumer.finish(error)
+
+    def _leave(self, key: Hashable, upstream: _Upstream, consumer: _Consumer):
+        """消费者离开；最后一个离开时关掉上游连接"""
+        upstream.consumers.discard(consumer)
+        if upstream.consumers or self._upstreams.get(key) is not upstream:
+            return
+        del self._upstreams[key]
+        if upstream.task is not None and not upstream.task.done():
+            upstream.task.cancel()
+        self.sdk.logger.info(f"共享订阅上游已关闭: {upstream.subscription.operation_name}")
+
+    def stats(self) -> SubscriptionHubStats:
+        """获取统计快照"""
+        snapshot = SubscriptionHubStats(**self._stats.to_dict())
+        snapshot.upstreams = len(self._upstreams)
+        snapshot.consumers = sum(len(upstream.consumers) for upstream in self._upstreams.values())
+        return snapshot
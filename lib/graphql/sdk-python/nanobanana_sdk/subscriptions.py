@@ -0,0 +1,309 @@
+"""
+艹！Nano Banana GraphQL SDK 订阅模块（SSE）
+
+schema 里有 Subscription.newBlogPost / currentTime，TS SDK 用 graphql-yoga 的 SSE 在收，
+Python 这边以前只能每隔几秒轮询一次 blogPosts，太tm蠢了！这个SB模块提供：
+- SSEParser: 字节级增量解析 text/event-stream（行尾 \\n / \\r\\n / \\r 都认，跨块切开也没事）
+- Subscription: async for 逐个拿到推送的 data
+  - 断线自动重连（指数退避，服务端给了 retry: 就听服务端的），重连带 Last-Event-ID
+  - 心跳检测：yoga 每隔一段时间发一个注释行保活，超时没收到任何字节就当连接已死，主动重连
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+from .errors import GraphQLSDKError, network_error, parse_error
+from .http_cache import build_get_url
+from .transport import build_payload, parse_result
+
+if TYPE_CHECKING:
+    from .client import GraphQLSDK, QueryInput
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+try:
+    from gql.transport.exceptions import TransportProtocolError, TransportServerError
+    HAS_GQL = True
+except ImportError:
+    HAS_GQL = False
+
+_EOL = re.compile(rb"\r\n|\r|\n")
+
+# 共享订阅里消费者队列满了之后的处理策略
+OVERFLOW_POLICIES = ("drop_oldest", "disconnect")
+
+
+@dataclass
+class SubscriptionConfig:
+    """
+    订阅配置
+
+    老王的参数说明：
+    - reconnect: 断线后是否自动重连（默认 True）
+    - max_reconnects: 连续重连失败多少次后放弃（默认 0，不限制）
+    - initial_delay: 第一次重连前等多久（秒，默认 1.0，之后指数退避）
+    - max_delay: 重连等待的上限（秒，默认 30.0）
+    - heartbeat_timeout: 多久没收到任何字节就认为连接已死（秒，默认 30.0，0 表示不检测）
+    - queue_size: 共享订阅（subscribe_shared）每个消费者的队列容量（默认 100）
+    - overflow: 消费者队列满了怎么办（drop_oldest: 丢最旧的事件；disconnect: 断开这个消费者）
+    """
+    reconnect: bool = True
+    max_reconnects: int = 0
+    initial_delay: float = 1.0
+    max_delay: float = 30.0
+    heartbeat_timeout: float = 30.0
+    queue_size: int = 100
+    overflow: str = "drop_oldest"
+
+    def __post_init__(self):
+        """老王的参数验证"""
+        if self.max_reconnects < 0:
+            raise ValueError("艹，max_reconnects 必须 >= 0！")
+        if self.initial_delay < 0 or self.max_delay < self.initial_delay:
+            raise ValueError("艹，必须满足 0 <= initial_delay <= max_delay！")
+        if self.heartbeat_timeout < 0:
+            raise ValueError("艹，heartbeat_timeout 必须 >= 0！")
+        if self.queue_size < 1:
+            raise ValueError("艹，queue_size 必须 >= 1！")
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"艹，overflow 必须是 {' / '.join(OVERFLOW_POLICIES)} 之一！")
+
+
+@dataclass
+class SSEEvent:
+    """
+    一个 SSE 事件
+
+    - event: 事件类型（没有 event: 行时是 "message"；yoga 用 next / complete）
+    - data: 数据（多行 data: 用换行拼起来）
+    - id: 事件 ID（用于 Last-Event-ID）
+    """
+    event: str = "message"
+    data: str = ""
+    id: Optional[str] = None
+
+
+class SSEParser:
+    """
+    艹！text/event-stream 的字节级增量解析器（按 WHATWG 规范）
+
+    使用示例:
+        parser = SSEParser()
+        for chunk in chunks:
+            for event in parser.feed(chunk):
+                handle(event)
+
+    last_event_id 跨事件保留（重连时要带上），retry 是服务端建议的重连间隔（毫秒）。
+    """
+
+    def __init__(self, last_event_id: Optional[str] = None):
+        """
+        初始化解析器
+
+        Args:
+            last_event_id: 上一个连接最后收到的事件 ID（可选）
+        """
+        self.last_event_id = last_event_id
+        self.retry: Optional[int] = None
+
+        self._buf = bytearray()
+        self._started = False
+        self._event = ""
+        self._data: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """
+        喂一块数据
+
+        Args:
+            chunk: 网络上收到的字节
+
+        Returns:
+            这一块里新完整的事件
+        """
+        self._buf += chunk
+        if not self._started:
+            if len(self._buf) < 3 and b"\xef\xbb\xbf".startswith(bytes(self._buf)):
+                return []  # BOM 可能被切开了
+            if self._buf.startswith(b"\xef\xbb\xbf"):
+                del self._buf[:3]
+            self._started = True
+
+        events: List[SSEEvent] = []
+        pos = 0
+        while True:
+            m = _EOL.search(self._buf, pos)
+            if m is None:
+                break
+            if m.group() == b"\r" and m.end() == len(self._buf):
+                break  # 可能是被切开的 \r\n，等下一块
+            event = self._line(self._buf[pos:m.start()].decode("utf-8", errors="replace"))
+            pos = m.end()
+            if event is not None:
+                events.append(event)
+        del self._buf[:pos]
+        return events
+
+    def _line(self, line: str) -> Optional[SSEEvent]:
+        """处理一行，空行时派发事件"""
+        if not line:
+            if not self._data and not self._event:
+                return None
+            event = SSEEvent(self._event or "message", "\n".join(self._data), self.last_event_id)
+            self._event = ""
+            self._data = []
+            return event
+
+        if line.startswith(":"):
+            return None  # 注释（心跳）
+
+        name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if name == "data":
+            self._data.append(value)
+        elif name == "event":
+            self._event = value
+        elif name == "id":
+            if "\0" not in value:
+                self.last_event_id = value
+        elif name == "retry":
+            if value.isdigit():
+                self.retry = int(value)
+        return None
+
+
+class Subscription:
+    """
+    艹！sdk.subscribe() 的返回值，async for 逐个拿到推送的 data
+
+    使用示例:
+        async for event in sdk.subscribe("subscription { newBlogPost { id title } }"):
+            print(event["newBlogPost"]["title"])
+
+    服务端发 complete 时迭代正常结束；推送里带 GraphQL 错误、或者重连次数用完时抛 GraphQLSDKError。
+    中途 break 会断开连接。
+    """
+
+    def __init__(
+        self,
+        sdk: "GraphQLSDK",
+        query: "QueryInput",
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: str = "Subscription",
+        config: Optional[SubscriptionConfig] = None,
+    ):
+        """
+        初始化订阅
+
+        Args:
+            sdk: GraphQLSDK 实例
+            query: subscription 文档
+            variables: 变量（可选）
+            operation_name: 操作名称（用于日志）
+            config: 订阅配置（可选，默认用 SDK 配置里的）
+        """
+        self.sdk = sdk
+        self.query = query
+        self.variables = variables
+        self.operation_name = operation_name
+        self.config = config or SubscriptionConfig()
+
+        self.connected = False
+        self.events = 0
+        self.reconnects = 0
+        self.last_event_id: Optional[str] = None
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._run()
+
+    async def _run(self) -> AsyncIterator[Any]:
+        try:
+            self.sdk._get_document(self.query)
+            url = build_get_url(
+                self.sdk.config.endpoint, build_payload(self.sdk._query_text(self.query), self.variables)
+            )
+
+            transport = self.sdk._connected_async_transport()
+            if transport is not None:
+                async for data in self._listen(transport, url):
+                    yield data
+            else:
+                async with self.sdk._new_async_transport() as transport:
+                    async for data in self._listen(transport, url):
+                        yield data
+        except GraphQLSDKError:
+            raise
+        except Exception as e:
+            raise parse_error(e, self.operation_name, self.variables)
+
+    async def _listen(self, transport, url: str) -> AsyncIterator[Any]:
+        """连接 → 收事件 → 断了就按退避策略重连"""
+        logger = self.sdk.logger
+        heartbeat = self.config.heartbeat_timeout or None
+        failures = 0
+        retry_ms: Optional[int] = None
+
+        while True:
+            parser = SSEParser(self.last_event_id)
+            headers = dict(self.sdk._headers)
+            if self.last_event_id is not None:
+                headers["Last-Event-ID"] = self.last_event_id
+
+            try:
+                async for chunk in transport.event_stream(url, headers, heartbeat):
+                    if not self.connected:
+                        self.connected = True
+                        failures = 0
+                        logger.info(f"订阅已连接: {self.operation_name}")
+
+                    for event in parser.feed(chunk):
+                        self.last_event_id = parser.last_event_id
+                        if event.event == "complete":
+                            logger.info(f"订阅已结束: {self.operation_name}")
+                            return
+                        if event.event not in ("next", "message") or not event.data:
+                            continue
+                        try:
+                            decoded = self.sdk.codec.loads(event.data)
+                        except self.sdk.codec.decode_failure as e:
+                            raise TransportProtocolError(f"Invalid GraphQL response: {e}") from e
+                        data = parse_result(200, decoded)
+                        self.events += 1
+                        yield data
+                    retry_ms = parser.retry if parser.retry is not None else retry_ms
+                error = network_error("艹！订阅连接被服务端断开了")
+            except asyncio.TimeoutError as e:
+                error = network_error(f"艹！{heartbeat}s 没收到任何数据（心跳也没有），连接可能已经死了", e)
+            except (aiohttp.ClientError, ConnectionError) as e:
+                error = network_error(f"艹！订阅连接失败: {e}", e)
+            except (TransportServerError, TransportProtocolError) as e:
+                error = parse_error(e, self.operation_name, self.variables)
+                if isinstance(e, TransportProtocolError) or not error.is_retryable():
+                    raise error
+
+            self.connected = False
+            failures += 1
+            if not self.config.reconnect or (
+                self.config.max_reconnects and failures > self.config.max_reconnects
+            ):
+                raise error
+
+            if error.rate_limit.wait is not None:
+                delay = error.rate_limit.wait  # 服务端在响应头里说了要等多久
+            elif retry_ms is not None:
+                delay = retry_ms / 1000
+            else:
+                delay = min(self.config.initial_delay * 2 ** (failures - 1), self.config.max_delay)
+            logger.warning(
+                f"订阅断开: {self.operation_name}，{delay:.1f}s 后第 {failures} 次重连"
+                f"（Last-Event-ID: {self.last_event_id}）"
+            )
+            await asyncio.sleep(delay)
+            self.reconnects += 1
@@ -0,0 +1,902 @@
+"""
+艹！Nano Banana GraphQL SDK 传输层模块
+
+这个SB模块负责真正的 HTTP 收发，替代 gql 自带的"每次请求建一个连接"的用法：
+- 异步传输：一个长期存活的 aiohttp 会话 + 连接池（TCP/TLS 握手只做一次）
+- 同步传输：一个线程安全的 requests 会话 + 可调的 urllib3 连接池
+- 错误语义和 gql 保持一致（TransportServerError / TransportQueryError），
+  所以 parse_error 的分类逻辑完全不用改；出错时的响应头挂在异常的 response_headers 上
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from .codec import JSONCodec, get_codec
+from .http_cache import CachedResponse
+from .streaming import StreamingListParser
+
+# 流式读取时每次从连接读多少字节
+STREAM_CHUNK_SIZE = 64 * 1024
+
+if TYPE_CHECKING:
+    from .compression import RequestCompressor
+    from .http_cache import HTTPResponseStore
+    from .rate_limit import RateLimiter
+
+try:
+    import aiohttp
+    from aiohttp import compression_utils as _aiohttp_compression
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.request import ACCEPT_ENCODING as _URLLIB3_ACCEPT_ENCODING
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+try:
+    from gql.transport.exceptions import (
+        TransportClosed,
+        TransportProtocolError,
+        TransportQueryError,
+        TransportServerError,
+    )
+    HAS_GQL = True
+except ImportError:
+    HAS_GQL = False
+
+
+def build_payload(
+    query: str,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    艹！构建 GraphQL 请求体
+
+    Args:
+        query: GraphQL 查询文本
+        variables: 变量（可选）
+        operation_name: 文档里要执行的操作名（多操作文档才需要）
+
+    Returns:
+        请求体字典
+    """
+    payload: Dict[str, Any] = {"query": query}
+    if variables:
+        payload["variables"] = variables
+    if operation_name:
+        payload["operationName"] = operation_name
+    return payload
+
+
+def parse_result(status: int, body: Any, reason: str = "") -> Any:
+    """
+    艹！把服务端响应转换成 data，出错时抛出 gql 风格的异常
+
+    判断顺序和 gql 保持一致：
+    1. 响应不是 JSON 对象 → HTTP 错误码抛 TransportServerError，否则 TransportProtocolError
+    2. 没有 data 也没有 errors → 同上
+    3. 有 errors → TransportQueryError（带上 errors 和 data，parse_error 会用到）
+
+    Args:
+        status: HTTP 状态码
+        body: 解码后的 JSON（解码失败时传原始文本）
+        reason: HTTP 状态描述（用于错误消息）
+
+    Returns:
+        响应里的 data 字段
+    """
+    if not isinstance(body, dict) or ("data" not in body and "errors" not in body):
+        if status >= 400:
+            raise TransportServerError(f"{status}, message='{reason}'", status)
+        raise TransportProtocolError(
+            f"Server did not return a GraphQL result: {str(body)[:500]}"
+        )
+
+    errors = body.get("errors")
+    if errors:
+        raise TransportQueryError(
+            str(errors[0]),
+            errors=errors,
+            data=body.get("data"),
+            extensions=body.get("extensions"),
+        )
+
+    return body.get("data")
+
+
+def parse_batch_result(status: int, body: Any, count: int, reason: str = "") -> List[Any]:
+    """
+    艹！校验批量请求的响应，返回每个操作各自的响应体
+
+    整个响应不合法（不是等长的对象数组）就直接抛异常，
+    每个操作自己的 errors 留给调用方用 parse_result 逐个处理。
+
+    Args:
+        status: HTTP 状态码
+        body: 解码后的 JSON
+        count: 本批发送的操作数
+        reason: HTTP 状态描述
+
+    Returns:
+        每个操作的响应体列表（顺序和请求一致）
+    """
+    if not isinstance(body, list):
+        if status >= 400:
+            raise TransportServerError(f"{status}, message='{reason}'", status)
+        if isinstance(body, dict) and body.get("errors"):
+            # 服务端整体拒绝了批量请求（比如没开批量支持），把它的错误带出去
+            parse_result(status, body, reason)
+        raise TransportProtocolError(
+            f"Server did not return a batch result: {str(body)[:500]}"
+        )
+
+    if len(body) != count:
+        raise TransportProtocolError(
+            f"Batch answer length mismatch: sent {count}, got {len(body)}"
+        )
+
+    return body
+
+
+def parse_rest_result(status: int, body: Any, reason: str = "") -> Any:
+    """
+    艹！校验 REST 接口的响应，出错时抛 TransportServerError
+
+    Next.js 路由出错时返回 {"error": "CODE", "message": "..."}，
+    错误码和消息都塞进异常消息里，parse_error 才能按 401 / 429 / invalid 这些关键词分类。
+
+    Args:
+        status: HTTP 状态码
+        body: 解码后的 JSON
+        reason: HTTP 状态描述
+
+    Returns:
+        响应体
+    """
+    if status < 400:
+        return body
+    if isinstance(body, dict):
+        parts = [str(body[name]) for name in ("error", "message") if body.get(name)]
+        reason = ": ".join(parts) or reason
+    raise TransportServerError(f"{status}, message='{reason}'", status)
+
+
+@contextmanager
+def with_response_headers(headers: Any) -> Iterator[None]:
+    """
+    艹！块里抛出的异常带上响应头（response_headers），parse_error 会把它放进 GraphQLSDKError
+
+    Retry-After / X-RateLimit-* 这些头只有响应里有，丢了重试就只能瞎猜要等多久。
+    """
+    try:
+        yield
+    except Exception as e:
+        if getattr(e, "response_headers", None) is None:
+            e.response_headers = dict(headers or {})
+        raise
+
+
+def _encode_body(
+    codec: JSONCodec,
+    body: Any,
+    headers: Optional[Dict[str, str]],
+    compressor: Optional["RequestCompressor"],
+    accept_encoding: str,
+    operation: Optional[str],
+) -> Tuple[bytes, Optional[Dict[str, str]]]:
+    """JSON 编码请求体（直接编码成 bytes），配置了压缩器时按需压缩并协商响应编码"""
+    data = codec.dumps(body)
+    if compressor is None:
+        return data, headers
+    data, headers = compressor.encode(data, headers, operation)
+    headers.setdefault("Content-Type", "application/json")
+    if compressor.config.accept_encoding:
+        headers["Accept-Encoding"] = accept_encoding
+    return data, headers
+
+
+def _finish_stream(parser: StreamingListParser, status: int, reason: str):
+    """流读完之后：有 GraphQL 错误抛 TransportQueryError，HTTP 错误抛 TransportServerError"""
+    parser.raise_for_errors()
+    if status >= 400:
+        raise TransportServerError(f"{status}, message='{reason}'", status)
+
+
+def _store_key(url: str, headers: Optional[Dict[str, str]]) -> Hashable:
+    """响应存储的 key：URL + 认证头（不同用户的响应不能混用）"""
+    return (url, (headers or {}).get("Authorization"))
+
+
+def _with_validators(
+    headers: Optional[Dict[str, str]], entry: Optional[CachedResponse]
+) -> Optional[Dict[str, str]]:
+    """有存储的响应时，带上 If-None-Match / If-Modified-Since"""
+    if entry is None:
+        return headers
+    return {**(headers or {}), **entry.validator_headers()}
+
+
+def _remember(
+    store: Optional["HTTPResponseStore"],
+    key: Hashable,
+    response_headers: Any,
+    data: Any,
+    size: int,
+):
+    """响应带验证器就存下来，没带就把旧的删掉"""
+    if store is None:
+        return
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    if etag or last_modified:
+        store.put(key, CachedResponse(etag=etag, last_modified=last_modified, data=data, size=size))
+    else:
+        store.discard(key)
+
+
+class AsyncHTTPTransport:
+    """
+    艹！基于 aiohttp 的长连接异步传输
+
+    一个实例只持有一个 ClientSession（和它的 TCPConnector 连接池），
+    在 connect() 和 close() 之间所有请求共享连接，别tm每个请求都握一次手！
+
+    注意：aiohttp 会话绑定创建它的事件循环，换了事件循环必须重新 connect()。
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 30,
+        max_connections: int = 100,
+        max_connections_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        keep_alive: bool = True,
+        compressor: Optional["RequestCompressor"] = None,
+        codec: Optional[JSONCodec] = None,
+        limiter: Optional["RateLimiter"] = None,
+    ):
+        """
+        初始化异步传输
+
+        Args:
+            url: GraphQL 端点
+            timeout: 单个请求的总超时（秒）
+            max_connections: 连接池总连接数上限（0 表示不限制）
+            max_connections_per_host: 单个主机的连接数上限（0 表示不限制）
+            keepalive_timeout: 空闲连接保活时间（秒）
+            keep_alive: 是否复用连接（False 时每个请求结束就断开）
+            compressor: 请求体压缩器（可选）
+            codec: JSON 编解码器（可选，默认自动选最快的）
+            limiter: 客户端限流器（可选，发往 GraphQL 端点的每个请求先拿令牌）
+        """
+        if not HAS_AIOHTTP:
+            raise ImportError("艹！aiohttp 没有安装！运行: pip install aiohttp")
+
+        self.url = url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.keep_alive = keep_alive
+        self.compressor = compressor
+        self.codec = codec or get_codec()
+        self.limiter = limiter
+
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def accept_encoding(self) -> str:
+        """aiohttp 能自动解压的响应编码"""
+        encodings = ["gzip", "deflate"]
+        if getattr(_aiohttp_compression, "HAS_BROTLI", False):
+            encodings.append("br")
+        if getattr(_aiohttp_compression, "HAS_ZSTD", False):
+            encodings.append("zstd")
+        return ", ".join(encodings)
+
+    @property
+    def is_connected(self) -> bool:
+        """会话是否可用（已连接且没被关闭）"""
+        return self.session is not None and not self.session.closed
+
+    async def connect(self):
+        """
+        艹！打开连接池（幂等，重复调用不会建第二个会话）
+        """
+        if self.is_connected:
+            return
+
+        if self.keep_alive:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+        else:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                force_close=True,
+            )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self.loop = asyncio.get_running_loop()
+
+    async def execute(
+        self,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+        operation: Optional[str] = None,
+    ) -> Any:
+        """
+        艹！发送一个 GraphQL 请求
+
+        Args:
+            payload: 请求体（见 build_payload）
+            headers: 本次请求的请求头
+            operation: 操作名（用于压缩统计）
+
+        Returns:
+            响应里的 data 字段
+
+        Raises:
+            TransportClosed: 如果还没 connect()
+            TransportServerError / TransportQueryError / TransportProtocolError
+        """
+        status, body, reason, response_headers = await self._post(payload, headers, operation)
+        with with_response_headers(response_headers):
+            return parse_result(status, body, reason)
+
+    async def execute_batch(
+        self,
+        payloads: List[Dict[str, Any]],
+        headers: Optional[Dict[str, str]] = None,
+        operation: Optional[str] = None,
+    ) -> List[Any]:
+        """
+        艹！把多个操作放进一个 POST 发送（数组批量）
+
+        Args:
+            payloads: 请求体列表
+            headers: 本次请求的请求头
+            operation: 操作名（用于压缩统计）
+
+        Returns:
+            每个操作的响应体列表（还没检查 errors，交给调用方逐个处理）
+        """
+        status, body, reason, response_headers = await self._post(payloads, headers, operation)
+        with with_response_headers(response_headers):
+            return parse_batch_result(status, body, len(payloads), reason)
+
+    async def execute_get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        store: Optional["HTTPResponseStore"] = None,
+        operation: Optional[str] = None,
+    ) -> Any:
+        """
+        艹！用 GET 发送一个查询，有存储的响应时做条件请求
+
+        Args:
+            url: build_get_url() 生成的完整 URL
+            headers: 本次请求的请求头
+            store: 本地响应存储（可选）
+            operation: 操作名（用于压缩统计）
+
+        Returns:
+            响应里的 data 字段（304 时直接返回存储的 data，不读 body 也不解码）
+        """
+        if not self.is_connected:
+            raise TransportClosed("Transport is not connected")
+
+        key = _store_key(url, headers)
+        entry = store.get(key) if store is not None else None
+
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+        headers = _with_validators(headers, entry)
+        if self.compressor is not None and self.compressor.config.accept_encoding:
+            headers = {**(headers or {}), "Accept-Encoding": self.accept_encoding}
+
+        async with self.session.get(url, headers=headers) as resp:
+            self._observe(resp.headers)
+            if resp.status == 304 and entry is not None:
+                store.record_not_modified(entry)
+                return entry.data
+
+            raw = await resp.read()
+            self._record_response(resp, raw, operation)
+            try:
+                decoded = self.codec.loads(raw)
+            except self.codec.decode_failure:
+                decoded = raw.decode("utf-8", errors="replace")
+            with with_response_headers(resp.headers):
+                data = parse_result(resp.status, decoded, resp.reason or "")
+            _remember(store, key, resp.headers, data, len(raw))
+            return data
+
+    async def stream(
+        self,
+        payload: Dict[str, Any],
+        path: Sequence[str],
+        headers: Optional[Dict[str, str]] = None,
+        operation: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        艹！发送请求，边收边解析，逐个吐出 path 指向的数组元素
+
+        Args:
+            payload: 请求体
+            path: 目标数组的 key 路径（见 streaming.split_path）
+            headers: 本次请求的请求头
+            operation: 操作名（用于压缩统计）
+
+        Yields:
+            数组里的每个元素（收完之后有 GraphQL 错误才抛 TransportQueryError）
+        """
+        if not self.is_connected:
+            raise TransportClosed("Transport is not connected")
+
+        data, headers = _encode_body(self.codec, payload, headers, self.compressor, self.accept_encoding, operation)
+        if "Content-Type" not in (headers or {}):
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+
+        parser = StreamingListParser(path, self.codec)
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+        async with self.session.post(self.url, data=data, headers=headers) as resp:
+            self._observe(resp.headers)
+            if resp.status >= 400:
+                # 错误响应不会有列表，按普通请求的规则解析、抛错
+                raw = await resp.read()
+                try:
+                    decoded = self.codec.loads(raw)
+                except self.codec.decode_failure:
+                    decoded = raw.decode("utf-8", "replace")
+                with with_response_headers(resp.headers):
+                    parse_result(resp.status, decoded, resp.reason or "")
+                    raise TransportServerError(f"{resp.status}, message='{resp.reason}'", resp.status)
+            async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                for item in parser.feed(chunk):
+                    yield item
+            for item in parser.close():
+                yield item
+            _finish_stream(parser, resp.status, resp.reason or "")
+
+    async def event_stream(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        idle_timeout: Optional[float] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        艹！用 GET 打开一个 SSE 流（graphql-yoga 的订阅），逐块吐出原始字节
+
+        长连接不受 timeout 总时长限制（timeout 只管建连）；
+        超过 idle_timeout 秒一个字节都没收到（心跳也没有）就抛 asyncio.TimeoutError。
+
+        Args:
+            url: build_get_url() 生成的完整 URL
+            headers: 本次请求的请求头（Last-Event-ID 之类）
+            idle_timeout: 空闲超时（秒，None 表示不检测）
+
+        Yields:
+            收到的字节块（服务端正常关闭连接时结束）
+        """
+        if not self.is_connected:
+            raise TransportClosed("Transport is not connected")
+
+        headers = {**(headers or {}), "Accept": "text/event-stream", "Cache-Control": "no-cache"}
+        timeout = aiohttp.ClientTimeout(total=None, connect=self.timeout)
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+        async with self.session.get(url, headers=headers, timeout=timeout) as resp:
+            self._observe(resp.headers)
+            if resp.status >= 400 or resp.content_type != "text/event-stream":
+                # 不是事件流：按普通响应解析，GraphQL 错误 / HTTP 错误照常抛
+                raw = await resp.read()
+                try:
+                    decoded = self.codec.loads(raw)
+                except self.codec.decode_failure:
+                    decoded = raw.decode("utf-8", errors="replace")
+                with with_response_headers(resp.headers):
+                    parse_result(resp.status, decoded, resp.reason or "")
+                    raise TransportProtocolError(
+                        f"Server did not return an event stream (Content-Type: {resp.content_type})"
+                    )
+
+            while True:
+                chunk = await asyncio.wait_for(resp.content.readany(), idle_timeout)
+                if not chunk:
+                    return
+                yield chunk
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Any, str, Dict[str, str]]:
+        """
+        艹！发一个普通的 JSON REST 请求（/api/v1/video/... 这种不是 GraphQL 的接口），共用同一个连接池
+
+        Args:
+            method: HTTP 方法
+            url: 完整 URL
+            body: 请求体（可选，JSON 编码）
+            headers: 本次请求的请求头
+
+        Returns:
+            (状态码, 解码后的响应体, 状态描述, 响应头)，状态码怎么处理交给调用方（见 parse_rest_result）
+        """
+        if not self.is_connected:
+            raise TransportClosed("Transport is not connected")
+
+        data = None
+        if body is not None:
+            data = self.codec.dumps(body)
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+
+        async with self.session.request(method, url, data=data, headers=headers) as resp:
+            raw = await resp.read()
+            try:
+                decoded = self.codec.loads(raw) if raw else None
+            except self.codec.decode_failure:
+                decoded = raw.decode("utf-8", errors="replace")
+            return resp.status, decoded, resp.reason or "", dict(resp.headers)
+
+    def _observe(self, headers: Any):
+        """把响应头里的限流信息交给限流器"""
+        if self.limiter is not None:
+            self.limiter.observe(headers)
+
+    def _record_response(self, resp: "aiohttp.ClientResponse", raw: bytes, operation: Optional[str]):
+        """压缩的响应：按 Content-Length 记录网络字节数（分块传输拿不到就不记）"""
+        if self.compressor is None or not resp.headers.get("Content-Encoding"):
+            return
+        wire = resp.headers.get("Content-Length")
+        if wire is not None and wire.isdigit():
+            self.compressor.record_response(operation, int(wire), len(raw))
+
+    async def _post(
+        self,
+        body: Any,
+        headers: Optional[Dict[str, str]],
+        operation: Optional[str] = None,
+    ) -> Tuple[int, Any, str, Any]:
+        """发送 POST，返回 (状态码, 解码后的响应体, 状态描述, 响应头)"""
+        if not self.is_connected:
+            raise TransportClosed("Transport is not connected")
+
+        data, headers = _encode_body(self.codec, body, headers, self.compressor, self.accept_encoding, operation)
+        if "Content-Type" not in (headers or {}):
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+        async with self.session.post(self.url, data=data, headers=headers) as resp:
+            self._observe(resp.headers)
+            raw = await resp.read()
+            self._record_response(resp, raw, operation)
+            try:
+                decoded = self.codec.loads(raw)
+            except self.codec.decode_failure:
+                decoded = raw.decode("utf-8", errors="replace")
+            return resp.status, decoded, resp.reason or "", resp.headers
+
+    async def close(self):
+        """
+        艹！关闭会话和连接池
+        """
+        session, self.session = self.session, None
+        self.loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class SyncHTTPTransport:
+    """
+    艹！基于 requests 的线程安全同步传输
+
+    所有线程共享一个 requests.Session 和它挂载的 urllib3 连接池：
+    - 连接池本身是线程安全的，连接用完归还，其他线程接着复用
+    - 请求头每次请求单独传，不往会话上写任何共享状态
+    - max_connections_per_host > 0 时连接池满了会阻塞等待，保证不超过上限
+
+    64+ 个线程一起 sdk.query() 完全没问题！
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 30,
+        pool_size: int = 10,
+        max_connections: int = 100,
+        max_connections_per_host: int = 0,
+        keep_alive: bool = True,
+        verify: bool = True,
+        compressor: Optional["RequestCompressor"] = None,
+        codec: Optional[JSONCodec] = None,
+        limiter: Optional["RateLimiter"] = None,
+    ):
+        """
+        初始化同步传输
+
+        Args:
+            url: GraphQL 端点
+            timeout: 单个请求的超时（秒）
+            pool_size: 缓存的主机连接池个数（对应 urllib3 的 num_pools）
+            max_connections: 单个主机连接池的容量（max_connections_per_host 为 0 时使用）
+            max_connections_per_host: 单个主机的连接数硬上限（0 表示不限制，池满了临时建连接）
+            keep_alive: 是否复用连接（False 时每个请求都带 Connection: close）
+            verify: 是否校验 TLS 证书
+            compressor: 请求体压缩器（可选）
+            codec: JSON 编解码器（可选，默认自动选最快的）
+            limiter: 客户端限流器（可选，发往 GraphQL 端点的每个请求先拿令牌）
+        """
+        if not HAS_REQUESTS:
+            raise ImportError("艹！requests 没有安装！运行: pip install requests")
+
+        self.url = url
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keep_alive = keep_alive
+        self.verify = verify
+        self.compressor = compressor
+        self.codec = codec or get_codec()
+        self.limiter = limiter
+        # urllib3 能自动解压的响应编码（装了 brotli / zstandard 会自动带上 br / zstd）
+        self.accept_encoding = _URLLIB3_ACCEPT_ENCODING.replace(",", ", ")
+
+        self.session: Optional["requests.Session"] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool_maxsize(self) -> int:
+        """单个主机连接池的容量"""
+        return self.max_connections_per_host or self.max_connections or 10
+
+    def connect(self) -> "requests.Session":
+        """
+        艹！创建共享会话（幂等、线程安全）
+
+        Returns:
+            requests.Session 实例
+        """
+        session = self.session
+        if session is not None:
+            return session
+
+        with self._lock:
+            if self.session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.pool_maxsize,
+                    pool_block=self.max_connections_per_host > 0,
+                    max_retries=0,  # 我们自己处理重试
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.session = session
+            return self.session
+
+    def execute(
+        self,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+        operation: Optional[str] = None,
+    ) -> Any:
+        """
+        艹！发送一个 GraphQL 请求（可以被多个线程同时调用）
+
+        Args:
+            payload: 请求体（见 build_payload）
+            headers: 本次请求的请求头
+            operation: 操作名（用于压缩统计）
+
+        Returns:
+            响应里的 data 字段
+
+        Raises:
+            TransportServerError / TransportQueryError / TransportProtocolError
+        """
+        status, body, reason, response_headers = self._post(payload, headers, operation)
+        with with_response_headers(response_headers):
+            return parse_result(status, body, reason)
+
+    def execute_batch(
+        self,
+        payloads: List[Dict[str, Any]],
+        headers: Optional[Dict[str, str]] = None,
+        operation: Optional[str] = None,
+    ) -> List[Any]:
+        """
+        艹！把多个操作放进一个 POST 发送（数组批量）
+
+        Args:
+            payloads: 请求体列表
+            headers: 本次请求的请求头
+            operation: 操作名（用于压缩统计）
+
+        Returns:
+            每个操作的响应体列表（还没检查 errors，交给调用方逐个处理）
+        """
+        status, body, reason, response_headers = self._post(payloads, headers, operation)
+        with with_response_headers(response_headers):
+            return parse_batch_result(status, body, len(payloads), reason)
+
+    def execute_get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        store: Optional["HTTPResponseStore"] = None,
+        operation: Optional[str] = None,
+    ) -> Any:
+        """
+        艹！用 GET 发送一个查询，有存储的响应时做条件请求（线程安全）
+
+        Args:
+            url: build_get_url() 生成的完整 URL
+            headers: 本次请求的请求头
+            store: 本地响应存储（可选）
+            operation: 操作名（用于压缩统计）
+
+        Returns:
+            响应里的 data 字段（304 时直接返回存储的 data，不解码 JSON）
+        """
+        session = self.connect()
+
+        key = _store_key(url, headers)
+        entry = store.get(key) if store is not None else None
+        headers = _with_validators(headers, entry)
+        if self.compressor is not None and self.compressor.config.accept_encoding:
+            headers = {**(headers or {}), "Accept-Encoding": self.accept_encoding}
+        if not self.keep_alive:
+            headers = {**(headers or {}), "Connection": "close"}
+
+        if self.limiter is not None:
+            self.limiter.acquire()
+        resp = session.get(url, headers=headers, timeout=self.timeout, verify=self.verify)
+        self._observe(resp.headers)
+        if resp.status_code == 304 and entry is not None:
+            store.record_not_modified(entry)
+            return entry.data
+
+        raw = resp.content
+        self._record_response(resp, raw, operation)
+        try:
+            decoded = self.codec.loads(raw)
+        except self.codec.decode_failure:
+            decoded = resp.text
+        with with_response_headers(resp.headers):
+            data = parse_result(resp.status_code, decoded, resp.reason or "")
+        _remember(store, key, resp.headers, data, len(raw))
+        return data
+
+    def stream(
+        self,
+        payload: Dict[str, Any],
+        path: Sequence[str],
+        headers: Optional[Dict[str, str]] = None,
+        operation: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """
+        艹！发送请求，边收边解析，逐个吐出 path 指向的数组元素（线程安全）
+
+        Args:
+            payload: 请求体
+            path: 目标数组的 key 路径（见 streaming.split_path）
+            headers: 本次请求的请求头
+            operation: 操作名（用于压缩统计）
+
+        Yields:
+            数组里的每个元素（收完之后有 GraphQL 错误才抛 TransportQueryError）
+        """
+        session = self.connect()
+
+        data, headers = _encode_body(self.codec, payload, headers, self.compressor, self.accept_encoding, operation)
+        if not self.keep_alive:
+            headers = {**(headers or {}), "Connection": "close"}
+
+        parser = StreamingListParser(path, self.codec)
+        if self.limiter is not None:
+            self.limiter.acquire()
+        with session.post(
+            self.url,
+            data=data,
+            headers=headers,
+            timeout=self.timeout,
+            verify=self.verify,
+            stream=True,
+        ) as resp:
+            self._observe(resp.headers)
+            if resp.status_code >= 400:
+                # 错误响应不会有列表，按普通请求的规则解析、抛错
+                try:
+                    decoded = self.codec.loads(resp.content)
+                except self.codec.decode_failure:
+                    decoded = resp.text
+                with with_response_headers(resp.headers):
+                    parse_result(resp.status_code, decoded, resp.reason or "")
+                    raise TransportServerError(f"{resp.status_code}, message='{resp.reason}'", resp.status_code)
+            for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                yield from parser.feed(chunk)
+            yield from parser.close()
+            _finish_stream(parser, resp.status_code, resp.reason or "")
+
+    def _observe(self, headers: Any):
+        """把响应头里的限流信息交给限流器"""
+        if self.limiter is not None:
+            self.limiter.observe(headers)
+
+    def _record_response(self, resp: "requests.Response", raw: bytes, operation: Optional[str]):
+        """压缩的响应：记录网络字节数（urllib3 记着从 socket 读了多少）和解压后的字节数"""
+        if self.compressor is None or not resp.headers.get("Content-Encoding"):
+            return
+        wire = getattr(resp.raw, "tell", lambda: 0)() or int(resp.headers.get("Content-Length") or 0)
+        if wire:
+            self.compressor.record_response(operation, wire, len(raw))
+
+    def _post(
+        self,
+        body: Any,
+        headers: Optional[Dict[str, str]],
+        operation: Optional[str] = None,
+    ) -> Tuple[int, Any, str, Any]:
+        """发送 POST，返回 (状态码, 解码后的响应体, 状态描述, 响应头)"""
+        session = self.connect()
+
+        data, headers = _encode_body(self.codec, body, headers, self.compressor, self.accept_encoding, operation)
+        if not self.keep_alive:
+            headers = {**(headers or {}), "Connection": "close"}
+
+        if self.limiter is not None:
+            self.limiter.acquire()
+        resp = session.post(
+            self.url,
+            data=data,
+            headers=headers,
+            timeout=self.timeout,
+            verify=self.verify,
+        )
+        self._observe(resp.headers)
+        raw = resp.content
+        self._record_response(resp, raw, operation)
+        try:
+            decoded = self.codec.loads(raw)
+        except self.codec.decode_failure:
+            decoded = resp.text
+        return resp.status_code, decoded, resp.reason or "", resp.headers
+
+    def close(self):
+        """
+        艹！关闭会话和连接池
+        """
+        with self._lock:
+            session, self.session = self.session, None
+        if session is not None:
+            session.close()
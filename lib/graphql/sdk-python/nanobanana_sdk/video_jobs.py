@@ -0,0 +1,522 @@
+"""
+艹！Nano Banana GraphQL SDK 视频任务跟踪模块
+
+Veo 视频生成走的是 REST：POST /api/v1/video/generate 提交，GET /api/v1/video/status/:task_id 查状态。
+以前大家提交几千个任务之后一个一个 while True: sleep(5); 查状态，
+刚提交的任务查得太慢，跑了五分钟的任务又查得太勤。这个SB模块提供 VideoJobTracker：
+- 每个任务一个可以 await 的 VideoJob（背后是 asyncio.Future），拿到最终状态（completed / failed）
+- 自适应轮询：刚提交时查得勤，processing 期间指数退避，
+  按视频时长（4/6/8 秒）的典型生成耗时，在预计完成的时间点一定会查一次
+- downloading（视频已生成、正在转存）说明马上就好，立刻回到最短间隔
+- 所有任务的状态查询共用一个上限，几千个任务也不会同时打几千个请求
+- 拿到 completed / failed 立刻停止轮询这个任务
+- 配了 WebhookReceiver 时先等 webhook，过了预计完成时间 + webhook_grace 还没来的任务才开始轮询
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from .errors import GraphQLSDKError, network_error, server_error
+
+if TYPE_CHECKING:
+    from .client import GraphQLSDK
+    from .transport import AsyncHTTPTransport
+    from .webhooks import WebhookEvent, WebhookReceiver
+
+
+# 服务端支持的视频时长（秒）
+VIDEO_DURATIONS = (4, 6, 8)
+
+# 到了这两个状态任务就结束了，不用再查
+TERMINAL_STATUSES = ("completed", "failed")
+
+# webhook 比 track() 先到时最多暂存多少条结果
+MAX_UNCLAIMED_WEBHOOKS = 1024
+
+
+@dataclass
+class VideoJobConfig:
+    """
+    视频任务跟踪配置
+
+    老王的参数说明：
+    - initial_interval: 提交后第一次查状态前等多久，也是最短的轮询间隔（秒，默认 2.0）
+    - backoff: 还在 processing 时，每查一次间隔乘多少（默认 1.5）
+    - max_interval: 轮询间隔上限（秒，默认 30.0）
+    - expected_seconds: 各时长视频的典型生成耗时（秒）；没到这个时间点时轮询不会跳过它，
+      过了这个点说明随时可能完成，间隔重新从 initial_interval 开始退避
+    - max_in_flight: 所有任务加起来同时在飞的状态查询数上限（默认 10）
+    - timeout: 单个任务最多跟踪多久（秒，默认 900，0 表示不限制）
+    - max_poll_errors: 状态查询连续出错（网络 / 限流 / 5xx）多少次后放弃这个任务（默认 5）
+    - webhook_grace: 配了 webhook 接收器时，过了典型完成时间多少秒还没收到 webhook 才开始轮询（秒，默认 30.0）
+    """
+    initial_interval: float = 2.0
+    backoff: float = 1.5
+    max_interval: float = 30.0
+    expected_seconds: Dict[int, float] = field(default_factory=lambda: {4: 60.0, 6: 90.0, 8: 120.0})
+    max_in_flight: int = 10
+    timeout: float = 900.0
+    max_poll_errors: int = 5
+    webhook_grace: float = 30.0
+
+    def __post_init__(self):
+        """老王的参数验证"""
+        if self.initial_interval <= 0 or self.max_interval < self.initial_interval:
+            raise ValueError("艹，必须满足 0 < initial_interval <= max_interval！")
+        if self.backoff < 1:
+            raise ValueError("艹，backoff 必须 >= 1！")
+        if any(seconds <= 0 for seconds in self.expected_seconds.values()):
+            raise ValueError("艹，expected_seconds 里的耗时必须 > 0！")
+        if self.max_in_flight < 1:
+            raise ValueError("艹，max_in_flight 必须 >= 1！")
+        if self.timeout < 0:
+            raise ValueError("艹，timeout 必须 >= 0！")
+        if self.max_poll_errors < 1:
+            raise ValueError("艹，max_poll_errors 必须 >= 1！")
+        if self.webhook_grace < 0:
+            raise ValueError("艹，webhook_grace 必须 >= 0！")
+
+    def poll_delay(self, duration: Optional[int], elapsed: float, polls: int, status: str = "processing") -> float:
+        """
+        艹！算下一次查状态前要等多久
+
+        Args:
+            duration: 视频时长（秒，不知道就传 None）
+            elapsed: 任务已经提交了多久（秒）
+            polls: 当前阶段（预计完成时间点之前 / 之后）已经查了几次
+            status: 最近一次查到的状态
+
+        Returns:
+            等待秒数
+        """
+        if status == "downloading":
+            return self.initial_interval  # 视频已经生成了，正在转存，马上就好
+
+        delay = min(self.initial_interval * self.backoff ** polls, self.max_interval)
+        expected = self.expected_seconds.get(duration) if duration is not None else None
+        if expected is not None and elapsed < expected:
+            # 别睡过了典型完成时间：在那个点上一定要查一次
+            delay = min(delay, max(expected - elapsed, self.initial_interval))
+        return delay
+
+
+@dataclass
+class VideoJobStatus:
+    """
+    视频任务的状态（GET /api/v1/video/status/:task_id 的响应）
+
+    - task_id: 任务 ID
+    - status: processing / downloading / completed / failed
+    - video_url / thumbnail_url: 完成后的永久视频地址和缩略图
+    - error_code / error_message: 失败原因（失败的任务服务端已经自动退款）
+    - raw: 原始响应体
+    """
+    task_id: str
+    status: str
+    video_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def done(self) -> bool:
+        """任务是否已经结束"""
+        return self.status in TERMINAL_STATUSES
+
+    @property
+    def ok(self) -> bool:
+        """任务是否成功完成"""
+        return self.status == "completed"
+
+    @classmethod
+    def from_response(cls, body: Dict[str, Any]) -> "VideoJobStatus":
+        """从状态接口的响应体构建"""
+        return cls(
+            task_id=body.get("task_id", ""),
+            status=body.get("status", ""),
+            video_url=body.get("video_url"),
+            thumbnail_url=body.get("thumbnail_url"),
+            error_code=body.get("error_code"),
+            error_message=body.get("error_message"),
+            raw=body,
+        )
+
+    @classmethod
+    def from_webhook(cls, payload: Dict[str, Any]) -> "VideoJobStatus":
+        """从 video.generated / video.failed 的 webhook payload 构建"""
+        error = payload.get("error")
+        return cls(
+            task_id=payload.get("video_id") or payload.get("task_id") or "",
+            status="failed" if error else payload.get("status", ""),
+            video_url=payload.get("url") or payload.get("video_url"),
+            thumbnail_url=payload.get("thumbnail_url"),
+            error_code=payload.get("error_code"),
+            error_message=error or payload.get("error_message"),
+            raw=payload,
+        )
+
+
+@dataclass
+class VideoJobStats:
+    """
+    视频任务跟踪统计
+
+    - submitted: 通过 submit() 提交的任务数
+    - tracking: 还在跟踪的任务数
+    - completed / failed: 结束在 completed / failed 的任务数
+    - errors: 因为查询出错、超时被放弃的任务数
+    - polls: 发出的状态查询数
+    - poll_errors: 出错（之后会重试）的状态查询数
+    - webhooks: 由 webhook 交出结果的任务数
+    - overdue: webhook 迟迟没来、退回轮询的任务数
+    """
+    submitted: int = 0
+    tracking: int = 0
+    completed: int = 0
+    failed: int = 0
+    errors: int = 0
+    polls: int = 0
+    poll_errors: int = 0
+    webhooks: int = 0
+    overdue: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典格式"""
+        return {
+            "submitted": self.submitted,
+            "tracking": self.tracking,
+            "completed": self.completed,
+            "failed": self.failed,
+            "errors": self.errors,
+            "polls": self.polls,
+            "poll_errors": self.poll_errors,
+            "webhooks": self.webhooks,
+            "overdue": self.overdue,
+        }
+
+
+class VideoJob:
+    """
+    艹！一个正在跟踪的视频任务（tracker.submit() / tracker.track() 的返回值）
+
+    可以直接 await，结果是最终的 VideoJobStatus；也可以 asyncio.gather 一堆。
+    cancel() 停止轮询这个任务。
+    """
+
+    def __init__(self, task_id: str, duration: Optional[int], future: "asyncio.Future[VideoJobStatus]"):
+        self.task_id = task_id
+        self.duration = duration
+        self.future = future
+        self.started_at = time.monotonic()
+        self.polls = 0
+        self.past_expected = False
+        self._task: Optional[asyncio.Task] = None
+
+    def __await__(self):
+        return self.future.__await__()
+
+    def done(self) -> bool:
+        """任务是否已经有结果"""
+        return self.future.done()
+
+    def result(self) -> VideoJobStatus:
+        """最终状态（还没结束时抛 asyncio.InvalidStateError）"""
+        return self.future.result()
+
+    def cancel(self) -> bool:
+        """停止跟踪这个任务（服务端的任务不会被取消）"""
+        return self.future.cancel()
+
+    def __repr__(self) -> str:
+        return f"VideoJob(task_id={self.task_id}, done={self.done()})"
+
+
+class VideoJobTracker:
+    """
+    艹！视频任务跟踪器：提交任务，自适应轮询状态，每个任务一个可以 await 的 VideoJob
+
+    使用示例:
+        async with sdk.video_tracker() as tracker:
+            jobs = [await tracker.submit(prompt, duration=8) for prompt in prompts]
+            for status in await asyncio.gather(*jobs):
+                print(status.task_id, status.status, status.video_url)
+
+    await 一个 VideoJob 得到最终的 VideoJobStatus（completed 和 failed 都算正常结束，看 .ok）；
+    认证失败、任务不存在、连续查询出错、超时这些情况抛 GraphQLSDKError。
+    退出 async with（或者 aclose()）时还没结束的任务会被取消。
+    """
+
+    def __init__(
+        self,
+        sdk: "GraphQLSDK",
+        config: Optional[VideoJobConfig] = None,
+        webhook: Optional["WebhookReceiver"] = None,
+    ):
+        """
+        初始化跟踪器
+
+        Args:
+            sdk: GraphQLSDK 实例（需要配置 api_key）
+            config: 跟踪配置（可选，默认用 SDK 配置里的）
+            webhook: webhook 接收器（可选，配了就先等 webhook，超时才轮询）
+        """
+        self.sdk = sdk
+        self.config = config or VideoJobConfig()
+        self.webhook = webhook
+
+        self._jobs: Dict[str, VideoJob] = {}
+        self._stats = VideoJobStats()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._transport: Optional["AsyncHTTPTransport"] = None
+        self._owns_transport = False
+        self._unclaimed: "OrderedDict[str, VideoJobStatus]" = OrderedDict()
+        if webhook is not None:
+            webhook.add_listener(self.handle_webhook)
+
+    async def _connection(self) -> "AsyncHTTPTransport":
+        """sdk.connect() 过就用它的连接池，否则自己开一个，aclose() 时关掉"""
+        if self._transport is None or not self._transport.is_connected:
+            self._transport = self.sdk._connected_async_transport()
+            self._owns_transport = self._transport is None
+            if self._owns_transport:
+                self._transport = self.sdk._new_async_transport()
+                await self._transport.connect()
+            self._slots = asyncio.Semaphore(self.config.max_in_flight)
+        return self._transport
+
+    async def submit(
+        self,
+        prompt: str,
+        aspect_ratio: str = "16:9",
+        resolution: str = "720p",
+        duration: int = 8,
+        generation_mode: str = "text-to-video",
+        **params: Any,
+    ) -> VideoJob:
+        """
+        艹！提交一个视频生成任务并开始跟踪
+
+        Args:
+            prompt: 提示词
+            aspect_ratio: 宽高比（16:9 / 9:16）
+            resolution: 分辨率（720p / 1080p）
+            duration: 时长（4 / 6 / 8 秒）
+            generation_mode: 生成模式（text-to-video / reference-images / first-last-frame）
+            **params: 其他字段（negative_prompt / reference_images / first_frame_url / last_frame_url ...）
+
+        Returns:
+            VideoJob（await 它拿到最终状态）
+
+        Raises:
+            GraphQLSDKError: 提交失败（积分不足、并发任务数超限、参数不对……）
+        """
+        if duration not in VIDEO_DURATIONS:
+            raise ValueError(f"艹，duration 必须是 {' / '.join(map(str, VIDEO_DURATIONS))} 之一！")
+
+        body = {
+            "prompt": prompt,
+            "aspect_ratio": aspect_ratio,
+            "resolution": resolution,
+            "duration": duration,
+            "generation_mode": generation_mode,
+            **params,
+        }
+        result = await self.sdk._rest_async(
+            "POST", "/api/v1/video/generate", body, "VideoGenerate", await self._connection()
+        )
+        task_id = result.get("task_id") if isinstance(result, dict) else None
+        if not task_id:
+            raise server_error(f"艹！提交视频任务的响应里没有 task_id: {str(result)[:200]}")
+
+        self._stats.submitted += 1
+        return self.track(task_id, duration)
+
+    def track(self, task_id: str, duration: Optional[int] = None) -> VideoJob:
+        """
+        艹！跟踪一个已经提交的任务（重复跟踪同一个 task_id 返回同一个 VideoJob）
+
+        Args:
+            task_id: 任务 ID
+            duration: 视频时长（可选，用来估计完成时间）
+
+        Returns:
+            VideoJob（await 它拿到最终状态，cancel() 停止轮询）
+        """
+        job = self._jobs.get(task_id)
+        if job is not None:
+            return job
+
+        job = VideoJob(task_id, duration, asyncio.get_running_loop().create_future())
+        early = self._unclaimed.pop(task_id, None)
+        if early is not None:
+            # webhook 比 track() 还先到，不用跟踪了
+            self._stats.webhooks += 1
+            self._resolve(job, early)
+            return job
+
+        self._jobs[task_id] = job
+        job.future.add_done_callback(lambda _: self._forget(job))
+        job._task = asyncio.ensure_future(self._poll(job))
+        return job
+
+    def handle_webhook(self, event: "WebhookEvent") -> bool:
+        """
+        艹！处理一个 webhook 事件（WebhookReceiver 的监听者）
+
+        Args:
+            event: 校验过签名的 webhook 事件
+
+        Returns:
+            是否是视频任务的结束事件
+        """
+        result = VideoJobStatus.from_webhook(event.payload)
+        if not result.task_id or not result.done:
+            return False
+
+        job = self._jobs.get(result.task_id)
+        if job is None:
+            # 可能是 track() 之前就到了，先存着（只存最近的一批）
+            self._unclaimed[result.task_id] = result
+            while len(self._unclaimed) > MAX_UNCLAIMED_WEBHOOKS:
+                self._unclaimed.popitem(last=False)
+            return True
+
+        if not job.future.done():
+            self._stats.webhooks += 1
+            self._resolve(job, result)
+        return True
+
+    def _webhook_deadline(self, job: VideoJob) -> float:
+        """webhook 最晚该在任务开始后多少秒到（过了就退回轮询）"""
+        expected = self.config.expected_seconds.get(job.duration) if job.duration is not None else None
+        if expected is None:
+            expected = max(self.config.expected_seconds.values(), default=0.0)
+        return expected + self.config.webhook_grace
+
+    async def _poll(self, job: VideoJob):
+        """一个任务的轮询循环：睡 → 查 → 结束了就交出结果，没结束就算下一次间隔"""
+        config = self.config
+        status = "processing"
+        errors = 0
+        delay = config.initial_interval
+        try:
+            if self.webhook is not None:
+                # 先等 webhook；结果到了 _forget 会直接取消这个任务
+                wait = self._webhook_deadline(job) - (time.monotonic() - job.started_at)
+                if config.timeout:
+                    wait = min(wait, config.timeout)
+                await asyncio.sleep(max(wait, 0))
+                self._stats.overdue += 1
+                self.sdk.logger.warning(f"视频任务 {job.task_id} 的 webhook 迟迟没到，改为轮询")
+                job.past_expected = True
+
+            while True:
+                elapsed = time.monotonic() - job.started_at
+                if config.timeout and elapsed + delay > config.timeout:
+                    await asyncio.sleep(max(config.timeout - elapsed, 0))
+                    raise network_error(
+                        f"艹！视频任务 {job.task_id} 跟踪了 {config.timeout}s 还没结束（最后状态: {status}）",
+                        TimeoutError(),
+                    )
+                await asyncio.sleep(delay)
+
+                try:
+                    transport = await self._connection()
+                    async with self._slots:
+                        self._stats.polls += 1
+                        body = await self.sdk._rest_async(
+                            "GET", f"/api/v1/video/status/{job.task_id}", None, "VideoStatus", transport
+                        )
+                except GraphQLSDKError as e:
+                    if not e.is_retryable():
+                        raise
+                    self._stats.poll_errors += 1
+                    errors += 1
+                    if errors >= config.max_poll_errors:
+                        raise
+                    delay = e.rate_limit.wait
+                    if delay is None:
+                        delay = min(config.initial_interval * config.backoff ** errors, config.max_interval)
+                    self.sdk.logger.warning(f"查询视频任务 {job.task_id} 失败，{delay:.1f}s 后重试: {e.message}")
+                    continue
+
+                errors = 0
+                result = VideoJobStatus.from_response(body)
+                if result.done:
+                    self._resolve(job, result)
+                    return
+
+                status = result.status
+                elapsed = time.monotonic() - job.started_at
+                expected = config.expected_seconds.get(job.duration) if job.duration is not None else None
+                if expected is not None and not job.past_expected and elapsed >= expected:
+                    # 过了典型完成时间：随时可能完成，间隔重新从最短开始
+                    job.past_expected = True
+                    job.polls = 0
+                job.polls += 1
+                delay = config.poll_delay(job.duration, elapsed, job.polls, status)
+        except asyncio.CancelledError:
+            raise
+        except GraphQLSDKError as e:
+            self._fail(job, e)
+        except Exception as e:
+            self._fail(job, network_error(f"艹！跟踪视频任务 {job.task_id} 出错: {e}", e))
+
+    def _resolve(self, job: VideoJob, result: VideoJobStatus):
+        """任务结束：交出最终状态"""
+        if job.future.done():
+            return
+        if result.ok:
+            self._stats.completed += 1
+        else:
+            self._stats.failed += 1
+        job.future.set_result(result)
+
+    def _fail(self, job: VideoJob, error: GraphQLSDKError):
+        """任务没法再跟踪了：Future 抛错"""
+        if job.future.done():
+            return
+        self._stats.errors += 1
+        job.future.set_exception(error)
+
+    def _forget(self, job: VideoJob):
+        """Future 结束（包括被调用方取消）：停止轮询"""
+        if self._jobs.get(job.task_id) is job:
+            del self._jobs[job.task_id]
+        if job._task is not None and not job._task.done():
+            job._task.cancel()
+
+    def stats(self) -> VideoJobStats:
+        """获取统计快照"""
+        snapshot = VideoJobStats(**self._stats.to_dict())
+        snapshot.tracking = len(self._jobs)
+        return snapshot
+
+    async def aclose(self):
+        """
+        艹！停止跟踪：还没结束的任务全部取消，自己开的连接池关掉
+        """
+        jobs = list(self._jobs.values())
+        for job in jobs:
+            job.future.cancel()
+        tasks = [job._task for job in jobs if job._task is not None]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.webhook is not None:
+            self.webhook.remove_listener(self.handle_webhook)
+
+        transport, self._transport = self._transport, None
+        if transport is not None and self._owns_transport:
+            await transport.close()
+
+    async def __aenter__(self):
+        await self._connection()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
@@ -0,0 +1,246 @@
+"""
+艹！Nano Banana GraphQL SDK Webhook 接收模块
+
+视频任务完成时平台会按 app/api/webhooks/trigger → webhook-delivery-worker 的流程
+往你登记的 URL 发一个 POST（video.generated / video.failed）。轮询状态最多要晚一个轮询间隔才知道，
+还白白浪费请求。这个SB模块提供一个可选的内嵌 aiohttp 接收器：
+- 按 X-Webhook-Signature / X-Webhook-Signature-Algorithm 校验 HMAC（sha256 / sha512），常量时间比较
+- 签名不对直接 401，不碰 payload
+- 校验通过的事件交给监听者（VideoJobTracker 用它直接交出任务结果，只对 webhook 迟迟不来的任务才轮询）
+
+投递格式（和 lib/workers/webhook-delivery-worker.ts 一致）：
+    POST <url>
+    X-Webhook-Signature: hex(HMAC(secret, body))
+    X-Webhook-Signature-Algorithm: sha256 | sha512
+    X-Webhook-Id / X-Webhook-Timestamp
+    body: JSON.stringify(payload)
+"""
+
+import hashlib
+import hmac
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .codec import JSONCodec, get_codec
+
+try:
+    from aiohttp import web
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+# 投递方支持的签名算法
+SIGNATURE_ALGORITHMS = ("sha256", "sha512")
+
+
+def sign_payload(body: bytes, secret: str, algorithm: str = "sha256") -> str:
+    """
+    艹！按投递方的规则给请求体签名
+
+    Args:
+        body: 原始请求体
+        secret: Webhook 密钥
+        algorithm: sha256 / sha512
+
+    Returns:
+        hex 编码的 HMAC
+    """
+    if algorithm not in SIGNATURE_ALGORITHMS:
+        raise ValueError(f"艹，algorithm 必须是 {' / '.join(SIGNATURE_ALGORITHMS)} 之一！")
+    return hmac.new(secret.encode("utf-8"), body, getattr(hashlib, algorithm)).hexdigest()
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: str, algorithm: Optional[str] = "sha256") -> bool:
+    """
+    艹！校验签名（常量时间比较，不会因为前几位对上了就早退，别想靠计时猜签名）
+
+    Args:
+        body: 原始请求体（必须是收到的原始字节，别先解析再序列化）
+        signature: X-Webhook-Signature
+        secret: Webhook 密钥
+        algorithm: X-Webhook-Signature-Algorithm（没有时按 sha256）
+
+    Returns:
+        签名是否正确
+    """
+    algorithm = algorithm or "sha256"
+    if not signature or algorithm not in SIGNATURE_ALGORITHMS:
+        return False
+    return hmac.compare_digest(sign_payload(body, secret, algorithm), signature.strip().lower())
+
+
+@dataclass
+class WebhookEvent:
+    """
+    一次校验通过的 webhook 投递
+
+    - payload: 事件内容（video.generated: video_id / status / url；video.failed: video_id / error）
+    - webhook_id: X-Webhook-Id
+    - timestamp: X-Webhook-Timestamp（毫秒）
+    - algorithm: 签名算法
+    """
+    payload: Dict[str, Any] = field(default_factory=dict)
+    webhook_id: Optional[str] = None
+    timestamp: Optional[int] = None
+    algorithm: str = "sha256"
+
+
+@dataclass
+class WebhookStats:
+    """
+    Webhook 接收统计
+
+    - received: 收到的投递数
+    - rejected: 签名不对（或者请求体不是 JSON 对象）被拒绝的投递数
+    - delivered: 交给监听者的事件数
+    - matched: 被监听者认领的事件数（比如对上了正在跟踪的任务）
+    """
+    received: int = 0
+    rejected: int = 0
+    delivered: int = 0
+    matched: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典格式"""
+        return {
+            "received": self.received,
+            "rejected": self.rejected,
+            "delivered": self.delivered,
+            "matched": self.matched,
+        }
+
+
+# 监听者：收到事件返回 True 表示认领了（用于统计）
+WebhookListener = Callable[[WebhookEvent], Optional[bool]]
+
+
+class WebhookReceiver:
+    """
+    艹！内嵌的 webhook 接收器（aiohttp.web）
+
+    使用示例:
+        async with WebhookReceiver(secret="whsec_xxx", port=8787) as receiver:
+            print(receiver.url)  # 把这个地址登记成 webhook（公网要自己做端口映射 / 反向代理）
+            async with sdk.video_tracker(webhook=receiver) as tracker:
+                job = await tracker.submit("a cat surfing")
+                status = await job  # webhook 先到就直接交结果，迟迟不来才轮询
+
+    监听者在事件循环里同步调用，别在里面做耗时的事。
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        path: str = "/webhooks/nanobanana",
+        codec: Optional[JSONCodec] = None,
+    ):
+        """
+        初始化接收器
+
+        Args:
+            secret: Webhook 密钥（登记 webhook 时平台生成的那个）
+            host: 监听地址（默认只监听本机）
+            port: 监听端口（默认 0，随机分配，启动后看 receiver.url）
+            path: 接收投递的路径
+            codec: 解码投递内容的 JSON 编解码器（默认 get_codec()，和 SDK 一样自动选最快的）
+        """
+        if not HAS_AIOHTTP:
+            raise ImportError("艹！aiohttp 没有安装！运行: pip install aiohttp")
+        if not secret:
+            raise ValueError("艹，secret 不能为空！")
+        if not path.startswith("/"):
+            raise ValueError("艹，path 必须以 / 开头！")
+
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.path = path
+        self.codec = codec if codec is not None else get_codec()
+
+        self._listeners: List[WebhookListener] = []
+        self._stats = WebhookStats()
+        self._runner: Optional["web.AppRunner"] = None
+
+    @property
+    def url(self) -> str:
+        """接收投递的完整地址（启动后才有实际端口）"""
+        port = self.port
+        if self._runner is not None and self._runner.addresses:
+            port = self._runner.addresses[0][1]
+        return f"http://{self.host}:{port}{self.path}"
+
+    def add_listener(self, listener: WebhookListener):
+        """添加监听者"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: WebhookListener):
+        """移除监听者（不存在就算了）"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    async def _handle(self, request: "web.Request") -> "web.Response":
+        """一次投递：先验签，再解析，再交给监听者"""
+        self._stats.received += 1
+        body = await request.read()
+        algorithm = request.headers.get("X-Webhook-Signature-Algorithm")
+        if not verify_signature(body, request.headers.get("X-Webhook-Signature"), self.secret, algorithm):
+            self._stats.rejected += 1
+            return web.json_response({"error": "INVALID_SIGNATURE"}, status=401)
+
+        try:
+            payload = self.codec.loads(body)
+        except self.codec.decode_failure:
+            payload = None
+        if not isinstance(payload, dict):
+            self._stats.rejected += 1
+            return web.json_response({"error": "INVALID_PAYLOAD"}, status=400)
+
+        timestamp = request.headers.get("X-Webhook-Timestamp")
+        event = WebhookEvent(
+            payload=payload,
+            webhook_id=request.headers.get("X-Webhook-Id"),
+            timestamp=int(timestamp) if timestamp and timestamp.isdigit() else None,
+            algorithm=algorithm or "sha256",
+        )
+        self._stats.delivered += 1
+        if any([listener(event) for listener in list(self._listeners)]):
+            self._stats.matched += 1
+        # 不认识的事件也回 200，不然投递方会一直重试
+        return web.json_response({"received": True})
+
+    def stats(self) -> WebhookStats:
+        """获取统计快照"""
+        return WebhookStats(**self._stats.to_dict())
+
+    async def start(self) -> "WebhookReceiver":
+        """
+        艹！开始监听（幂等）
+
+        Returns:
+            接收器本身
+        """
+        if self._runner is not None:
+            return self
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.host, self.port).start()
+        self._runner = runner
+        return self
+
+    async def stop(self):
+        """
+        艹！停止监听
+        """
+        runner, self._runner = self._runner, None
+        if runner is not None:
+            await runner.cleanup()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
@@ -62,8 +62,18 @@ setup(
             "mypy>=0.991",
             "flake8>=4.0.0",
         ],
+        "fast-json": [
+            "orjson>=3.8.0",
+        ],
+        "compression": [
+            "brotli>=1.0.0",
+            "zstandard>=0.20.0",
+        ],
         "all": [
             "gql[all]>=3.4.0",
+            "orjson>=3.8.0",
+            "brotli>=1.0.0",
+            "zstandard>=0.20.0",
         ],
     },
     keywords=[
@@ -83,6 +83,115 @@ async def run_async_test(name: str, fn):
         print(f"   错误: {error_msg}")
 
 
+class LocalGraphQLServer:
+    """
+    本地 GraphQL 替身服务器（不依赖外网）
+
+    handler(payload, headers) 返回 (status, body_dict) 或 (status, body_dict, 响应头)，
+    默认回显请求体；body 为 None 时不带响应体（用于 304），为 bytes 时原样发送，
+    为生成器时按 chunked 编码边产出边发送（用于 SSE）。
+    gzip 压缩的请求体会先解压。
+    GET 请求会把 URL 参数还原成请求体（variables / extensions 解码 JSON），headers 里带 "method" 和 "path"；
+    HEAD 请求调用同一个 handler，只发响应头。
+    会记录每个请求的客户端地址，方便验证连接复用。
+    """
+
+    def __init__(self, handler=None):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.handler = handler or (lambda payload, headers: (200, {"data": {"echo": payload}}))
+        self.requests = []
+        self.peers = set()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                import json
+
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                if self.headers.get("Content-Encoding") == "gzip":
+                    import gzip
+                    raw = gzip.decompress(raw)
+                self._respond(json.loads(raw) if raw else None, "POST")
+
+            def do_GET(self):
+                import json
+                from urllib.parse import parse_qsl, urlsplit
+
+                payload = dict(parse_qsl(urlsplit(self.path).query))
+                for name in ("variables", "extensions"):
+                    if name in payload:
+                        payload[name] = json.loads(payload[name])
+                self._respond(payload, "GET")
+
+            def do_HEAD(self):
+                self._respond({}, "HEAD")
+
+            def _respond(self, payload, method):
+                import json
+                from urllib.parse import urlsplit
+
+                with server._lock:
+                    server.requests.append(payload)
+                    server.peers.add(self.client_address)
+                status, body, *extra = server.handler(
+                    payload, {**self.headers, "method": method, "path": urlsplit(self.path).path}
+                )
+                headers = extra[0] if extra else {}
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if body is not None and "Content-Type" not in headers:
+                    self.send_header("Content-Type", "application/json")
+
+                if hasattr(body, "__next__"):
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    try:
+                        for chunk in body:
+                            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                            self.wfile.flush()
+                        self.wfile.write(b"0\r\n\r\n")
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass
+                    return
+
+                if isinstance(body, bytes):
+                    data = body
+                else:
+                    data = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if method != "HEAD":
+                    self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/api/graphql"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
 # ============================================================================
 # 测试用例
 # ============================================================================
@@ -334,6 +443,1754 @@ def test_usage_tips():
     run_test("使用建议函数", test_fn)
 
 
+def test_document_cache():
+    """测试11：文档 LRU 缓存和预编译查询"""
+
+    def test_fn():
+        from nanobanana_sdk import DocumentCache, PreparedQuery
+
+        cache = DocumentCache(max_size=2)
+        q1 = "query A { me { id } }"
+        q2 = "query B { me { email } }"
+        q3 = "query C { me { id email } }"
+
+        doc1 = cache.get(q1)
+        assert cache.get(q1) is doc1, "相同文本应返回同一个解析结果"
+        cache.get(q2)
+        cache.get(q3)  # 容量只有 2，q1 应该被淘汰
+
+        stats = cache.stats()
+        assert stats.hits == 1 and stats.misses == 3, f"统计不对: {stats}"
+        assert stats.evictions == 1 and stats.size == 2, f"淘汰不对: {stats}"
+        assert q1 not in cache and q3 in cache
+        print(f"   缓存统计: {stats.to_dict()}")
+
+        sdk = create_sdk("https://httpbin.org/post", "test-token", enable_logging=False)
+        prepared = sdk.prepare(q1)
+        assert isinstance(prepared, PreparedQuery)
+        assert prepared.operation_name == "A"
+        assert sdk._get_document(prepared) is prepared.document
+        assert sdk._get_document(q1) is prepared.document, "prepare 后文本查询应命中缓存"
+        print("   预编译查询复用成功")
+
+        try:
+            sdk.prepare("query {")
+            raise AssertionError("语法错误应抛出 GraphQLSDKError")
+        except GraphQLSDKError:
+            print("   语法错误正确抛出")
+
+    run_test("文档缓存", test_fn)
+
+
+def test_async_connection_pool():
+    """测试12：异步长连接池生命周期"""
+
+    def test_fn():
+        async def body():
+            with LocalGraphQLServer() as server:
+                async with create_sdk(
+                    server.url,
+                    "test-token",
+                    enable_logging=False,
+                    max_connections=4,
+                    keepalive_timeout=15,
+                ) as sdk:
+                    for i in range(5):
+                        result = await sdk.query_async(
+                            "query Q($i: Int) { echo(i: $i) }", {"i": i}
+                        )
+                        assert result["echo"]["variables"] == {"i": i}
+                    transport = sdk._async_transport
+                    assert transport.is_connected, "async with 期间连接池应保持打开"
+
+                assert sdk._async_transport is None, "退出后连接池应已关闭"
+                assert transport.session is None
+                assert len(server.peers) == 1, f"5 个请求应复用 1 个连接，实际 {len(server.peers)}"
+                print(f"   5 个顺序请求共用连接数: {len(server.peers)}")
+
+                await sdk.connect()
+                await sdk.query_async("query { me { id } }")
+                await sdk.aclose()
+                print("   connect()/aclose() 生命周期正常")
+
+        asyncio.run(body())
+
+        # 不显式 connect 时每个请求临时建会话（老行为），跨事件循环也能用
+        with LocalGraphQLServer() as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+            asyncio.run(sdk.query_async("query { me { id } }"))
+            asyncio.run(sdk.query_async("query { me { id } }"))
+            assert len(server.requests) == 2
+            assert sdk._async_transport is None
+            print("   未 connect 时临时会话正常")
+
+            # 在协程外调用 close() 也要能关掉 connect() 打开的连接池
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(sdk.connect())
+            transport = sdk._async_transport
+            sdk.close()
+            loop.close()
+            assert sdk._async_transport is None and transport.session is None, "close() 应释放异步连接池"
+            print("   close() 释放异步连接池正常")
+
+    run_test("异步连接池", test_fn)
+
+
+def test_threaded_sync_transport():
+    """测试13：多线程共享同步连接池"""
+
+    def test_fn():
+        from concurrent.futures import ThreadPoolExecutor
+
+        with LocalGraphQLServer() as server:
+            sdk = create_sdk(
+                server.url,
+                "test-token",
+                enable_logging=False,
+                max_connections_per_host=8,
+            )
+
+            def work(i):
+                result = sdk.query("query Q($i: Int) { echo(i: $i) }", {"i": i})
+                return result["echo"]["variables"]["i"]
+
+            with ThreadPoolExecutor(max_workers=64) as pool:
+                results = list(pool.map(work, range(256)))
+
+            assert results == list(range(256)), "每个线程都应拿到自己的结果"
+            assert len(server.peers) <= 8, f"连接数不应超过单主机上限: {len(server.peers)}"
+            print(f"   64 线程 256 请求，使用连接数: {len(server.peers)}")
+
+            sdk.set_token("rotated-token")
+            sdk.query("query { me { id } }")
+            assert sdk._sync_transport.session is not None, "换 token 不应重建连接池"
+            sdk.close()
+            assert sdk._sync_transport.session is None
+            print("   close() 释放同步连接池正常")
+
+    run_test("多线程同步连接池", test_fn)
+
+
+def test_batch():
+    """测试14：传输层批量请求"""
+
+    def handler(payload, headers):
+        if not isinstance(payload, list):
+            return 200, {"data": {"single": True}}
+        answers = []
+        for op in payload:
+            item_id = (op.get("variables") or {}).get("id")
+            if item_id == "missing":
+                answers.append({"data": {"artwork": None}, "errors": [{"message": "Artwork not found"}]})
+            else:
+                answers.append({"data": {"artwork": {"id": item_id}}})
+        return 200, answers
+
+    def test_fn():
+        from nanobanana_sdk import BatchOperation
+
+        query = "query GetArtwork($id: ID!) { artwork(id: $id, type: \"image\") { id } }"
+        operations = [
+            (query, {"id": "a1"}),
+            {"query": query, "variables": {"id": "missing"}},
+            BatchOperation(query, {"id": "a3"}, "GetArtwork"),
+            "query {",  # 语法错误，不会发出去
+            (query, {"id": "a5"}),
+        ]
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False, max_batch_size=2)
+            results = sdk.batch(operations)
+
+            assert len(results) == 5
+            assert results[0].ok and results[0].data["artwork"]["id"] == "a1"
+            assert not results[1].ok and results[1].data == {"artwork": None}
+            assert results[2].unwrap()["artwork"]["id"] == "a3"
+            assert results[3].error.error_type == GraphQLErrorType.UNKNOWN_ERROR
+            assert results[4].data["artwork"]["id"] == "a5"
+            # 4 个合法操作，每批最多 2 个 → 2 个 HTTP 请求
+            assert len(server.requests) == 2, f"请求数不对: {len(server.requests)}"
+            print(f"   5 个操作（1 个语法错误）→ {len(server.requests)} 个 HTTP 请求")
+
+            async def run_async():
+                async with sdk:
+                    return await sdk.batch_async(operations[:3], max_batch_size=10)
+
+            results = asyncio.run(run_async())
+            assert [r.ok for r in results] == [True, False, True]
+            assert len(server.requests) == 3
+            print("   异步批量请求正常")
+
+    run_test("批量请求", test_fn)
+
+
+def test_dataloader():
+    """测试15：客户端 DataLoader 合并按 ID 查询"""
+
+    def handler(payload, headers):
+        variables = payload.get("variables") or {}
+        data = {}
+        errors = []
+        i = 0
+        while f"k{i}_id" in variables:
+            item_id = variables[f"k{i}_id"]
+            if item_id == "broken":
+                data[f"a{i}"] = None
+                errors.append({"message": "boom", "path": [f"a{i}"]})
+            elif item_id != "missing":
+                data[f"a{i}"] = {"id": item_id, "type": variables.get(f"k{i}_type")}
+            else:
+                data[f"a{i}"] = None
+            i += 1
+        body = {"data": data}
+        if errors:
+            body["errors"] = errors
+        return 200, body
+
+    def test_fn():
+        async def body():
+            with LocalGraphQLServer(handler) as server:
+                async with create_sdk(server.url, enable_logging=False) as sdk:
+                    loader = sdk.loader("artwork", selection="id")
+                    assert sdk.loader("artwork", selection="id") is loader, "同参数应返回同一个实例"
+
+                    ids = ["a1", "a2", "a1", "missing", "a3", "a2"]
+                    results = await asyncio.gather(*[loader.load(i, type="image") for i in ids])
+
+                    assert [r and r["id"] for r in results] == ["a1", "a2", "a1", None, "a3", "a2"]
+                    assert len(server.requests) == 1, f"应只发 1 个请求: {len(server.requests)}"
+                    query = server.requests[0]["query"]
+                    assert "a0: artwork(id: $k0_id, type: $k0_type)" in query
+                    assert len(server.requests[0]["variables"]) == 8, "重复 key 应被去重"
+                    print(f"   6 次 load → 1 个请求，统计: {loader.stats.to_dict()}")
+
+                    users = sdk.loader("user", max_batch_size=2)
+                    got = await users.load_many(["u1", "u2", "u3"])
+                    assert [u["id"] for u in got] == ["u1", "u2", "u3"]
+                    assert len(server.requests) == 3, "3 个 key 每块 2 个 → 2 个请求"
+
+                    ok, bad = await asyncio.gather(
+                        users.load("u9"), users.load("broken"), return_exceptions=True
+                    )
+                    assert ok["id"] == "u9"
+                    assert isinstance(bad, GraphQLSDKError), "出错的别名应只影响自己"
+                    print("   部分失败按别名分发正常")
+
+        asyncio.run(body())
+
+    run_test("DataLoader", test_fn)
+
+
+def test_persisted_queries():
+    """测试16：自动持久化查询（APQ）"""
+
+    def make_handler():
+        known = {}
+
+        def handle_one(op):
+            pq = (op.get("extensions") or {}).get("persistedQuery")
+            query = op.get("query")
+            if pq:
+                if query is not None:
+                    known[pq["sha256Hash"]] = query
+                elif pq["sha256Hash"] not in known:
+                    return {"errors": [{"message": "PersistedQueryNotFound",
+                                        "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}]}
+                query = known[pq["sha256Hash"]]
+            return {"data": {"ran": query, "vars": op.get("variables")}}
+
+        def handler(payload, headers):
+            if isinstance(payload, list):
+                return 200, [handle_one(op) for op in payload]
+            return 200, handle_one(payload)
+
+        return handler
+
+    def test_fn():
+        from nanobanana_sdk import build_manifest
+
+        query = "query GetLeaderboard($limit: Int) { leaderboard(limit: $limit) { userId } }"
+
+        with LocalGraphQLServer(make_handler()) as server:
+            sdk = create_sdk(server.url, enable_logging=False, persisted_queries=True)
+
+            first = sdk.query(query, {"limit": 10})
+            assert first["ran"] == query
+            # 第一次：只发哈希 → NotFound → 带全文重发
+            assert "query" not in server.requests[0] and "query" in server.requests[1]
+
+            second = asyncio.run(sdk.query_async(query, {"limit": 5}))
+            assert second["vars"] == {"limit": 5}
+            assert "query" not in server.requests[2], "注册后应只发哈希"
+            assert len(server.requests) == 3
+
+            stats = sdk.persisted_query_stats()
+            assert stats.not_found == 1 and stats.hash_only == 1
+            assert stats.bytes_saved == len(query.encode("utf-8"))
+            print(f"   APQ 统计: {stats.to_dict()}")
+
+            # 批量：已知的只发哈希，未知的带全文
+            other = "query Other { me { id } }"
+            results = sdk.batch([(query, {"limit": 1}), other])
+            assert all(r.ok for r in results)
+            batch_payload = server.requests[-1]
+            assert "query" not in batch_payload[0] and batch_payload[1]["query"] == other
+            print("   批量请求 APQ 正常")
+
+        # 预先构建的清单：服务端重启丢了哈希，也能自动回退
+        manifest = build_manifest([query])
+        with LocalGraphQLServer(make_handler()) as server:
+            sdk = create_sdk(server.url, enable_logging=False, persisted_query_manifest=manifest)
+            assert sdk.persisted_queries.is_registered(query)
+            results = sdk.batch([(query, {"limit": 2})])
+            assert results[0].ok and results[0].data["ran"] == query
+            assert "query" not in server.requests[0][0] and "query" in server.requests[1][0]
+            print("   清单加载 + 批量 NotFound 回退正常")
+
+    run_test("自动持久化查询", test_fn)
+
+
+def test_normalized_cache():
+    """测试17：规范化响应缓存"""
+
+    def handler(payload, headers):
+        query = payload["query"]
+        assert "__typename" in query, "发送前应补上 __typename"
+        if query.startswith("mutation"):
+            return 200, {"data": {"updateUser": {"__typename": "User", "id": "u1", "displayName": "新名字"}}}
+        user = {"__typename": "User", "id": "u1", "displayName": "老王"}
+        if "avatarUrl" in query:
+            user["avatarUrl"] = "a.png"
+        return 200, {"data": {"me": user}}
+
+    def test_fn():
+        from nanobanana_sdk import NormalizedCacheConfig
+
+        query = "query GetMe { me { id displayName } }"
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(
+                server.url,
+                enable_logging=False,
+                normalized_cache=NormalizedCacheConfig(type_ttls={"User": 300}),
+            )
+
+            first = sdk.query(query)
+            second = asyncio.run(sdk.query_async(query))
+            assert first == second and second["me"]["displayName"] == "老王"
+            assert len(server.requests) == 1, "第二次应该直接命中缓存"
+            assert sdk.normalized_cache.get_entity("User", "u1")["displayName"] == "老王"
+
+            # 缺字段 → 走网络
+            sdk.query("query GetMeFull { me { id displayName avatarUrl } }")
+            assert len(server.requests) == 2
+
+            # 变更返回的实体会更新缓存，之前的查询直接读到新值
+            sdk.mutate('mutation { updateUser(displayName: "新名字") { id displayName } }')
+            assert sdk.query(query)["me"]["displayName"] == "新名字"
+            assert len(server.requests) == 3
+
+            stats = sdk.normalized_cache_stats()
+            assert stats.hits == 2 and stats.misses == 2 and stats.entities == 2
+            print(f"   缓存统计: {stats.to_dict()}")
+
+        # TTL 过期 + 内存预算淘汰
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(
+                server.url,
+                enable_logging=False,
+                normalized_cache=NormalizedCacheConfig(type_ttls={"Query": 0.05}),
+            )
+            sdk.query(query)
+            time.sleep(0.1)
+            sdk.query(query)
+            assert len(server.requests) == 2 and sdk.normalized_cache_stats().expired == 1
+
+            sdk.normalized_cache.config.max_bytes = 1
+            sdk.query("query GetMeFull { me { id displayName avatarUrl } }")
+            assert sdk.normalized_cache_stats().evictions >= 1
+            print("   TTL 过期和内存淘汰正常")
+
+        # 提供 schema 时自动补 id
+        from nanobanana_sdk import NormalizedCache
+        cache = NormalizedCache(NormalizedCacheConfig(
+            schema="type Query { me: User } type User { id: ID! displayName: String }"
+        ))
+        from gql import gql as parse
+        _, text = cache.transform(parse("{ me { displayName } }"))
+        assert "id" in text.split() and "__typename" in text
+        print("   schema 补 id 正常")
+
+    run_test("规范化响应缓存", test_fn)
+
+
+def test_single_flight():
+    """测试18：单飞去重"""
+
+    def handler(payload, headers):
+        time.sleep(0.2)  # 让并发请求都赶上同一趟
+        return 200, {"data": {"leaderboard": [{"userId": "u1", "vars": payload.get("variables")}]}}
+
+    def test_fn():
+        from concurrent.futures import ThreadPoolExecutor
+
+        query = "query Leaderboard($limit: Int) { leaderboard(limit: $limit) { userId } }"
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+
+            # 多线程：同一个查询只发一次
+            with ThreadPoolExecutor(max_workers=20) as pool:
+                results = list(pool.map(lambda _: sdk.query(query, {"limit": 10}), range(20)))
+            assert len(server.requests) == 1, f"应该只发 1 个请求，实际 {len(server.requests)}"
+            assert all(r is results[0] for r in results), "应该共享同一份解析结果"
+
+            # 异步：200 个任务，两组变量 → 2 个请求
+            async def fan_out():
+                return await asyncio.gather(*[
+                    sdk.query_async(query, {"limit": i % 2}) for i in range(200)
+                ])
+
+            results = asyncio.run(fan_out())
+            assert len(server.requests) == 3
+            assert results[0]["leaderboard"][0]["vars"] == {"limit": 0}
+            assert results[1]["leaderboard"][0]["vars"] == {"limit": 1}
+
+            stats = sdk.single_flight_stats()
+            assert stats.flights == 3 and stats.collapsed == 19 + 198 and stats.in_flight == 0
+            print(f"   单飞统计: {stats.to_dict()}")
+
+            # 变更永远不合并
+            mutation = "mutation Like { likeArtwork(id: \"a1\") { id } }"
+            with ThreadPoolExecutor(max_workers=5) as pool:
+                list(pool.map(lambda _: sdk.mutate(mutation), range(5)))
+            assert len(server.requests) == 8
+            print("   变更没有被合并")
+
+        # 关闭单飞后每个调用都发请求
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False, single_flight=False)
+
+            async def fan_out():
+                await asyncio.gather(*[sdk.query_async(query) for _ in range(5)])
+
+            asyncio.run(fan_out())
+            assert len(server.requests) == 5
+
+    run_test("单飞去重", test_fn)
+
+
+def test_get_conditional_requests():
+    """测试19：GET 查询 + ETag 条件请求"""
+
+    state = {"version": 1}
+
+    def handler(payload, headers):
+        if headers["method"] == "POST":
+            return 200, {"data": {"likeArtwork": {"id": "a1"}}}
+        etag = f'"v{state["version"]}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        body = {"data": {"featuredArtworks": [{"id": "a1", "version": state["version"]}]}}
+        return 200, body, {"ETag": etag, "Cache-Control": "public, max-age=60"}
+
+    def test_fn():
+        query = "query Featured($limit: Int) { featuredArtworks(limit: $limit) { id } }"
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False, use_get_for_queries=True)
+
+            first = sdk.query(query, {"limit": 5})
+            assert server.requests[0]["query"] == query
+            assert server.requests[0]["variables"] == {"limit": 5}
+
+            # 第二次：带 If-None-Match → 304 → 直接返回存储的数据
+            second = sdk.query(query, {"limit": 5})
+            third = asyncio.run(sdk.query_async(query, {"limit": 5}))
+            assert first is second is third
+
+            # 服务端数据变了 → 200 → 拿到新数据
+            state["version"] = 2
+            fourth = sdk.query(query, {"limit": 5})
+            assert fourth["featuredArtworks"][0]["version"] == 2
+
+            stats = sdk.http_cache_stats()
+            assert stats.requests == 4 and stats.not_modified == 2 and stats.stored == 1
+            assert stats.bytes_saved > 0
+            print(f"   条件请求统计: {stats.to_dict()}")
+
+            # 变更永远 POST；URL 太长的查询也改用 POST
+            sdk.mutate('mutation { likeArtwork(id: "a1") { id } }')
+            assert "likeArtwork" in server.requests[-1]["query"]
+            sdk.config.max_get_url_length = 10
+            sdk.query(query, {"limit": 5})
+            assert sdk.http_cache_stats().requests == 4
+            print("   变更和超长 URL 走 POST")
+
+        # APQ + GET：只把哈希编码进 URL
+        from nanobanana_sdk import build_manifest
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(
+                server.url,
+                enable_logging=False,
+                use_get_for_queries=True,
+                persisted_query_manifest=build_manifest([query]),
+            )
+            sdk.query(query)
+            request = server.requests[0]
+            assert "query" not in request and request["extensions"]["persistedQuery"]["sha256Hash"]
+            print("   APQ 哈希走 GET")
+
+    run_test("GET 条件请求", test_fn)
+
+
+def test_compression():
+    """测试20：请求/响应压缩"""
+
+    def handler(payload, headers):
+        import gzip
+        import json
+
+        body = {"data": {"received": len(payload["variables"]["input"]["content"]),
+                         "encoding": headers.get("Content-Encoding")}}
+        if "gzip" in headers.get("Accept-Encoding", ""):
+            body["data"]["artworks"] = [{"id": str(i), "prompt": "a banana " * 20} for i in range(50)]
+            return 200, gzip.compress(json.dumps(body).encode("utf-8")), {"Content-Encoding": "gzip"}
+        return 200, body
+
+    def test_fn():
+        from nanobanana_sdk import CompressionConfig
+
+        mutation = "mutation CreatePost($input: CreateBlogPostInput!) { createBlogPost(input: $input) { id } }"
+        big = {"input": {"content": "老王的长文章 " * 500}}
+        small = {"input": {"content": "短"}}
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(
+                server.url,
+                enable_logging=False,
+                compression=CompressionConfig(algorithm="gzip", threshold=1024),
+            )
+
+            result = sdk.mutate(mutation, big, operation_name="CreatePost")
+            assert result["encoding"] == "gzip" and result["received"] == len(big["input"]["content"])
+            assert len(result["artworks"]) == 50, "压缩的响应应该被自动解压"
+
+            result = asyncio.run(sdk.mutate_async(mutation, small, operation_name="CreatePostSmall"))
+            assert result["encoding"] is None, "小于阈值的请求不压缩"
+
+            stats = sdk.compression_stats()
+            big_stats, small_stats = stats["CreatePost"], stats["CreatePostSmall"]
+            assert big_stats.compressed == 1 and big_stats.sent_bytes < big_stats.request_bytes
+            assert big_stats.response_wire_bytes < big_stats.response_bytes
+            assert small_stats.compressed == 0 and small_stats.sent_bytes == small_stats.request_bytes
+            assert small_stats.response_wire_bytes < small_stats.response_bytes, "异步传输也要统计响应"
+            print(f"   CreatePost: {big_stats.to_dict()}")
+
+        # 不配置压缩时不发 Content-Encoding，统计为空
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+            assert sdk.mutate(mutation, big)["encoding"] is None
+            assert sdk.compression_stats() == {}
+
+        try:
+            CompressionConfig(algorithm="lz4")
+            assert False, "应该拒绝不支持的算法"
+        except ValueError:
+            pass
+
+    run_test("请求/响应压缩", test_fn)
+
+
+def test_json_codec():
+    """测试21：可插拔 JSON 编解码"""
+
+    def test_fn():
+        from nanobanana_sdk import GraphQLErrorType, GraphQLSDKError, JSONCodec, available_codecs, get_codec
+
+        payload = {"query": "{ me { id } }", "variables": {"prompt": "香蕉 🍌", "n": 1.5, "ok": True}}
+        for name, ok in available_codecs().items():
+            if not ok:
+                continue
+            codec = get_codec(name)
+            encoded = codec.dumps(payload)
+            assert isinstance(encoded, bytes), f"{name} 应该直接编码成 bytes"
+            assert codec.loads(encoded) == payload and codec.loads(encoded.decode("utf-8")) == payload
+            try:
+                codec.loads(b"not json")
+                assert False, "解码失败应该抛 ValueError"
+            except ValueError:
+                pass
+        print(f"   可用编解码器: {available_codecs()}，auto 选中 {get_codec().name}")
+
+        class CountingCodec(JSONCodec):
+            name = "counting"
+
+            def __init__(self):
+                self.inner = get_codec("json")
+                self.calls = {"dumps": 0, "loads": 0}
+
+            def dumps(self, obj, pretty=False):
+                self.calls["dumps"] += 1
+                return self.inner.dumps(obj, pretty)
+
+            def loads(self, data):
+                self.calls["loads"] += 1
+                return self.inner.loads(data)
+
+        codec = CountingCodec()
+        with LocalGraphQLServer() as server:
+            sdk = create_sdk(server.url, enable_logging=False, json_codec=codec)
+            echoed = sdk.query("query Echo($n: Int) { echo }", {"n": 1})
+            asyncio.run(sdk.query_async("query Echo($n: Int) { echo }", {"n": 2}))
+            assert echoed["echo"]["variables"] == {"n": 1}
+            assert codec.calls == {"dumps": 2, "loads": 2}, codec.calls
+            print("   自定义编解码器被同步和异步传输使用")
+
+        try:
+            GraphQLSDKConfig(endpoint="https://api.example.com/graphql", json_codec="simdjson")
+            assert False, "应该拒绝不认识的编解码器"
+        except ValueError:
+            pass
+
+        # 少实现 loads 的编解码器：实例化就报错，传类本身给配置也报错，不会拖到请求里才炸
+        class EncodeOnlyCodec(JSONCodec):
+            def dumps(self, obj, pretty=False):
+                return b"{}"
+
+        incomplete = (
+            EncodeOnlyCodec,
+            lambda: GraphQLSDKConfig(endpoint="https://api.example.com/graphql", json_codec=CountingCodec),
+        )
+        for make in incomplete:
+            try:
+                make()
+                assert False, "不完整的编解码器应该马上报错"
+            except (TypeError, ValueError):
+                pass
+
+        # 解码失败抛的不是 ValueError 的编解码器：声明了 decode_errors，每条响应路径都要转成 GraphQLSDKError
+        class DecodeError(Exception):
+            pass
+
+        class StrictCodec(CountingCodec):
+            name = "strict"
+            decode_errors = (DecodeError,)
+
+            def loads(self, data):
+                try:
+                    return super().loads(data)
+                except ValueError:
+                    raise DecodeError(data) from None
+
+        def broken(payload, headers):
+            if "Broken" in payload["query"]:
+                return 502, b"<html>Bad Gateway</html>"
+            return 200, b'{"data": {"videos": [{"id": "v1"}, {"id": tru}]}}'
+
+        with LocalGraphQLServer(broken) as server:
+            sdk = create_sdk(server.url, enable_logging=False, json_codec=StrictCodec())
+            # 502 的 HTML 错误页要按状态码报服务器错误（可重试），流里解不开的元素按响应格式错误报
+            calls = (
+                (lambda: sdk.query("query Broken { me { id } }"), GraphQLErrorType.SERVER_ERROR),
+                (lambda: asyncio.run(sdk.query_async("query Broken { me { id } }")), GraphQLErrorType.SERVER_ERROR),
+                (lambda: list(sdk.stream_query("query V { videos { id } }", path="videos")), GraphQLErrorType.VALIDATION_ERROR),
+            )
+            for call, error_type in calls:
+                try:
+                    call()
+                    assert False, "解码失败应该报错"
+                except GraphQLSDKError as e:
+                    assert e.error_type == error_type, e
+                    assert not isinstance(e.original_error, DecodeError), "编解码器的异常不能原样漏出来"
+        print("   编解码器声明的 decode_errors 在普通请求和流式请求里都转成了 GraphQLSDKError")
+
+    run_test("JSON 编解码", test_fn)
+
+
+def test_stream_query():
+    """测试22：大列表流式解码"""
+
+    def test_fn():
+        import json
+        import random
+        from gql.transport.exceptions import TransportProtocolError
+        from nanobanana_sdk import StreamingListParser
+
+        # 随机切块喂给解析器，结果必须和整体解码一致
+        artworks = [{"id": str(i), "prompt": f"香蕉 \"{i}\" ]}},[{{", "tags": [{"a": [i]}], "n": None} for i in range(50)]
+        body = json.dumps({"data": {"user": {"name": "老王", "artworks": artworks}}, "extensions": {"x": 1}}).encode()
+        rng = random.Random(7)
+        for _ in range(50):
+            parser = StreamingListParser(["data", "user", "artworks"])
+            items, pos = [], 0
+            while pos < len(body):
+                step = rng.randint(1, 64)
+                items += parser.feed(body[pos:pos + step])
+                pos += step
+            items += parser.close()
+            assert items == artworks and parser.found
+        print("   随机切块 50 次，元素和整体解码一致")
+
+        parser = StreamingListParser(["data", "artworks"])
+        parser.feed(body[:100])
+        try:
+            parser.close()
+            assert False, "响应不完整应该抛错"
+        except TransportProtocolError:
+            pass
+
+        videos = [{"id": str(i), "status": "completed"} for i in range(20)]
+
+        def handler(payload, headers):
+            if "Broken" in payload["query"]:
+                return 200, {"data": {"videos": videos[:2]}, "errors": [{"message": "部分视频加载失败"}]}
+            return 200, {"data": {"videos": videos}}
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+            streamed = list(sdk.stream_query("query V { videos { id status } }", path="videos"))
+            assert streamed == videos
+
+            async def collect():
+                return [video async for video in sdk.stream_query("query V { videos { id status } }", path="videos")]
+
+            assert asyncio.run(collect()) == videos
+            print("   同步 / 异步各收到 20 个元素")
+
+            received = []
+            try:
+                for video in sdk.stream_query("query Broken { videos { id } }", path="videos"):
+                    received.append(video)
+                assert False, "GraphQL 错误应该在流结束后抛出"
+            except GraphQLSDKError as e:
+                assert "部分视频加载失败" in str(e), e
+            assert received == videos[:2], "出错前已经收到的元素照样交出去"
+            print("   GraphQL 错误在交出已有元素之后抛出")
+
+    run_test("流式解码", test_fn)
+
+
+def test_iter_connection():
+    """测试23：Relay Connection 自动翻页 + 预取"""
+
+    def test_fn():
+        query = """
+            query Artworks($first: Int, $after: String, $type: String) {
+                artworksConnection(first: $first, after: $after, type: $type) {
+                    edges { cursor node { id } }
+                    pageInfo { endCursor hasNextPage }
+                }
+            }
+        """
+        artworks = [{"id": f"a{i}"} for i in range(25)]
+
+        def handler(payload, headers):
+            variables = payload["variables"]
+            start = int(variables["after"] or 0)
+            end = start + variables["first"]
+            if "Stuck" in payload["query"]:
+                end = start
+            page = artworks[start:end]
+            return 200, {"data": {"artworksConnection": {
+                "edges": [{"cursor": str(start + i + 1), "node": node} for i, node in enumerate(page)],
+                "pageInfo": {"endCursor": str(end) if page else None, "hasNextPage": end < len(artworks)},
+            }}}
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+
+            seen = []
+            in_flight_at_page_end = None
+            for artwork in sdk.iter_connection(query, "artworksConnection", page_size=10, variables={"type": "image"}):
+                seen.append(artwork)
+                if len(seen) == 10:
+                    time.sleep(0.2)  # 调用方处理第一页的时候，第二页应该已经在请求了
+                    in_flight_at_page_end = len(server.requests)
+            assert seen == artworks
+            assert in_flight_at_page_end == 2, f"第二页应该被预取: {in_flight_at_page_end}"
+            assert all(r["variables"]["type"] == "image" for r in server.requests)
+            print(f"   同步翻了 {len(server.requests)} 页，处理第一页时第二页已经发出")
+
+            server.requests.clear()
+            iterator = sdk.iter_connection(query, "artworksConnection", page_size=10, prefetch=False)
+            for artwork in iterator:
+                if artwork["id"] == "a9":
+                    time.sleep(0.1)
+                    assert len(server.requests) == 1, "关掉预取就不应该提前请求"
+            assert iterator.pages == 3
+
+            async def collect():
+                return [node async for node in sdk.iter_connection(query, "artworksConnection", page_size=7)]
+
+            assert asyncio.run(collect()) == artworks
+            print("   异步 async for 收齐 25 个 node")
+
+            try:
+                list(sdk.iter_connection(query.replace("Artworks(", "Stuck("), "artworksConnection", page_size=5))
+                assert False, "游标不前进应该报错而不是死循环"
+            except GraphQLSDKError:
+                pass
+
+    run_test("Relay 分页", test_fn)
+
+
+def test_iter_pages():
+    """测试24：limit/offset 并发翻页"""
+
+    def test_fn():
+        import threading
+
+        query = "query Artworks($limit: Int, $offset: Int) { artworks(limit: $limit, offset: $offset) { id } }"
+        state = {"total": 95, "in_flight": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def handler(payload, headers):
+            with lock:
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+            time.sleep(0.05)
+            variables = payload["variables"]
+            offset, limit = variables["offset"], variables["limit"]
+            page = [{"id": f"a{i}"} for i in range(offset, min(offset + limit, state["total"]))]
+            with lock:
+                state["in_flight"] -= 1
+            return 200, {"data": {"artworks": page}}
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+
+            start = time.time()
+            iterator = sdk.iter_pages(query, "artworks", page_size=10, concurrency=4)
+            ids = [artwork["id"] for artwork in iterator]
+            elapsed = time.time() - start
+            assert ids == [f"a{i}" for i in range(95)], "必须按顺序、不重复、不漏"
+            assert state["peak"] == 4, f"应该有 4 个请求同时在飞: {state['peak']}"
+            assert iterator.pages == 10 and iterator.overshoot == 3, (iterator.pages, iterator.overshoot)
+            print(f"   同步 95 条 / 10 页，峰值并发 {state['peak']}，耗时 {elapsed:.2f}s")
+
+            assert state["in_flight"] == 0, "迭代结束后不能还有页请求在后台跑"
+
+            # 正好整页的时候，靠一个空页收尾
+            state["total"], state["peak"] = 100, 0
+
+            async def collect():
+                return [a["id"] async for a in sdk.iter_pages(query, "artworks", page_size=10, concurrency=3)]
+
+            assert asyncio.run(collect()) == [f"a{i}" for i in range(100)]
+            assert state["peak"] == 3, f"应该有 3 个请求同时在飞: {state['peak']}"
+            print("   异步 100 条（整页 + 空页收尾），峰值并发 3")
+
+        try:
+            sdk.iter_pages(query, "artworks", page_size=500)
+            assert False, "page_size 超过服务端上限应该报错"
+        except ValueError:
+            pass
+
+    run_test("并发翻页", test_fn)
+
+
+def test_execute_many():
+    """测试25：有界并发批量执行"""
+
+    def test_fn():
+        import itertools
+        import threading
+
+        state = {"in_flight": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def handler(payload, headers):
+            n = payload["variables"]["n"]
+            with lock:
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+            time.sleep(0.01 * (n % 5))
+            with lock:
+                state["in_flight"] -= 1
+            if n % 7 == 3:
+                return 200, {"data": None, "errors": [{"message": f"第 {n} 个炸了"}]}
+            return 200, {"data": {"square": n * n}}
+
+        query = "query Square($n: Int!) { square(n: $n) }"
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+
+            async def run():
+                pulled = []
+
+                def inputs():
+                    for n in itertools.count():  # 无限输入，只拉需要的
+                        pulled.append(n)
+                        yield {"n": n}
+
+                results = []
+                async for result in sdk.execute_many(query, inputs(), concurrency=4):
+                    results.append(result)
+                    if len(results) == 30:
+                        break
+                assert len(pulled) <= 30 + 4, f"输入应该是惰性拉取的: {len(pulled)}"
+                assert state["peak"] <= 4, f"并发超限: {state['peak']}"
+                await asyncio.sleep(0.1)  # 等 break 时取消掉的请求在服务端跑完
+                state["peak"] = 0
+
+                ordered = [r async for r in sdk.execute_many(query, ({"n": n} for n in range(20)), 5, ordered=True)]
+                return results, ordered
+
+            results, ordered = asyncio.run(run())
+            assert state["peak"] <= 5, f"并发超限: {state['peak']}"
+            assert len(results) == 30 and len({r.index for r in results}) == 30
+            assert [r.index for r in ordered] == list(range(20)), "ordered=True 必须保持输入顺序"
+            failed = [r for r in ordered if not r.ok]
+            assert [r.variables["n"] for r in failed] == [3, 10, 17]
+            assert all(isinstance(r.error, GraphQLSDKError) for r in failed)
+            assert all(r.unwrap()["square"] == r.index ** 2 for r in ordered if r.ok)
+            print(f"   无限输入取 30 个后停止，峰值并发 {state['peak']}，单条失败不中断整批")
+
+    run_test("有界并发批量执行", test_fn)
+
+
+def test_map_query():
+    """测试26：线程池批量执行"""
+
+    def test_fn():
+        import threading
+
+        def handler(payload, headers):
+            n = payload["variables"]["n"]
+            time.sleep(0.3 if n == 5 else 0.02)
+            if n == 7:
+                return 200, {"data": None, "errors": [{"message": "第 7 个炸了"}]}
+            return 200, {"data": {"square": n * n}}
+
+        query = "query Square($n: Int!) { square(n: $n) }"
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+
+            pulled = []
+
+            def inputs():
+                for n in range(1000):
+                    pulled.append(n)
+                    yield {"n": n}
+
+            results = sdk.map_query(query, inputs(), workers=4, chunksize=2, timeout=0.15)
+            first = [next(results) for _ in range(10)]
+            assert len(pulled) <= 10 + 4 * 2, f"输入应该按需拉取: {len(pulled)}"
+            results.close()
+
+            assert [r.index for r in first] == list(range(10)), "必须保持输入顺序"
+            assert first[5].error is not None and first[5].error.error_type == GraphQLErrorType.NETWORK_ERROR
+            assert first[7].error is not None and "第 7 个炸了" in str(first[7].error)
+            assert all(r.data["square"] == r.index ** 2 for r in first if r.index not in (5, 7))
+            print(f"   取 10 个只拉了 {len(pulled)} 条输入，超时和 GraphQL 错误都作为结果返回")
+
+            start = time.time()
+            squares = [r.unwrap()["square"] for r in sdk.map_query(query, ({"n": n} for n in range(10, 30)), workers=8)]
+            elapsed = time.time() - start
+            assert squares == [n * n for n in range(10, 30)]
+            assert elapsed < 20 * 0.02, f"8 个线程应该比顺序执行快: {elapsed:.2f}s"
+            print(f"   20 条 / 8 线程耗时 {elapsed:.2f}s（顺序执行至少 0.40s）")
+
+        # 块里第一条卡死：后面排在同一个块里的也不能跟着无限等
+        release = threading.Event()
+
+        def hung(payload, headers):
+            if payload["variables"]["n"] == 0:
+                release.wait(5)
+            return 200, {"data": {"square": payload["variables"]["n"] ** 2}}
+
+        with LocalGraphQLServer(hung) as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+            start = time.time()
+            results = list(sdk.map_query(query, ({"n": n} for n in range(4)), workers=1, chunksize=2, timeout=0.2))
+            elapsed = time.time() - start
+            release.set()
+            assert [r.index for r in results] == [0, 1, 2, 3]
+            assert all(r.error.error_type == GraphQLErrorType.NETWORK_ERROR for r in results[:2]), results[:2]
+            assert elapsed < 2, f"卡住的请求不能把整批拖死: {elapsed:.2f}s"
+            print(f"   块里第一条卡死，同块的下一条等 0.2s 没轮到也按超时返回（{elapsed:.2f}s）")
+
+    run_test("线程池批量执行", test_fn)
+
+
+def test_subscriptions():
+    """测试27：SSE 订阅"""
+
+    def test_fn():
+        import json
+        import random
+        from nanobanana_sdk import SSEParser, SubscriptionConfig
+
+        stream = (
+            b"\xef\xbb\xbf: ping\r\n\r\n"
+            b"retry: 1500\nid: 1\nevent: next\ndata: {\"a\":\r\ndata: 1}\n\n"
+            b"id: 2\revent: next\rdata: x\r\r"
+            b"event: complete\ndata:\n\n"
+        )
+        rng = random.Random(3)
+        for _ in range(50):
+            parser, events, pos = SSEParser(), [], 0
+            while pos < len(stream):
+                step = rng.randint(1, 7)
+                events += parser.feed(stream[pos:pos + step])
+                pos += step
+            assert [(e.event, e.data, e.id) for e in events] == [
+                ("next", '{"a":\n1}', "1"), ("next", "x", "2"), ("complete", "", "2"),
+            ], events
+            assert parser.retry == 1500 and parser.last_event_id == "2"
+        print("   SSE 解析器随机切块 50 次结果一致（BOM / 注释 / \\r\\n / \\r / 多行 data）")
+
+        def sse(post_id):
+            payload = {"data": {"newBlogPost": {"id": post_id}}}
+            return f"id: {post_id}\nevent: next\ndata: {json.dumps(payload)}\n\n".encode()
+
+        def handler(payload, headers):
+            last_id = {k.lower(): v for k, v in headers.items()}.get("last-event-id")
+            sse_headers = {"Content-Type": "text/event-stream"}
+
+            def events():
+                if "Broken" in payload["query"]:
+                    yield b'event: next\ndata: {"data": null, "errors": [{"message": "no access"}]}\n\n'
+                    return
+                if last_id is None:
+                    yield b":\n\n"
+                    yield sse("p1")
+                    yield sse("p2")
+                    if "Stall" in payload["query"]:
+                        time.sleep(1.0)  # 卡住不发心跳
+                    return  # 不发 complete 就断开
+                assert last_id == "p2", last_id
+                yield sse("p3")
+                yield b"event: complete\ndata:\n\n"
+
+            return 200, events(), sse_headers
+
+        config = SubscriptionConfig(initial_delay=0.05, heartbeat_timeout=0.3, max_reconnects=2)
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False, subscription_config=config)
+
+            async def collect(query):
+                subscription = sdk.subscribe(query)
+                ids = [event["newBlogPost"]["id"] async for event in subscription]
+                return ids, subscription
+
+            ids, subscription = asyncio.run(collect("subscription { newBlogPost { id } }"))
+            assert ids == ["p1", "p2", "p3"] and subscription.reconnects == 1
+            assert subscription.last_event_id == "p3"
+            print("   服务端断开后带 Last-Event-ID 重连，事件不重复不丢")
+
+            start = time.time()
+            ids, subscription = asyncio.run(collect("subscription Stall { newBlogPost { id } }"))
+            assert ids == ["p1", "p2", "p3"] and subscription.reconnects == 1
+            assert time.time() - start < 0.9, "心跳超时应该比服务端卡住的时间先触发"
+            print("   心跳超时后主动重连")
+
+            try:
+                asyncio.run(collect("subscription Broken { newBlogPost { id } }"))
+                assert False, "推送里的 GraphQL 错误应该抛出来"
+            except GraphQLSDKError as e:
+                assert e.graphql_errors and e.graphql_errors[0]["message"] == "no access"
+
+    run_test("SSE 订阅", test_fn)
+
+
+def test_subscription_hub():
+    """测试28：共享订阅扇出"""
+
+    def test_fn():
+        import json
+        from nanobanana_sdk import SlowConsumerError
+
+        def handler(payload, headers):
+            def events():
+                time.sleep(0.1)  # 等所有消费者都挂上来
+                for i in range(10):
+                    data = json.dumps({"data": {"newBlogPost": {"id": f"p{i}"}}})
+                    yield f"id: {i}\nevent: next\ndata: {data}\n\n".encode()
+                    time.sleep(0.02)
+                yield b"event: complete\ndata:\n\n"
+
+            return 200, events(), {"Content-Type": "text/event-stream"}
+
+        query = "subscription { newBlogPost { id } }"
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False)
+
+            async def consume(delay=0.0, **kwargs):
+                ids = []
+                async for event in sdk.subscribe_shared(query, **kwargs):
+                    ids.append(event["newBlogPost"]["id"])
+                    await asyncio.sleep(delay)
+                return ids
+
+            async def disconnected():
+                try:
+                    await consume(0.1, queue_size=2, overflow="disconnect")
+                    return False
+                except SlowConsumerError:
+                    return True
+
+            async def run():
+                return await asyncio.gather(
+                    *[consume() for _ in range(5)],
+                    consume(0.1, queue_size=2),
+                    disconnected(),
+                )
+
+            *fast, slow, was_disconnected = asyncio.run(run())
+            expected = [f"p{i}" for i in range(10)]
+            assert len(server.requests) == 1, f"7 个消费者应该只开一条上游连接: {len(server.requests)}"
+            assert all(ids == expected for ids in fast)
+            assert len(slow) < 10 and slow[-1] == "p9", f"慢消费者应该丢掉旧事件、留下最新的: {slow}"
+            assert was_disconnected, "disconnect 策略应该断开慢消费者"
+
+            stats = sdk.subscription_hub_stats()
+            assert stats.upstreams == 0 and stats.consumers == 0
+            assert stats.events == 10 and stats.dropped > 0 and stats.disconnected == 1
+            print(f"   7 个消费者共用 1 条连接，慢消费者收到 {len(slow)}/10，统计: {stats.to_dict()}")
+
+    run_test("共享订阅扇出", test_fn)
+
+
+def test_video_tracker():
+    """测试29：视频任务跟踪（自适应轮询 + 状态查询并发上限）"""
+
+    def test_fn():
+        import threading
+        import uuid
+        from nanobanana_sdk import GraphQLSDKError, VideoJobConfig
+
+        # 轮询间隔：刚开始快、processing 期间退避、在典型完成时间点一定查一次、downloading 回到最短
+        config = VideoJobConfig(initial_interval=2, backoff=2, max_interval=30, expected_seconds={8: 60})
+        assert config.poll_delay(8, elapsed=10, polls=3) == 16
+        assert config.poll_delay(8, elapsed=55, polls=3) == 5, "不能睡过典型完成时间"
+        assert config.poll_delay(8, elapsed=70, polls=0) == 2
+        assert config.poll_delay(8, elapsed=10, polls=5, status="downloading") == 2
+        assert config.poll_delay(None, elapsed=10, polls=10) == 30
+
+        lock = threading.Lock()
+        jobs = {}
+        polls = {}
+        in_flight = [0, 0]  # 当前, 峰值
+
+        def handler(payload, headers):
+            if headers.get("x-api-key") != "test-key":
+                return 401, {"error": "Invalid API key"}
+            path = headers["path"]
+            if path == "/api/v1/video/generate":
+                task_id = str(uuid.uuid4())
+                with lock:
+                    jobs[task_id] = payload["prompt"]
+                return 200, {"success": True, "task_id": task_id, "status": "processing"}
+
+            task_id = path.rsplit("/", 1)[-1]
+            with lock:
+                if task_id not in jobs:
+                    return 404, {"error": "TASK_NOT_FOUND", "message": f"Task with ID {task_id} not found"}
+                polls[task_id] = polls.get(task_id, 0) + 1
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+                count = polls[task_id]
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            if jobs[task_id] == "bad":
+                return 200, {"task_id": task_id, "status": "failed", "error_code": "NSFW", "error_message": "blocked"}
+            if count < 3:
+                return 200, {"task_id": task_id, "status": "processing"}
+            if count == 3:
+                return 200, {"task_id": task_id, "status": "downloading"}
+            return 200, {"task_id": task_id, "status": "completed", "video_url": f"https://cdn/{task_id}.mp4"}
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False, api_key="test-key")
+            fast = VideoJobConfig(
+                initial_interval=0.01, max_interval=0.05, expected_seconds={8: 0.05}, max_in_flight=3
+            )
+
+            async def run():
+                async with sdk.video_tracker(fast) as tracker:
+                    jobs_ = [await tracker.submit("bad" if i % 5 == 0 else f"cat {i}") for i in range(20)]
+                    results = await asyncio.gather(*jobs_)
+
+                    missing = tracker.track(str(uuid.uuid4()))
+                    try:
+                        await missing
+                        raise AssertionError("不存在的任务应该抛错")
+                    except GraphQLSDKError:
+                        pass
+
+                    polls_before = sum(polls.values())
+                    await asyncio.sleep(0.1)
+                    assert sum(polls.values()) == polls_before, "任务结束后不应该再查状态"
+                    return results, tracker.stats()
+
+            results, stats = asyncio.run(run())
+            assert sum(r.ok for r in results) == 16 and sum(r.status == "failed" for r in results) == 4
+            assert all(r.video_url.endswith(".mp4") for r in results if r.ok)
+            assert all(polls[r.task_id] == 1 for r in results if not r.ok), "failed 之后立刻停止轮询"
+            assert all(polls[r.task_id] == 4 for r in results if r.ok), "completed 之后立刻停止轮询"
+            assert in_flight[1] <= 3, f"状态查询并发超过上限: {in_flight[1]}"
+            assert stats.submitted == 20 and stats.completed == 16 and stats.failed == 4
+            assert stats.errors == 1 and stats.tracking == 0
+            print(f"   20 个任务，状态查询 {stats.polls} 次，并发峰值 {in_flight[1]}，统计: {stats.to_dict()}")
+
+    run_test("视频任务跟踪", test_fn)
+
+
+def test_webhook_receiver():
+    """测试30：内嵌 webhook 接收器（验签 + 交出任务结果 + 过期才轮询）"""
+
+    def test_fn():
+        import json
+        import threading
+        import uuid
+        import requests
+        from nanobanana_sdk import (
+            JSONCodec,
+            VideoJobConfig,
+            WebhookEvent,
+            WebhookReceiver,
+            get_codec,
+            sign_payload,
+            verify_signature,
+        )
+
+        secret = "whsec_test"
+        body = b'{"video_id": "v1"}'
+        assert verify_signature(body, sign_payload(body, secret, "sha512"), secret, "sha512")
+        assert not verify_signature(body, sign_payload(body, "wrong", "sha256"), secret, "sha256")
+        assert not verify_signature(body, sign_payload(body, secret), secret, "md5")
+
+        class DecodeError(Exception):
+            pass
+
+        class StrictCodec(JSONCodec):
+            """解码失败抛的不是 ValueError，靠 decode_errors 声明"""
+            name = "strict"
+            decode_errors = (DecodeError,)
+
+            def __init__(self):
+                self.inner = get_codec("json")
+                self.loads_calls = 0
+
+            def dumps(self, obj, pretty=False):
+                return self.inner.dumps(obj, pretty)
+
+            def loads(self, data):
+                self.loads_calls += 1
+                try:
+                    return self.inner.loads(data)
+                except ValueError:
+                    raise DecodeError(data) from None
+
+        codec = StrictCodec()
+        receiver_url = {}
+        polls = {}
+        prompts = {}
+        lock = threading.Lock()
+
+        def deliver(payload, key=secret):
+            raw = json.dumps(payload).encode()
+            return requests.post(receiver_url["url"], data=raw, headers={
+                "Content-Type": "application/json",
+                "X-Webhook-Signature": sign_payload(raw, key),
+                "X-Webhook-Signature-Algorithm": "sha256",
+                "X-Webhook-Id": "wh_1",
+                "X-Webhook-Timestamp": str(int(time.time() * 1000)),
+            })
+
+        def handler(payload, headers):
+            path = headers["path"]
+            if path == "/api/v1/video/generate":
+                task_id = str(uuid.uuid4())
+                with lock:
+                    prompts[task_id] = payload["prompt"]
+                if payload["prompt"] == "bad":
+                    event = {"video_id": task_id, "error": "blocked"}
+                else:
+                    event = {"video_id": task_id, "status": "completed", "url": f"https://cdn/{task_id}.mp4"}
+                if payload["prompt"] != "silent":
+                    threading.Timer(0.05, deliver, (event,)).start()  # 平台的投递 worker（替身）
+                return 200, {"task_id": task_id, "status": "processing"}
+
+            task_id = path.rsplit("/", 1)[-1]
+            with lock:
+                polls[task_id] = polls.get(task_id, 0) + 1
+            return 200, {"task_id": task_id, "status": "completed", "video_url": "https://cdn/polled.mp4"}
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False, api_key="test-key")
+            config = VideoJobConfig(initial_interval=0.02, expected_seconds={8: 0.2}, webhook_grace=0.1)
+
+            async def run():
+                async with WebhookReceiver(secret, codec=codec) as receiver:
+                    receiver_url["url"] = receiver.url
+                    async with sdk.video_tracker(config, webhook=receiver) as tracker:
+                        names = ["cat"] * 7 + ["bad", "silent", "silent"]
+                        jobs = [await tracker.submit(name) for name in names]
+
+                        forged = await asyncio.to_thread(deliver, {"video_id": jobs[-1].task_id, "error": "x"}, "evil")
+                        assert forged.status_code == 401, "签名不对必须拒绝"
+
+                        garbage = b"not json"
+                        broken = await asyncio.to_thread(requests.post, receiver.url, data=garbage, headers={
+                            "X-Webhook-Signature": sign_payload(garbage, secret),
+                            "X-Webhook-Signature-Algorithm": "sha256",
+                        })
+                        assert broken.status_code == 400, "编解码器的解码错误也要接住，回 400"
+
+                        started = time.monotonic()
+                        results = await asyncio.gather(*jobs)
+                        elapsed = time.monotonic() - started
+
+                        # webhook 比 track() 先到
+                        early = str(uuid.uuid4())
+                        tracker.handle_webhook(WebhookEvent(payload={"video_id": early, "status": "completed"}))
+                        assert (await tracker.track(early)).ok
+                        return results, elapsed, tracker.stats(), receiver.stats()
+
+            results, elapsed, stats, received = asyncio.run(run())
+            assert [r.status for r in results] == ["completed"] * 7 + ["failed", "completed", "completed"]
+            assert results[7].error_message == "blocked"
+            assert results[8].video_url == "https://cdn/polled.mp4", "silent 任务是轮询拿到结果的"
+            polled = {task_id for task_id, prompt in prompts.items() if prompt == "silent"}
+            assert set(polls) == polled, f"只有 webhook 过期的任务才轮询: {len(polls)} 个被轮询"
+            assert stats.webhooks == 9 and stats.overdue == 2
+            assert received.rejected == 2 and received.matched == 8
+            assert codec.loads_calls == 9, "投递内容必须用传进来的编解码器解码"
+            print(f"   10 个任务：8 个由 webhook 交结果，2 个过期后轮询（{elapsed:.2f}s），统计: {stats.to_dict()}")
+
+    run_test("Webhook 接收器", test_fn)
+
+
+def test_download_video():
+    """测试31：视频下载（流式写盘 + 断点续传 + 并行分块 + 大小校验）"""
+
+    def test_fn():
+        import os
+        import random
+        import re
+        import tempfile
+        import threading
+        from nanobanana_sdk import DownloadConfig, GraphQLErrorType, GraphQLSDKError
+
+        rng = random.Random(42)
+        files = {name: bytes(rng.getrandbits(8) for _ in range(size))
+                 for name, size in [("small", 50_000), ("flaky", 60_000), ("large", 200_000), ("old", 10_000)]}
+        lock = threading.Lock()
+        log = []  # (文件名, Range)
+        flaky_failed = []
+
+        def handler(payload, headers):
+            name = headers["path"].rsplit("/", 1)[-1].split(".")[0]
+            data = files.get(name)
+            if data is None:
+                return 404, {"error": "NOT_FOUND"}
+            base = {"Content-Type": "video/mp4", "Accept-Ranges": "bytes"}
+            if headers["method"] == "HEAD":
+                return 200, data, base
+            with lock:
+                log.append((name, headers.get("Range")))
+
+            status, start, end = 200, 0, len(data) - 1
+            m = re.match(r"bytes=(\d+)-(\d*)", headers.get("Range") or "")
+            if m:
+                start = int(m.group(1))
+                end = min(int(m.group(2)), end) if m.group(2) else end
+                if start > end:
+                    return 416, b"", {"Content-Range": f"bytes */{len(data)}"}
+                status = 206
+                base["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+
+            if name == "flaky" and not flaky_failed:
+                flaky_failed.append(True)
+
+                def cut():  # 发到一半断开连接
+                    yield data[:20_000]
+                    raise BrokenPipeError
+
+                return status, cut(), {**base, "Connection": "close"}
+            return status, data[start:end + 1], base
+
+        with LocalGraphQLServer(handler) as server, tempfile.TemporaryDirectory() as tmp:
+            sdk = create_sdk(server.url, enable_logging=False)
+            cdn = server.url.replace("/api/graphql", "/cdn")
+            config = DownloadConfig(chunk_size=4096, part_size=32_000, parallel_threshold=100_000)
+
+            def video(name, **extra):
+                return {"id": name, "permanentVideoUrl": f"{cdn}/{name}.mp4", "fileSizeBytes": len(files[name]), **extra}
+
+            # 1. 小文件单流
+            result = sdk.download_video(video("small"), tmp, config)
+            assert open(result.path, "rb").read() == files["small"] and result.parts == 1
+
+            # 2. 下到一半断了，Range 接着下，总共只收一遍
+            result = sdk.download_video(video("flaky"), os.path.join(tmp, "flaky.mp4"), config)
+            assert open(result.path, "rb").read() == files["flaky"]
+            assert result.resumed and result.downloaded == len(files["flaky"])
+            assert log[-1] == ("flaky", "bytes=20000-")
+
+            # 3. 大文件并行分块
+            result = sdk.download_video(video("large"), tmp, config)
+            assert open(result.path, "rb").read() == files["large"] and result.parts == 7
+            assert len([1 for name, r in log if name == "large" and r]) == 7
+
+            # 4. 上次崩在半路的 .part 文件：接着下
+            with open(os.path.join(tmp, "old.mp4.part"), "wb") as f:
+                f.write(files["old"][:4000])
+            result = sdk.download_video(video("old"), tmp, config)
+            assert open(result.path, "rb").read() == files["old"] and result.downloaded == 6000
+
+            # 5. 已经下完的跳过；大小对不上的报错、不留文件
+            assert sdk.download_video(video("old"), tmp, config).skipped
+            try:
+                sdk.download_video({**video("small"), "fileSizeBytes": 40_000}, os.path.join(tmp, "bad.mp4"), config)
+                raise AssertionError("大小对不上应该报错")
+            except GraphQLSDKError:
+                assert not os.path.exists(os.path.join(tmp, "bad.mp4"))
+                assert not os.path.exists(os.path.join(tmp, "bad.mp4.part"))
+
+            # 本地写不进去（目录不存在）：报本地 I/O 错误，不能当成响应解析错误
+            try:
+                sdk.download_video(video("small"), os.path.join(tmp, "missing", "small.mp4"), config)
+                raise AssertionError("写不进去应该报错")
+            except GraphQLSDKError as e:
+                assert e.error_type == GraphQLErrorType.UNKNOWN_ERROR, e
+                assert isinstance(e.original_error, OSError) and "写入本地文件失败" in e.message, e
+
+            # 6. 批量：Google 临时链接先下（越早创建越靠前），过期的直接报错
+            log.clear()
+            batch = [
+                {**video("small"), "id": "b-small"},
+                {"id": "b-old", "googleVideoUrl": f"{cdn}/old.mp4", "createdAt": "2026-10-15T00:00:00Z"},
+                {"id": "b-expired", "googleVideoUrl": f"{cdn}/small.mp4", "isExpired": True},
+                {"id": "b-large", "googleVideoUrl": f"{cdn}/large.mp4", "createdAt": "2026-10-16T00:00:00Z"},
+            ]
+            results = list(sdk.download_videos(batch, os.path.join(tmp, "batch"), concurrency=1, config=config))
+            assert [r.variables["id"] for r in results] == ["b-old", "b-large", "b-small", "b-expired"]
+            assert [r.ok for r in results] == [True, True, True, False]
+            assert [name for name, _ in log][:2] == ["old", "large"]
+            print(f"   4 种下载场景 + 批量 {len(results)} 个（Google 临时链接优先），断点续传/分块/校验都 OK")
+
+    run_test("视频下载", test_fn)
+
+
+def test_batch_generate():
+    """测试32：批量生图（切块有界并发 + 逐条结果 + 检查点断点恢复）"""
+
+    def test_fn():
+        import os
+        import tempfile
+        import threading
+        import uuid
+        from nanobanana_sdk import BatchGenerateConfig
+
+        lock = threading.Lock()
+        tasks = {}
+        submitted = []  # 每次提交的提示词
+        peak = [0]
+
+        def handler(payload, headers):
+            if headers["path"] != "/api/batch-generate":
+                return 404, {"error": "NOT_FOUND"}
+            with lock:
+                if headers["method"] == "POST":
+                    prompts = [scene["prompt"] for scene in payload["scene_prompts"]]
+                    if "bad" in prompts:
+                        return 400, {"error": "Invalid scene prompt"}
+                    task_id = str(uuid.uuid4())
+                    tasks[task_id] = {"prompts": prompts, "done": 0}
+                    submitted.extend(prompts)
+                    running = sum(1 for t in tasks.values() if t["done"] < len(t["prompts"]))
+                    peak[0] = max(peak[0], running)
+                    return 200, {"success": True, "data": {"id": task_id, "status": "processing"}}
+
+                task = tasks[payload["id"]]
+                task["done"] = min(task["done"] + 1, len(task["prompts"]))  # 每查一次多出一张
+                images = [
+                    {"scene_prompt": p, "status": "failed", "image_url": None, "error": "NSFW"} if p == "fail"
+                    else {"scene_prompt": p, "status": "success", "image_url": f"https://cdn/{p}.png", "error": None}
+                    for p in task["prompts"][:task["done"]]
+                ]
+                status = "completed" if task["done"] == len(task["prompts"]) else "processing"
+                return 200, {"data": {"id": payload["id"], "status": status, "generated_images": images}}
+
+        prompts = [f"scene-{i}" for i in range(8)] + ["fail", "bad"]
+        config = BatchGenerateConfig(chunk_size=3, concurrency=2, poll_interval=0.01, max_poll_interval=0.05)
+
+        with LocalGraphQLServer(handler) as server, tempfile.TemporaryDirectory() as tmp:
+            sdk = create_sdk(server.url, enable_logging=False)
+            checkpoint = os.path.join(tmp, "scenes.ckpt")
+
+            # 1. 跑到一半"崩了"：只拿 4 条就停
+            async def crash():
+                seen = []
+                async for item in sdk.batch_generate("subject-1", prompts, checkpoint, config):
+                    seen.append(item)
+                    if len(seen) == 4:
+                        break
+                return seen
+
+            first = asyncio.run(crash())
+            assert all(item.ok and item.image_url for item in first)
+            assert peak[0] <= 2, f"同时在跑的任务不能超过 concurrency: {peak[0]}"
+
+            # 2. 同一批输入重跑：完成的直接恢复，提交过的任务接着轮询，只提交剩下的
+            run = sdk.batch_generate("subject-1", prompts, checkpoint, config)
+
+            async def resume():
+                return [item async for item in run]
+
+            results = asyncio.run(resume())
+            by_index = {item.index: item for item in results}
+            assert sorted(by_index) == list(range(10)) and len(results) == 10
+            stats = run.stats()
+            assert stats.restored >= 4 and stats.chunks_resumed >= 1, stats.to_dict()
+            ok = [p for p in prompts if p not in ("fail", "bad")]
+            assert sorted(p for p in submitted if p in ok) == sorted(ok), "完成过的条目不能重新提交"
+            assert all(by_index[i].ok and by_index[i].image_url == f"https://cdn/scene-{i}.png" for i in range(8))
+            assert not by_index[8].ok and by_index[8].error == "NSFW"
+            assert not by_index[9].ok and "Invalid scene prompt" in by_index[9].error
+
+            # 3. 换了输入不能错用检查点
+            try:
+                asyncio.run(sdk.batch_generate("subject-2", prompts, checkpoint, config).__aiter__().__anext__())
+                raise AssertionError("换了输入应该报错")
+            except ValueError:
+                pass
+            print(f"   10 条 / 3 条一块 / 并发 2：中断后恢复 {stats.restored} 条、接着轮询 {stats.chunks_resumed} 个任务，没有重复提交")
+
+    run_test("批量生图", test_fn)
+
+
+def test_rate_limiter():
+    """测试33：客户端限流（按层级的令牌桶，跨线程 / 跨任务匀速放行）"""
+
+    def test_fn():
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from nanobanana_sdk import RateLimitConfig
+
+        pro = RateLimitConfig(tier="pro")
+        assert pro.quota == 1000 and abs(pro.rate - 1000 * 0.95 / 60) < 1e-9 and pro.capacity == 50
+        assert pro.rate * 60 + pro.capacity <= pro.quota, "任意 60 秒窗口都不能超配额"
+        for bad in ({}, {"tier": "pro", "requests_per_minute": 10}, {"tier": "gold"}, {"tier": "free", "utilization": 1.5}):
+            try:
+                RateLimitConfig(**bad)
+                raise AssertionError(f"应该拒绝 {bad}")
+            except ValueError:
+                pass
+
+        lock = threading.Lock()
+        arrivals = []
+
+        def handler(payload, headers):
+            with lock:
+                arrivals.append(time.monotonic())
+            return 200, {"data": {"user": {"id": payload["variables"]["id"]}}}
+
+        query = "query User($id: ID!) { user(id: $id) { id } }"
+        with LocalGraphQLServer(handler) as server:
+            # 190 次/秒匀速，突发 5
+            sdk = create_sdk(server.url, enable_logging=False,
+                             rate_limit=RateLimitConfig(requests_per_minute=12000, burst=5))
+
+            start = time.monotonic()
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(lambda i: sdk.query(query, {"id": f"t{i}"}), range(100)))
+            sync_elapsed = time.monotonic() - start
+            assert sync_elapsed >= 0.45, f"100 个请求不能快过令牌桶: {sync_elapsed:.2f}s"
+
+            async def burst():
+                await asyncio.gather(*[sdk.query_async(query, {"id": f"a{i}"}) for i in range(60)])
+
+            start = time.monotonic()
+            asyncio.run(burst())
+            async_elapsed = time.monotonic() - start
+            assert async_elapsed >= 0.25, f"60 个协程不能快过令牌桶: {async_elapsed:.2f}s"
+
+            # 服务端看到的：任意 0.1 秒窗口里不超过 突发 + 速率 × 0.1（留一点计时误差）
+            arrivals.sort()
+            worst = max(sum(1 for t in arrivals[i:] if t - a < 0.1) for i, a in enumerate(arrivals))
+            assert worst <= 5 + 19 + 8, f"放行不够匀速: 0.1 秒内 {worst} 个"
+
+            stats = sdk.rate_limiter_stats()
+            assert stats.acquired == 160 and stats.delayed >= 140, stats.to_dict()
+            assert create_sdk(server.url, enable_logging=False).rate_limiter_stats() is None
+            print(f"   同步 100 个 {sync_elapsed:.2f}s、异步 60 个 {async_elapsed:.2f}s，0.1 秒窗口峰值 {worst} 个")
+
+    run_test("客户端限流", test_fn)
+
+
+def test_retry_after():
+    """测试34：Retry-After / X-RateLimit-* 响应头（重试等待 + 喂给限流器）"""
+
+    def test_fn():
+        from email.utils import parsedate_to_datetime
+        from nanobanana_sdk import GraphQLSDKError, RateLimitConfig, RateLimitInfo, RetryConfig
+
+        # 响应头解析：秒数 / HTTP 日期 / Unix 时间戳（秒、毫秒）/ 不带 X- 前缀
+        now = 1_800_000_000
+        assert RateLimitInfo.from_headers({"Retry-After": "30"}).wait == 30
+        date = "Fri, 15 Jan 2027 08:00:10 GMT"
+        assert RateLimitInfo.from_headers(
+            {"retry-after": date}, now=parsedate_to_datetime(date).timestamp() - 10
+        ).retry_after == 10
+        info = RateLimitInfo.from_headers({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(now + 12)}, now=now)
+        assert info.remaining == 0 and info.wait == 12
+        assert RateLimitInfo.from_headers({"RateLimit-Remaining": "0", "RateLimit-Reset": str((now + 5) * 1000)},
+                                          now=now).wait == 5
+        assert RateLimitInfo.from_headers({"X-RateLimit-Remaining": "7", "X-RateLimit-Reset": "20"}).wait is None
+
+        calls = []
+
+        def handler(payload, headers):
+            calls.append(time.monotonic())
+            mode = payload["variables"]["mode"]
+            if mode == "retry" and len(calls) == 1:
+                return 429, {"error": "Too Many Requests"}, {"Retry-After": "0.2"}
+            if mode == "forever":
+                return 429, {"error": "Too Many Requests"}, {"Retry-After": "3600", "X-RateLimit-Limit": "100"}
+            if mode == "drain":
+                return 200, {"data": {"ok": True}}, {
+                    "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 0.3)
+                }
+            return 200, {"data": {"ok": True}}
+
+        query = "query Ok($mode: String) { ok(mode: $mode) }"
+        with LocalGraphQLServer(handler) as server:
+            # 退避算出来要等 5 秒，服务端说 0.2 秒就行 → 按服务端的来
+            sdk = create_sdk(server.url, enable_logging=False,
+                             retry_config=RetryConfig(max_attempts=3, initial_delay=5, max_delay=10, jitter=False))
+            start = time.monotonic()
+            assert sdk.query(query, {"mode": "retry"}) == {"ok": True}
+            assert len(calls) == 2 and 0.2 <= calls[1] - calls[0] < 1, calls
+
+            # 要等一小时：超过 max_retry_after，不重试，直接把响应头带出来
+            calls.clear()
+            try:
+                sdk.query(query, {"mode": "forever"})
+                raise AssertionError("应该直接报错")
+            except GraphQLSDKError as e:
+                assert len(calls) == 1, "不能再浪费重试次数"
+                assert e.response_headers["Retry-After"] == "3600" and e.rate_limit.wait == 3600
+                assert e.rate_limit.limit == 100 and e.to_dict()["response_headers"]["X-RateLimit-Limit"] == "100"
+
+            # 配额用完的响应头喂给限流器：下一个请求（哪个线程 / 协程都一样）等到窗口重置
+            limited = create_sdk(server.url, enable_logging=False,
+                                 rate_limit=RateLimitConfig(requests_per_minute=60000))
+            calls.clear()
+
+            async def drain():
+                await limited.query_async(query, {"mode": "drain"})
+                await limited.query_async(query, {"mode": "ok"})
+
+            asyncio.run(drain())
+            assert calls[1] - calls[0] >= 0.25, f"应该等到窗口重置: {calls[1] - calls[0]:.2f}s"
+            assert limited.rate_limiter_stats().throttled == 1
+            print(f"   Retry-After 0.2s 生效（没等 5s 退避），3600s 直接报错，配额用完后限流器暂停 {calls[1] - calls[0]:.2f}s")
+
+    run_test("Retry-After 响应头", test_fn)
+
+
+def test_query_complexity():
+    """测试35：查询复杂度预估（服务端同款打分 + 超限自动拆分合并 + 分数缓存）"""
+
+    def test_fn():
+        import threading
+        from graphql import FieldNode, OperationDefinitionNode, parse
+        from nanobanana_sdk import ComplexityConfig, GraphQLErrorType, GraphQLSDKError, calculate_complexity
+
+        # 打分规则和 lib/graphql/query-complexity.ts 逐条对应
+        assert calculate_complexity(parse("query { me { id email } artworks(limit: 10) { id title } }")) == 8 + 13
+        assert calculate_complexity(parse('mutation { createPost(title: "x") { id } }')) == 10 + 7
+        assert calculate_complexity(parse("query { me { ...F } } fragment F on User { id }")) == 7
+        assert calculate_complexity(parse("query { videosConnection { edges { node { id } } } }")) == 11 + 11 + 7  # edges 以 s 结尾也按列表算
+
+        lock = threading.Lock()
+        received = []
+
+        def handler(payload, headers):
+            document = parse(payload["query"])
+            operation = next(d for d in document.definitions if isinstance(d, OperationDefinitionNode))
+            with lock:
+                received.append(payload)
+            if calculate_complexity(document) > 30:
+                return 200, {"errors": [{"message": "Query complexity exceeds maximum allowed complexity 30"}]}
+            defined = {d.variable.name.value for d in operation.variable_definitions}
+            if defined != set(payload.get("variables") or {}):
+                return 200, {"errors": [{"message": f"Variable mismatch: {defined}"}]}
+            data = {}
+            for selection in operation.selection_set.selections:
+                key = (selection.alias or selection.name).value
+                data[key] = {"field": selection.name.value, "variables": sorted(defined)}
+            return 200, {"data": data}
+
+        dashboard = """
+        query Dashboard($limit: Int, $uid: ID!) {
+            artworks(limit: $limit) { id title }
+            blogPosts(limit: $limit) { id title }
+            user(id: $uid) { ...UserFields }
+            videos(limit: $limit) { id }
+        }
+        fragment UserFields on User { id email }
+        """
+        variables = {"limit": 5, "uid": "u1"}
+
+        with LocalGraphQLServer(handler) as server:
+            sdk = create_sdk(server.url, enable_logging=False, complexity=ComplexityConfig(max_complexity=30))
+            assert sdk.estimate_complexity(dashboard) == 13 + 13 + 7 + 12
+
+            # 45 > 30：按顶层字段拆成两个请求，每个只带自己用到的变量和片段，结果合并
+            data = sdk.query(dashboard, variables)
+            assert list(data) == ["artworks", "blogPosts", "user", "videos"]
+            assert data["artworks"]["variables"] == ["limit"] and data["user"]["variables"] == ["limit", "uid"]
+            assert len(received) == 2 and all("errors" not in r for r in received)
+            assert "UserFields" not in received[0]["query"] and "fragment UserFields" in received[1]["query"]
+
+            received.clear()
+            assert asyncio.run(sdk.query_async(dashboard, variables)) == data
+            assert len(received) == 2
+
+            # 超限的变更、单个顶层字段就超限：本地直接拒绝，不发请求
+            received.clear()
+            huge = "query { artworks { " + " ".join(f"f{i}" for i in range(40)) + " } me { id } }"
+            mutation = "mutation { a: createPost { id } b: createPost { id } c: createPost { id } }"
+            for bad, call in ((huge, sdk.query), (mutation, sdk.mutate)):
+                try:
+                    call(bad)
+                    raise AssertionError("应该本地拒绝")
+                except GraphQLSDKError as e:
+                    assert e.error_type == GraphQLErrorType.VALIDATION_ERROR, e
+            assert received == []
+
+            # 语法错误：和没配置 complexity 时一样抛 GraphQLSDKError，不能漏出原始异常
+            calls = (
+                lambda: sdk.query("query { me { id "),
+                lambda: sdk.mutate("mutation { x "),
+                lambda: asyncio.run(sdk.query_async("query { me { id ")),
+                lambda: sdk.estimate_complexity("query { me { id "),
+            )
+            for call in calls:
+                try:
+                    call()
+                    raise AssertionError("语法错误应该报错")
+                except GraphQLSDKError:
+                    pass
+            assert received == []
+
+            stats = sdk.complexity_stats()
+            assert stats.split == 2 and stats.parts == 4 and stats.rejected == 2, stats.to_dict()
+            assert stats.cache_hits > 0, "同一段文本不能重复打分"
+            assert create_sdk(server.url, enable_logging=False).complexity_stats() is None
+            print(f"   复杂度 45 / 上限 30 拆成 2 个请求合并回来，本地拒绝 2 个，分数缓存命中 {stats.cache_hits} 次")
+
+    run_test("查询复杂度", test_fn)
+
+
 # ============================================================================
 # 主测试函数
 # ============================================================================
@@ -354,6 +2211,31 @@ def main():
     test_context_manager()
     test_error_types()
     test_usage_tips()
+    test_document_cache()
+    test_async_connection_pool()
+    test_threaded_sync_transport()
+    test_batch()
+    test_dataloader()
+    test_persisted_queries()
+    test_normalized_cache()
+    test_single_flight()
+    test_get_conditional_requests()
+    test_compression()
+    test_json_codec()
+    test_stream_query()
+    test_iter_connection()
+    test_iter_pages()
+    test_execute_many()
+    test_map_query()
+    test_subscriptions()
+    test_subscription_hub()
+    test_video_tracker()
+    test_webhook_receiver()
+    test_download_video()
+    test_batch_generate()
+    test_rate_limiter()
+    test_retry_after()
+    test_query_complexity()
 
     # 执行异步测试
     asyncio.run(test_async_query())